@@ -0,0 +1,121 @@
+"""Microbenchmark: scalar math haversine vs. the NumPy batch API.
+
+Run from the repository root:
+    python -m benchmarks.bench_haversine [--queries 200] [--stations 1000]
+
+Uses assets/polish_cities.json when it is available, synthetic points of
+a similar size otherwise. Stations are always synthetic (the stub
+servers' station list), so nothing is downloaded or written to the app's
+HTTP cache.
+"""
+import argparse
+import json
+import math as m
+import os
+import random
+import timeit
+import numpy as np
+import logic.utils.haversine as hv
+from benchmarks.stub_servers import hydro_stations
+
+CITIES_PATH = "assets/polish_cities.json"
+
+
+def calc_distance_scalar(lat_a, lon_a, lat_b, lon_b):
+    """The pre-NumPy implementation, kept as the baseline."""
+    lat_a, lon_a, lat_b, lon_b = map(m.radians, [lat_a, lon_a, lat_b, lon_b])
+
+    dlat = lat_b - lat_a
+    dlon = lon_b - lon_a
+
+    a = m.sin(dlat / 2) ** 2 + m.cos(lat_a) * m.cos(lat_b) * m.sin(dlon / 2) ** 2
+    c = 2 * m.atan2(m.sqrt(a), m.sqrt(1 - a))
+    return 6371 * c
+
+
+def find_closest_city_scalar(lat, lon, dict_of_loc):
+    return min(
+        dict_of_loc,
+        key=lambda city: calc_distance_scalar(
+            lat, lon,
+            city["Latitude"],
+            city["Longitude"]
+        ) if city["Type"] == "city" else float("inf")
+    )
+
+
+def find_closest_hydrostation_scalar(lat, lon, dict_of_loc):
+    return min(
+        dict_of_loc,
+        key=lambda station: calc_distance_scalar(
+            lat, lon,
+            float(station["lat"]),
+            float(station["lon"])
+        )
+    )
+
+
+def _random_point():
+    return random.uniform(49.0, 54.8), random.uniform(14.1, 24.1)
+
+
+def load_cities():
+    if os.path.exists(CITIES_PATH):
+        with open(CITIES_PATH, "r", encoding="utf-8") as f:
+            return json.load(f), "assets/polish_cities.json"
+
+    cities = []
+    for i in range(40000):
+        lat, lon = _random_point()
+        cities.append({"Name": f"Place {i}", "Type": "city" if i % 4 == 0 else "village",
+                       "Latitude": lat, "Longitude": lon})
+    return cities, "synthetic (40000 entries)"
+
+
+def load_stations(count):
+    return hydro_stations(count), f"synthetic ({count} stations)"
+
+
+def bench(label, fn, queries, repeat=3):
+    points = [_random_point() for _ in range(queries)]
+    best = min(timeit.repeat(lambda: [fn(lat, lon) for lat, lon in points], number=1, repeat=repeat))
+    per_query = best / queries * 1e6
+    print(f"  {label:<32} {per_query:12.1f} us/query")
+    return per_query
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--stations", type=int, default=1000)
+    args = parser.parse_args()
+
+    cities, source = load_cities()
+    print(f"Closest city over {source}:")
+    scalar = bench("scalar find_closest_city", lambda a, b: find_closest_city_scalar(a, b, cities), args.queries)
+    batch = bench("numpy find_closest_city", lambda a, b: hv.find_closest_city(a, b, cities), args.queries)
+    print(f"  speedup: {scalar / batch:.1f}x")
+
+    stations, source = load_stations(args.stations)
+    print(f"Closest station over {source}:")
+    scalar = bench("scalar find_closest_hydrostation",
+                   lambda a, b: find_closest_hydrostation_scalar(a, b, stations), args.queries)
+    batch = bench("numpy find_closest_hydrostation",
+                  lambda a, b: hv.find_closest_hydrostation(a, b, stations), args.queries)
+    print(f"  speedup: {scalar / batch:.1f}x")
+
+    # Raw kernels, with the per-call list-to-array conversion out of the picture
+    lats = np.array([float(s["lat"]) for s in stations])
+    lons = np.array([float(s["lon"]) for s in stations])
+    print(f"Kernel only, one-to-many over {len(lats)} points:")
+    scalar = bench("scalar loop", lambda a, b: [calc_distance_scalar(a, b, x, y) for x, y in zip(lats, lons)],
+                   args.queries)
+    batch = bench("distances_from", lambda a, b: hv.distances_from(a, b, lats, lons), args.queries)
+    print(f"  speedup: {scalar / batch:.1f}x")
+
+    matrix_time = min(timeit.repeat(lambda: hv.pairwise_distances(lats, lons, dtype=np.float32), number=1, repeat=3))
+    print(f"Pairwise float32 matrix {len(lats)}x{len(lats)}: {matrix_time * 1e3:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
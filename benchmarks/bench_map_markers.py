@@ -0,0 +1,127 @@
+"""Benchmark: map HTML size and page-load time against marker count.
+
+Compares the old approach (one folium.Marker per location, saved and
+post-processed) with the cached shell plus compact marker payload.
+
+Run from the repository root:
+    python -m benchmarks.bench_map_markers [--counts 10 100 1000 10000 50000] [--load]
+
+--load also measures page-load time in an offscreen QtWebEngine page
+(needs QtWebEngine and network access for the Leaflet CDN assets).
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+import folium
+from logic.map.map_handler import MapHandler
+
+# Keeps the QApplication alive while pages load
+_app = None
+
+
+def random_markers(count):
+    return [[random.uniform(49.0, 54.8), random.uniform(14.1, 24.1)] for _ in range(count)]
+
+
+def build_per_marker_html(markers):
+    """The pre-payload pipeline: one folium.Marker each, then modify_html."""
+    m = folium.Map(location=[52.2297, 21.0122], zoom_start=6)
+    m.add_child(folium.LatLngPopup())
+    icon = folium.Icon(color="darkpurple", icon_color="white", icon="heart")
+    for marker in markers:
+        folium.Marker(location=marker, icon=icon).add_to(m)
+    return MapHandler.modify_html(m.get_root().render())
+
+
+def build_payload_html(handler, markers):
+    handler.markers = markers
+    handler.create_map()
+    return handler.render_html(inline_markers=True)
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def measure_page_load(html, timeout=120):
+    """Seconds until loadFinished and window.markersReady, or None on failure."""
+    from PyQt5.QtCore import QEventLoop, QTimer, QUrl
+    from PyQt5.QtWebEngineWidgets import QWebEnginePage
+
+    path = tempfile.mktemp(suffix=".html")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(html)
+
+    page = QWebEnginePage()
+    loop = QEventLoop()
+    state = {"ok": False}
+
+    def poll():
+        page.runJavaScript("window.markersReady === true", on_ready)
+
+    def on_ready(ready):
+        if ready:
+            state["ok"] = True
+            loop.quit()
+        else:
+            QTimer.singleShot(5, poll)
+
+    def on_load(ok):
+        if ok:
+            poll()
+        else:
+            loop.quit()
+
+    page.loadFinished.connect(on_load)
+    QTimer.singleShot(timeout * 1000, loop.quit)
+
+    start = time.perf_counter()
+    page.load(QUrl.fromLocalFile(path))
+    loop.exec_()
+    elapsed = time.perf_counter() - start
+
+    page.deleteLater()
+    os.unlink(path)
+    return elapsed if state["ok"] else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--counts", type=int, nargs="+", default=[10, 100, 1000, 10000, 50000])
+    parser.add_argument("--load", action="store_true", help="measure page-load time in QtWebEngine")
+    args = parser.parse_args()
+
+    if args.load:
+        from PyQt5.QtWidgets import QApplication
+        global _app
+        _app = QApplication.instance() or QApplication([])
+
+    handler = MapHandler()
+    handler.get_shell()
+
+    print(f"{'markers':>8} | {'per-marker KB':>13} {'build s':>8} | {'payload KB':>10} {'build s':>8}"
+          + (f" | {'old load s':>10} {'new load s':>10}" if args.load else ""))
+
+    for count in args.counts:
+        markers = random_markers(count)
+        # Add the ready flag the new page sets itself, so both pages are polled the same way
+        old_html, old_time = timed(build_per_marker_html, markers)
+        old_html = old_html.replace("</html>", "<script>window.markersReady = true;</script></html>")
+        new_html, new_time = timed(build_payload_html, handler, markers)
+
+        line = (f"{count:>8} | {len(old_html) / 1024:>13.1f} {old_time:>8.3f} | "
+                f"{len(new_html) / 1024:>10.1f} {new_time:>8.3f}")
+
+        if args.load:
+            old_load = measure_page_load(old_html)
+            new_load = measure_page_load(new_html)
+            line += " | " + " ".join(f"{t:>10.2f}" if t is not None else f"{'failed':>10}" for t in (old_load, new_load))
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
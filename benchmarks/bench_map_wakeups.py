@@ -0,0 +1,127 @@
+"""Benchmark: GUI-thread wakeups while the map sits idle, localStorage polling vs. the QWebChannel bridge.
+
+Run from the repository root:
+    python -m benchmarks.bench_map_wakeups [--seconds 10] [--clicks 3]
+
+"polling" is the old MainView loop: a 100 ms QTimer whose callback asked
+the page for pending coordinates (the runJavaScript round trip itself is
+not included, so its numbers are a lower bound). "bridge" is MapBridge
+receiving add_location calls queued to the GUI thread, the way
+QWebChannel delivers them. Both run for the same interval with the same
+simulated clicks; every event Qt delivers in the meantime is counted,
+next to the WakeupMeter ticks (idle = ticks that carried no click), CPU
+time and click-to-handler latency.
+"""
+import argparse
+import random
+import time
+from PyQt5.QtCore import QCoreApplication, QEvent, QEventLoop, QMetaObject, QObject, QTimer, Qt, Q_ARG
+from logic.map.map_bridge import MapBridge, WakeupMeter
+
+# The old check_coordinates interval
+POLL_INTERVAL_MS = 100
+
+# Keeps the QCoreApplication alive for both runs
+_app = None
+
+
+class EventCounter(QObject):
+    """Counts the events Qt delivers on the GUI thread."""
+
+    def __init__(self):
+        super().__init__()
+        self.count = 0
+
+    def eventFilter(self, obj, event):
+        if event.type() in (QEvent.Timer, QEvent.MetaCall):
+            self.count += 1
+        return False
+
+
+class PollingMap:
+    """The pre-bridge path: clicks wait in "localStorage" until the next poll picks them up."""
+
+    def __init__(self, on_click):
+        self.on_click = on_click
+        self.meter = WakeupMeter()
+        self.pending = None
+        self.timer = QTimer()
+        self.timer.timeout.connect(self.check_coordinates)
+        self.timer.start(POLL_INTERVAL_MS)
+
+    def click(self, clicked_at):
+        self.pending = clicked_at
+
+    def check_coordinates(self):
+        self.meter.tick()
+        if self.pending is not None:
+            clicked_at, self.pending = self.pending, None
+            self.on_click(clicked_at)
+
+    def close(self):
+        self.timer.stop()
+
+
+class BridgeMap:
+    """The QWebChannel path: each click is one queued add_location call."""
+
+    def __init__(self, on_click):
+        self.bridge = MapBridge()
+        self.meter = self.bridge.meter
+        self.bridge.coordinates_received.connect(lambda lat, lng, clicked_at: on_click(clicked_at))
+
+    def click(self, clicked_at):
+        QMetaObject.invokeMethod(self.bridge, "add_location", Qt.QueuedConnection,
+                                 Q_ARG(float, 52.0), Q_ARG(float, 21.0), Q_ARG(float, clicked_at))
+
+    def close(self):
+        self.bridge.deleteLater()
+
+
+def run(cls, seconds, clicks):
+    app = QCoreApplication.instance()
+    latencies = []
+    counter = EventCounter()
+    map_path = cls(lambda clicked_at: latencies.append(time.perf_counter() - clicked_at))
+
+    # The same random click times for both paths
+    rng = random.Random(1)
+    for i in range(clicks):
+        at = int(seconds * 1000 * (i + rng.random()) / clicks)
+        QTimer.singleShot(at, lambda: map_path.click(time.perf_counter()))
+
+    loop = QEventLoop()
+    QTimer.singleShot(int(seconds * 1000), loop.quit)
+    app.installEventFilter(counter)
+    cpu = time.process_time()
+    loop.exec_()
+    cpu = time.process_time() - cpu
+    app.removeEventFilter(counter)
+    map_path.close()
+
+    # The click and quit timers fire in both runs; leave them out of the idle count
+    events = counter.count - clicks - 1
+    latency = sum(latencies) / len(latencies) * 1000 if latencies else float("nan")
+    return map_path.meter.count, map_path.meter.count - len(latencies), events, cpu * 1000, latency
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--clicks", type=int, default=3)
+    args = parser.parse_args()
+
+    global _app
+    _app = QCoreApplication.instance() or QCoreApplication([])
+
+    print(f"{args.seconds:.0f} s idle map, {args.clicks} clicks")
+    print(f"{'path':>8} | {'wakeups':>8} {'idle':>6} {'idle/s':>6} | {'Qt events':>9} | {'CPU ms':>7} | "
+          f"{'click latency ms':>16}")
+    for name, cls in (("polling", PollingMap), ("bridge", BridgeMap)):
+        wakeups, idle, events, cpu, latency = run(cls, args.seconds, args.clicks)
+        print(f"{name:>8} | {wakeups:>8} {idle:>6} {idle / args.seconds:>6.1f} | {events:>9} | {cpu:>7.1f} | "
+              f"{latency:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
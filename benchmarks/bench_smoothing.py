@@ -0,0 +1,68 @@
+"""Benchmark: per-series interp1d smoothing vs. the batched, cached smoothing module.
+
+Run from the repository root:
+    python -m benchmarks.bench_smoothing [--sizes 72 1000 10000 100000] [--series 3]
+
+"per-series" is the old chart code: one interp1d(kind='cubic') per series
+plus mdates.num2date over the dense samples. "batched" fits all series
+with one spline call, "cached" repeats the same input.
+"""
+import argparse
+import timeit
+import matplotlib.dates as mdates
+import numpy as np
+from scipy.interpolate import interp1d
+import logic.stats.smoothing as smoothing
+
+
+def smooth_per_series(time_nums, series):
+    """The pre-batching implementation, kept as the baseline."""
+    dense_nums = np.linspace(time_nums[0], time_nums[-1], len(time_nums) * 6)
+    dense_times = mdates.num2date(dense_nums)
+    smoothed = [interp1d(time_nums, values, kind='cubic', fill_value='extrapolate')(dense_nums) for values in series]
+    return dense_times, smoothed
+
+
+def synthetic_series(size, count):
+    start = mdates.date2num(np.datetime64("2025-01-01T00:00"))
+    time_nums = start + np.arange(size) / 24
+    series = [10 + 5 * np.sin(np.arange(size) / 24 * 2 * np.pi + i) + np.random.normal(0, 0.5, size) for i in range(count)]
+    return time_nums, series
+
+
+def best_of(fn, repeat):
+    number = max(1, int(0.2 / max(timeit.timeit(fn, number=1), 1e-6)))
+    return min(timeit.repeat(fn, number=number, repeat=repeat)) / number
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[72, 1000, 10000, 100000])
+    parser.add_argument("--series", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'points':>8} | {'per-series ms':>13} {'batched ms':>10} {'cached ms':>10} | {'speedup':>7} {'max diff':>9}")
+
+    for size in args.sizes:
+        time_nums, series = synthetic_series(size, args.series)
+
+        def batched():
+            smoothing.clear_cache()
+            return smoothing.smooth_series(time_nums, series)
+
+        old = best_of(lambda: smooth_per_series(time_nums, series), args.repeat)
+        new = best_of(batched, args.repeat)
+        smoothing.smooth_series(time_nums, series)
+        cached = best_of(lambda: smoothing.smooth_series(time_nums, series), args.repeat)
+
+        _, expected = smooth_per_series(time_nums, series)
+        _, actual = smoothing.smooth_series(time_nums, series)
+        diff = np.max(np.abs(np.asarray(expected) - actual))
+
+        print(f"{size:>8} | {old * 1e3:>13.3f} {new * 1e3:>10.3f} {cached * 1e3:>10.3f} | "
+              f"{old / new:>6.1f}x {diff:>9.1e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+"""Local stand-ins for the Open-Meteo, sunrisesunset.io and hydro data endpoints.
+
+Each API gets its own threaded HTTP server on 127.0.0.1 with a fixed
+response latency and configurable payload sizes. Responses carry an ETag
+and honour If-None-Match, like the real endpoints, so the HTTP cache's
+revalidation path is exercised too.
+
+    with StubServers(latency=0.05, meteo_hours=72, hydro_points=2000) as stubs:
+        ...  # data_fetcher now talks to the stubs
+"""
+import hashlib
+import json
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+import logic.stats.data_fetcher as data_fetcher
+
+
+def meteo_forecast(lat, lon, hours, start=None):
+    """One location's forecast in the Open-Meteo response format."""
+    start = start or datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    rng = random.Random(f"{lat},{lon}")
+    times = [start + timedelta(hours=i) for i in range(hours)]
+    temperature = [round(10 + 6 * rng.uniform(0.8, 1.2) * ((t.hour - 3) % 24 < 12) + rng.gauss(0, 1), 1) for t in times]
+    return {
+        "latitude": lat,
+        "longitude": lon,
+        "generationtime_ms": 0.5,
+        "utc_offset_seconds": 0,
+        "timezone": "GMT",
+        "hourly_units": {"time": "iso8601", "temperature_2m": "°C", "rain": "mm", "weather_code": "wmo code",
+                         "cloud_cover": "%", "apparent_temperature": "°C", "is_day": ""},
+        "hourly": {
+            "time": [t.strftime("%Y-%m-%dT%H:%M") for t in times],
+            "temperature_2m": temperature,
+            "rain": [round(max(0.0, rng.gauss(0, 0.6)), 1) for _ in times],
+            "weather_code": [rng.choice((0, 1, 2, 3, 61)) for _ in times],
+            "cloud_cover": [rng.randint(0, 100) for _ in times],
+            "apparent_temperature": [round(t - rng.uniform(0, 3), 1) for t in temperature],
+            "is_day": [int(6 <= t.hour < 19) for t in times],
+        },
+    }
+
+
+def hydro_stations(count, seed=0):
+    rng = random.Random(seed)
+    return [
+        {"id": str(150000000 + i), "name": f"Station {i}", "river": f"River {i % 40}",
+         "lat": f"{rng.uniform(49.0, 54.8):.4f}", "lon": f"{rng.uniform(14.1, 24.1):.4f}"}
+        for i in range(count)
+    ]
+
+
+def hydro_history(station, points, end=None):
+    """Hourly water level history in the polish-hydro-data format."""
+    end = end or datetime.now().replace(minute=0, second=0, microsecond=0)
+    rng = random.Random(station["id"])
+    level = rng.randint(100, 400)
+    entries = []
+    for i in range(points):
+        level = max(0, level + rng.randint(-3, 3))
+        entries.append({"data": {
+            "id_stacji": station["id"],
+            "stacja": station["name"],
+            "rzeka": station["river"],
+            "stan_wody": str(level),
+            "stan_wody_data_pomiaru": (end - timedelta(hours=points - 1 - i)).strftime("%Y-%m-%d %H:%M:%S"),
+        }})
+    return entries
+
+
+def sun_times(lat, lng, date):
+    """A response in the sunrisesunset.io format (fixed times, only the shape matters)."""
+    return {"results": {"date": date, "sunrise": "6:02:11 AM", "sunset": "6:41:52 PM", "first_light": "4:13:40 AM",
+                        "last_light": "8:30:23 PM", "dawn": "5:30:58 AM", "dusk": "7:13:05 PM",
+                        "solar_noon": "12:22:02 PM", "golden_hour": "5:58:14 PM", "day_length": "12:39:41",
+                        "timezone": "UTC", "utc_offset": 0}, "status": "OK"}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        time.sleep(self.server.latency)
+        url = urlparse(self.path)
+        body = self.server.respond(url.path, parse_qs(url.query))
+        if body is None:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        etag = '"' + hashlib.md5(body).hexdigest() + '"'
+        self.server.requests += 1
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, respond, latency=0.0):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.respond = respond
+        self.latency = latency
+        self.requests = 0
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self.thread.start()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_port}"
+
+    def close(self):
+        self.shutdown()
+        self.server_close()
+
+
+class StubServers:
+    """The three stub APIs, pointed at by data_fetcher while the context is active.
+
+    latency is in seconds per request; meteo_hours is the forecast length,
+    hydro_points the number of measurements per station history and
+    stations the size of the station list.
+    """
+
+    def __init__(self, latency=0.0, meteo_hours=72, hydro_points=1000, stations=500):
+        self.meteo_hours = meteo_hours
+        self.hydro_points = hydro_points
+        self.stations = hydro_stations(stations)
+        self._stations_by_id = {s["id"]: s for s in self.stations}
+        self._histories = {}
+
+        self.meteo = StubServer(self._meteo, latency)
+        self.sun = StubServer(self._sun, latency)
+        self.hydro = StubServer(self._hydro, latency)
+        self._saved = None
+
+    def _meteo(self, path, query):
+        if path != "/v1/forecast":
+            return None
+        lats = [float(v) for v in query["latitude"][0].split(",")]
+        lons = [float(v) for v in query["longitude"][0].split(",")]
+        forecasts = [meteo_forecast(lat, lon, self.meteo_hours) for lat, lon in zip(lats, lons)]
+        return json.dumps(forecasts if len(forecasts) > 1 else forecasts[0]).encode()
+
+    def _sun(self, path, query):
+        if path != "/json":
+            return None
+        return json.dumps(sun_times(query.get("lat", ["0"])[0], query.get("lng", ["0"])[0],
+                                    query.get("date", ["today"])[0])).encode()
+
+    def _hydro(self, path, query):
+        if path == "/stations_list.json":
+            return json.dumps(self.stations).encode()
+        if path.startswith("/data/") and path.endswith(".json"):
+            station = self._stations_by_id.get(path[len("/data/"):-len(".json")])
+            if station is None:
+                return None
+            if station["id"] not in self._histories:
+                self._histories[station["id"]] = json.dumps(hydro_history(station, self.hydro_points)).encode()
+            return self._histories[station["id"]]
+        return None
+
+    @property
+    def requests(self):
+        return self.meteo.requests + self.sun.requests + self.hydro.requests
+
+    def sun_url(self, lat, lng, date):
+        return f"{self.sun.url}/json?lat={lat}&lng={lng}&date={date}"
+
+    def install(self):
+        self._saved = (data_fetcher.METEO_URL, data_fetcher.HYDRO_BASE_URL)
+        data_fetcher.METEO_URL = self.meteo.url + "/v1/forecast"
+        data_fetcher.HYDRO_BASE_URL = self.hydro.url
+
+    def uninstall(self):
+        if self._saved:
+            data_fetcher.METEO_URL, data_fetcher.HYDRO_BASE_URL = self._saved
+            self._saved = None
+
+    def close(self):
+        self.uninstall()
+        for server in (self.meteo, self.sun, self.hydro):
+            server.close()
+
+    def __enter__(self):
+        self.install()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,369 @@
+"""End-to-end benchmark suite against local stub servers.
+
+Runs the app's hot paths with Open-Meteo, sunrisesunset.io and the hydro
+data repository replaced by local stubs (see stub_servers), in a
+throwaway HTTP cache, station index, forecast archive and location config,
+so results do not depend on the network or on the user's saved locations.
+
+Run from the repository root:
+    python -m benchmarks.suite [--latency 50] [--meteo-hours 72] [--hydro-points 1000]
+                               [--stations 500] [--locations 10 100 1000] [--repeat 5]
+                               [--only show_stats charts map haversine location_base sun]
+                               [--out results.json] [--compare benchmarks/results/<earlier>.json]
+
+Results are written as JSON (benchmarks/results/<timestamp>.json by
+default) with the run parameters, git commit and per-case timings
+(min/median/mean seconds); --compare prints the median ratio to an
+earlier results file.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5.QtCore import QEventLoop, QTimer
+from PyQt5.QtWidgets import QApplication
+import logic.stats.forecast_archive as forecast_archive
+import logic.stats.http_cache as http_cache
+import logic.utils.haversine as hv
+import logic.utils.location_base as location_base
+import logic.utils.location_store as location_store
+import logic.utils.solar as solar
+import logic.utils.station_index as station_index
+from benchmarks.stub_servers import StubServers, meteo_forecast, hydro_history, hydro_stations
+
+RESULTS_DIR = "benchmarks/results"
+CASES = ("show_stats", "charts", "map", "haversine", "location_base", "sun")
+
+# Keeps the QApplication alive while the cases run
+_app = None
+
+
+def timings(fn, repeat, setup=None):
+    """Run fn repeat times (setup before each run, untimed); returns the durations in seconds."""
+    durations = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        fn()
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+def result(name, durations, **params):
+    return {
+        "name": name,
+        "params": params,
+        "runs": len(durations),
+        "min": min(durations),
+        "median": statistics.median(durations),
+        "mean": statistics.fmean(durations),
+    }
+
+
+def random_locations(count, seed=1):
+    rng = random.Random(seed)
+    return [{"ID": i, "Name": f"Spot {i}", "Lat": round(rng.uniform(49.0, 54.8), 6),
+             "Lon": round(rng.uniform(14.1, 24.1), 6), "Time": "2025-01-01 12:00:00"}
+            for i in range(count)]
+
+
+class Sandbox:
+    """Temporary cache, station index, forecast archive and location config swapped into the app's singletons."""
+
+    def __init__(self):
+        self.dir = tempfile.mkdtemp(prefix="photo-bench-")
+        self._saved = (http_cache._cache, station_index.INDEX_PATH, station_index._index, location_store._store,
+                       forecast_archive._archive)
+        http_cache._cache = http_cache.HttpCache(self.path("http_cache.sqlite"))
+        forecast_archive._archive = forecast_archive.ForecastArchive(self.path("forecast_archive"))
+        station_index.INDEX_PATH = self.path("station_index.pickle")
+        self.reset_station_index()
+
+    def path(self, name):
+        return os.path.join(self.dir, name)
+
+    def use_locations(self, locations, name="config.json"):
+        """Point the location store at a fresh config holding these locations."""
+        path = self.path(name)
+        location_base.save_locations(path, locations)
+        location_store._store = location_store.LocationStore(path)
+        return location_store._store
+
+    def clear_http_cache(self):
+        http_cache._cache.clear()
+
+    def reset_station_index(self):
+        station_index._index = None
+        station_index._checked_at = 0.0
+        if os.path.exists(station_index.INDEX_PATH):
+            os.unlink(station_index.INDEX_PATH)
+
+    def close(self):
+        http_cache._cache.close()
+        (http_cache._cache, station_index.INDEX_PATH, station_index._index, location_store._store,
+         forecast_archive._archive) = self._saved
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+
+# Cases
+
+def bench_show_stats(args, sandbox, stubs):
+    """Click-to-chart: StatsLoader fetches on its pool, both plots update and draw.
+
+    Mirrors MainView.show_stats/_show_meteo/_show_hydro without the map's
+    QtWebEngine view. Cold runs start from an empty HTTP cache and station
+    index, warm runs are served from the cache.
+    """
+    import logic.stats.chart_builder as cb
+    from gui.stats_loader import StatsLoader
+
+    sandbox.use_locations(random_locations(10))
+    loader = StatsLoader()
+    plots = {"meteo": cb.MeteoPlot(), "hydro": cb.HydroPlot()}
+    for plot in plots.values():
+        plot.resize(1000, 400)
+    loop = QEventLoop()
+    pending = set()
+
+    def on_ready(kind, id, data):
+        plots[kind].update_location(id, data)
+        plots[kind].draw()
+        pending.discard(kind)
+        if not pending:
+            loop.quit()
+
+    loader.meteo_ready.connect(lambda id, data: on_ready("meteo", id, data))
+    loader.hydro_ready.connect(lambda id, data: on_ready("hydro", id, data))
+
+    def show_stats():
+        pending.update(("meteo", "hydro"))
+        loader.load(0)
+        QTimer.singleShot(60 * 1000, loop.quit)
+        loop.exec_()
+        if pending:
+            raise RuntimeError(f"show_stats timed out waiting for {sorted(pending)}")
+
+    def cold():
+        sandbox.clear_http_cache()
+        sandbox.reset_station_index()
+
+    params = dict(latency_ms=args.latency, meteo_hours=args.meteo_hours, hydro_points=args.hydro_points,
+                  stations=args.stations)
+    yield result("show_stats.cold", timings(show_stats, args.repeat, cold), **params)
+    show_stats()
+    yield result("show_stats.warm", timings(show_stats, args.repeat), **params)
+    loader.cancel()
+
+
+def bench_charts(args, sandbox, stubs):
+    """MeteoPlot/HydroPlot: first build (figure, axes, artists) vs in-place update for another location."""
+    import logic.stats.chart_builder as cb
+
+    locations = random_locations(2)
+    sandbox.use_locations(locations)
+    station = hydro_stations(1)[0]
+    meteo = [meteo_forecast(location["Lat"], location["Lon"], args.meteo_hours) for location in locations]
+    hydro = [hydro_history(dict(station, id=str(i)), args.hydro_points) for i in range(2)]
+
+    def build(cls, data):
+        plot = cls(0, **{"meteo_data" if cls is cb.MeteoPlot else "hydro_data": data[0]})
+        plot.resize(1000, 400)
+        plot.draw()
+
+    for name, cls, data, size in (("meteo", cb.MeteoPlot, meteo, dict(meteo_hours=args.meteo_hours)),
+                                  ("hydro", cb.HydroPlot, hydro, dict(hydro_points=args.hydro_points))):
+        yield result(f"charts.{name}.build", timings(lambda: build(cls, data), args.repeat), **size)
+
+        plot = cls()
+        plot.resize(1000, 400)
+        turn = [0]
+
+        def update():
+            turn[0] ^= 1
+            plot.update_location(turn[0], data[turn[0]])
+            plot.draw()
+
+        yield result(f"charts.{name}.update", timings(update, args.repeat), **size)
+
+
+def bench_map(args, sandbox, stubs):
+    """MapHandler.create_map + save_map_to_temp_file as the number of saved locations grows."""
+    from logic.map.map_handler import MapHandler
+
+    MapHandler.get_shell()
+    for count in args.locations:
+        sandbox.use_locations(random_locations(count))
+        handler = MapHandler()
+        paths = []
+
+        def open_map():
+            handler.create_map()
+            paths.append(handler.save_map_to_temp_file())
+
+        yield result("map.create_and_save", timings(open_map, args.repeat), locations=count)
+        for path in paths:
+            MapHandler.cleanup_file(path)
+
+
+def bench_haversine(args, sandbox, stubs):
+    """Nearest-city and nearest-station lookups."""
+    rng = random.Random(2)
+    queries = [(rng.uniform(49.0, 54.8), rng.uniform(14.1, 24.1)) for _ in range(100)]
+    cities = [{"Name": f"Place {i}", "Type": "city" if i % 4 == 0 else "village",
+               "Latitude": rng.uniform(49.0, 54.8), "Longitude": rng.uniform(14.1, 24.1)} for i in range(40000)]
+    stations = stubs.stations
+    index = station_index.StationIndex(stations)
+
+    def lookups(fn):
+        return lambda: [fn(lat, lon) for lat, lon in queries]
+
+    yield result("haversine.find_closest_city", timings(lookups(lambda a, b: hv.find_closest_city(a, b, cities)),
+                                                        args.repeat), cities=len(cities), queries=len(queries))
+    yield result("haversine.find_closest_hydrostation",
+                 timings(lookups(lambda a, b: hv.find_closest_hydrostation(a, b, stations)), args.repeat),
+                 stations=len(stations), queries=len(queries))
+    yield result("haversine.station_index", timings(lookups(index.nearest), args.repeat),
+                 stations=len(stations), queries=len(queries))
+
+    try:
+        import logic.utils.gazetteer as gazetteer
+        places = gazetteer.get_gazetteer()
+        yield result("haversine.gazetteer", timings(lookups(places.nearest), args.repeat),
+                     cities=len(places), queries=len(queries))
+    except Exception as e:
+        print(f"Skipping gazetteer lookups: {e}")
+
+
+def bench_location_base(args, sandbox, stubs):
+    """location_base reads and writes as the number of saved locations grows, on both backends."""
+    for count in args.locations:
+        locations = random_locations(count)
+        for backend, name in (("json", f"locations-{count}.json"), ("sqlite", f"locations-{count}.sqlite")):
+            path = sandbox.path(name)
+            if backend == "json":
+                location_base.save_locations(path, locations)
+            else:
+                import logic.utils.location_db as location_db
+                location_db.open_db(path).migrate_from(locations, "benchmark")
+
+            def add_and_remove():
+                new = location_base.Location("Bench", 52.0, 21.0, "2025-01-01 12:00:00", path)
+                new.to_json()
+                location_base.remove_loc(path, new.id)
+
+            params = dict(locations=count, backend=backend)
+            yield result("location_base.get_locations",
+                         timings(lambda: location_base.get_locations(path), args.repeat), **params)
+            yield result("location_base.add_and_remove", timings(add_and_remove, args.repeat), **params)
+            yield result("location_base.locations_in_bbox",
+                         timings(lambda: location_base.locations_in_bbox(path, 51.0, 19.0, 53.0, 22.0), args.repeat),
+                         **params)
+
+
+def bench_sun(args, sandbox, stubs):
+    """Sun times computed locally vs one round trip to the (stubbed) sunrisesunset.io API."""
+    from logic.stats.http_session import get_session
+
+    date = datetime.now().strftime("%Y-%m-%d")
+    session = get_session()
+    yield result("sun.local", timings(lambda: solar.sun_data_for_day(date, 52.2297, 21.0122), args.repeat))
+    yield result("sun.api", timings(lambda: session.get(stubs.sun_url(52.2297, 21.0122, date)).json(), args.repeat),
+                 latency_ms=args.latency)
+
+
+BENCHES = {
+    "show_stats": bench_show_stats,
+    "charts": bench_charts,
+    "map": bench_map,
+    "haversine": bench_haversine,
+    "location_base": bench_location_base,
+    "sun": bench_sun,
+}
+
+
+# Reporting
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def result_key(entry):
+    return entry["name"], json.dumps(entry["params"], sort_keys=True)
+
+
+def print_result(entry, baseline=None):
+    params = ", ".join(f"{k}={v}" for k, v in entry["params"].items())
+    line = f"{entry['name']:<36} {entry['median'] * 1000:>10.2f} ms  (min {entry['min'] * 1000:.2f})  {params}"
+    if baseline and result_key(entry) in baseline:
+        line += f"  x{entry['median'] / baseline[result_key(entry)]['median']:.2f} vs baseline"
+    print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency", type=float, default=50, help="stub response latency in ms")
+    parser.add_argument("--meteo-hours", type=int, default=72, help="forecast length per location")
+    parser.add_argument("--hydro-points", type=int, default=1000, help="measurements per station history")
+    parser.add_argument("--stations", type=int, default=500, help="hydro stations in the station list")
+    parser.add_argument("--locations", type=int, nargs="+", default=[10, 100, 1000], help="saved location counts")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--only", nargs="+", choices=CASES, default=list(CASES))
+    parser.add_argument("--out", help="results file (default: benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--compare", help="earlier results file to compare medians against")
+    args = parser.parse_args()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = {result_key(entry): entry for entry in json.load(f)["results"]}
+
+    global _app
+    _app = QApplication.instance() or QApplication(sys.argv[:1])
+    sandbox = Sandbox()
+    stubs = StubServers(args.latency / 1000, args.meteo_hours, args.hydro_points, args.stations)
+    stubs.install()
+
+    results = []
+    try:
+        for case in args.only:
+            for entry in BENCHES[case](args, sandbox, stubs):
+                print_result(entry, baseline)
+                results.append(entry)
+    finally:
+        stubs.close()
+        sandbox.close()
+
+    out = args.out or os.path.join(RESULTS_DIR, datetime.now().strftime("%Y%m%d-%H%M%S") + ".json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump({
+            "meta": {
+                "timestamp": datetime.now().isoformat(timespec="seconds"),
+                "commit": git_commit(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "args": vars(args),
+            },
+            "results": results,
+        }, f, indent=2)
+    print(f"Results written to {out}")
+
+
+if __name__ == "__main__":
+    main()
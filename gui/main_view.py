@@ -1,17 +1,16 @@
-from PyQt5.QtWidgets import QWidget, QVBoxLayout, QApplication, QLabel, QGridLayout
-from PyQt5.QtWebEngineWidgets import QWebEngineView
-from PyQt5.QtCore import QTimer, QUrl, pyqtSignal, Qt
-import tempfile, sys, json
-import logic.utils.location_base as loc
-import logic.utils.haversine as hv
-from logic.map.map_handler import MapHandler
-import logic.stats.chart_builder as cb
-
+from PyQt5.QtWidgets import QWidget, QVBoxLayout, QApplication, QLabel, QGridLayout, QStackedWidget
+from PyQt5.QtCore import QCoreApplication, QUrl, pyqtSignal, Qt
+import sys, os
+from logic.utils.location_store import get_store
+from logic.map.map_bridge import MapBridge
 
+# QtWebEngine, folium and matplotlib are imported on first use (see gui.startup),
+# so the window can paint before they are loaded
 
 
 class MainView(QWidget):
-    config_was_updated = pyqtSignal()
+    # The first view (map or stats) finished loading; emitted once
+    first_view_ready = pyqtSignal(str)
 
     def __init__(self):
         super().__init__()
@@ -19,17 +18,51 @@ class MainView(QWidget):
         layout = QVBoxLayout(self)
         self.stats_active = False
         self.map_active = False
-        self.map_handler = MapHandler()
+        self._map_handler = None
+        self._stats_loader = None
+        self._first_view_done = False
 
         # Initialize all widgets as None
         self.meteo_view = None
         self.hydro_view = None
+        self.meteo_plot = None
+        self.hydro_plot = None
         self.web_view = None
-        self.timer = None
-        self.coords_file = None
-        self.m = None
-
-        self.show_map()
+        self.channel = None
+        self.bridge = None
+        self.map_payload = None
+
+        # Shown until the window opens its first view
+        self.loading_label = QLabel("Loading map...")
+        self.loading_label.setAlignment(Qt.AlignCenter)
+        layout.addWidget(self.loading_label)
+
+    @property
+    def map_handler(self):
+        if self._map_handler is None:
+            from logic.map.map_handler import MapHandler
+            self._map_handler = MapHandler()
+        return self._map_handler
+
+    @property
+    def stats_loader(self):
+        if self._stats_loader is None:
+            from gui.stats_loader import StatsLoader
+            self._stats_loader = StatsLoader(self)
+            self._stats_loader.meteo_ready.connect(self._show_meteo)
+            self._stats_loader.hydro_ready.connect(self._show_hydro)
+        return self._stats_loader
+
+    def _hide_loading(self):
+        if self.loading_label is not None:
+            self.layout().removeWidget(self.loading_label)
+            self.loading_label.deleteLater()
+            self.loading_label = None
+
+    def _view_ready(self, kind):
+        if not self._first_view_done:
+            self._first_view_done = True
+            self.first_view_ready.emit(kind)
 
     def show_stats(self, id):
         # Clean up existing views first
@@ -38,24 +71,72 @@ class MainView(QWidget):
         # Set state and create stats view
         self.stats_active = True
         self.map_active = False
+        self._hide_loading()
 
-        try:
-            # Create meteo plot
-            meteo_plot = cb.MeteoPlot(id)
-            self.meteo_view = meteo_plot.canvas if hasattr(meteo_plot, 'canvas') else meteo_plot
-            self.meteo_view.setObjectName("meteo_chart")
+        # Chart views are created once and reused for every location
+        if self.meteo_view is None:
+            self.meteo_view = self._create_chart_view("meteo_chart")
+            self.hydro_view = self._create_chart_view("hydro_chart")
+
+        # Placeholders stay visible until each chart's own data arrives
+        self._show_placeholder(self.meteo_view, "Loading weather forecast...")
+        self._show_placeholder(self.hydro_view, "Loading water levels...")
+        self.meteo_view.show()
+        self.hydro_view.show()
+
+        self.stats_loader.load(id)
+
+    def _create_chart_view(self, name):
+        view = QStackedWidget()
+        view.setObjectName(name)
+
+        placeholder = QLabel()
+        placeholder.setAlignment(Qt.AlignCenter)
+        view.addWidget(placeholder)
+
+        self.layout().addWidget(view)
+        return view
+
+    def _show_placeholder(self, view, text):
+        placeholder = view.widget(0)
+        placeholder.setText(text)
+        view.setCurrentWidget(placeholder)
 
-            self.layout().addWidget(self.meteo_view)
+    def _show_meteo(self, id, meteo_data):
+        if not self.stats_active:
+            return
 
-            hydro_plot = cb.HydroPlot(id)
-            self.hydro_view = hydro_plot.canvas if hasattr(hydro_plot, 'canvas') else hydro_plot
-            self.hydro_view.setObjectName("hydro_chart")
+        try:
+            if self.meteo_plot is None:
+                import logic.stats.chart_builder as cb
+                self.meteo_plot = cb.MeteoPlot()
+                self.meteo_view.addWidget(self.meteo_plot)
+
+            if self.meteo_plot.update_location(id, meteo_data):
+                self.meteo_view.setCurrentWidget(self.meteo_plot)
+            else:
+                self._show_placeholder(self.meteo_view, "No weather data available")
+        except Exception as e:
+            print(f"Error creating meteo view: {e}")
+        self._view_ready("stats")
 
-            self.layout().addWidget(self.hydro_view)
+    def _show_hydro(self, id, hydro_data):
+        if not self.stats_active:
+            return
 
+        try:
+            if self.hydro_plot is None:
+                import logic.stats.chart_builder as cb
+                self.hydro_plot = cb.HydroPlot()
+                self.hydro_view.addWidget(self.hydro_plot)
+
+            if self.hydro_plot.update_location(id, hydro_data):
+                self.hydro_view.setCurrentWidget(self.hydro_plot)
+            else:
+                self._show_placeholder(self.hydro_view, "No water level data available")
         except Exception as e:
-            print(f"Error creating stats view: {e}")
-            self.stats_active = False
+            print(f"Error creating hydro view: {e}")
+        self._view_ready("stats")
 
     def show_map(self, lat=52.2297, lon=21.0122, zoom=6):
         # Don't recreate if map is already active with same parameters
@@ -70,80 +151,51 @@ class MainView(QWidget):
         self.stats_active = False
 
         try:
+            # Chromium is only started when the map is first shown
+            from PyQt5.QtWebEngineWidgets import QWebEngineView
+            from PyQt5.QtWebChannel import QWebChannel
+
             # Create web view
             self.web_view = QWebEngineView()
+            self.web_view.loadFinished.connect(lambda ok: self._view_ready("map"))
+            self._hide_loading()
             self.layout().addWidget(self.web_view)
 
-            # Setup coordinate checking timer
-            self.timer = QTimer()
-            self.timer.timeout.connect(self.check_coordinates)
-            self.timer.start(100)
-
-            # Create temporary file for coordinates
-            self.coords_file = tempfile.mktemp(suffix='.json')
+            # Clicks are pushed from the page through QWebChannel, no polling
+            self.bridge = MapBridge(self.map_handler.markers_json, self)
+            self.bridge.coordinates_received.connect(self.handle_coordinates)
+            self.channel = QWebChannel(self.web_view.page())
+            self.channel.registerObject("bridge", self.bridge)
+            self.web_view.page().setWebChannel(self.channel)
 
-            # Use MapHandler to create and save the map
-            self.m = self.map_handler.create_map(lat, lon, zoom)
-            temp_html = self.map_handler.save_map_to_temp_file()
+            # Use MapHandler to build the payload and splice it into the cached shell
+            self.map_payload = self.map_handler.create_map(lat, lon, zoom)
 
-            # Load the map
-            self.web_view.load(QUrl.fromLocalFile(temp_html))
+            # Load the map straight from memory, relative to the map assets directory
+            self.web_view.setHtml(self.map_handler.render_html(), QUrl.fromLocalFile(os.path.abspath("logic/map") + "/"))
 
         except Exception as e:
             print(f"Error creating map view: {e}")
             self.map_active = False
+            if self.loading_label is not None:
+                self.loading_label.setText("Map unavailable")
+            self._view_ready("map")
 
-    def check_coordinates(self):
-        if not self.map_active or not self.web_view:
-            return
-
-        js_code = """
-        (function() {
-            var coords = localStorage.getItem('lastCoordinates');
-            if (coords) {
-                localStorage.removeItem('lastCoordinates'); // Remove after reading
-                return coords;
-            }
-            return null;
-        })();
-        """
-
+    def handle_coordinates(self, lat, lng, timestamp):
         try:
-            self.web_view.page().runJavaScript(js_code, self.handle_coordinates)
-        except Exception as e:
-            print(f"Error checking coordinates: {e}")
-
-    def handle_coordinates(self, result):
-        if not result:
-            return
-
-        try:
-            coords = json.loads(result)
-            lat = coords.get('lat')
-            lng = coords.get('lng')
-            timestamp = coords.get('timestamp')
-
-            if lat is not None and lng is not None:
-                # Process coordinates and close map
-                self.process_coordinates(lat, lng, timestamp)
-
-        except (json.JSONDecodeError, KeyError, TypeError) as e:
-            print(f"Error parsing coordinates: {e}")
+            # Process coordinates and close map
+            self.process_coordinates(lat, lng, int(timestamp))
+        except (TypeError, ValueError) as e:
+            print(f"Error handling coordinates: {e}")
 
     def process_coordinates(self, lat, lng, time):
         try:
-            with open("assets/polish_cities.json", "r", encoding="utf-8") as f:
-                cities = json.load(f)
-
-            closest_city = hv.find_closest_city(lat, lng, cities)
-            name = closest_city.get("Name", "Unknown")
+            import logic.utils.gazetteer as gazetteer
+            closest_city = gazetteer.get_gazetteer().nearest(lat, lng)
+            name = closest_city.name if closest_city else "Unknown"
 
-            # Create location and save to config
-            location = loc.Location(str(name), lat, lng, time, "assets/config.json")
-            location.to_json()
-
-            # Emit signal that config was updated
-            self.config_was_updated.emit()
+            # Save to config; the sidebar and map follow the store's signals
+            get_store().add(str(name), lat, lng, time)
 
             # Close map after processing
             self.close_map()
@@ -162,11 +214,13 @@ class MainView(QWidget):
         if not self.map_active:
             return
 
-        # Stop and clean up timer
-        if self.timer:
-            self.timer.stop()
-            self.timer.deleteLater()
-            self.timer = None
+        # Disconnect the page bridge
+        if self.bridge:
+            self.bridge.meter.report("Map")
+            self.bridge.coordinates_received.disconnect(self.handle_coordinates)
+            self.bridge.deleteLater()
+            self.bridge = None
+            self.channel = None
 
         # Clean up web view
         if self.web_view:
@@ -174,38 +228,26 @@ class MainView(QWidget):
             self.web_view.deleteLater()
             self.web_view = None
 
-        # Clean up temporary files
-        if self.coords_file:
-            self.cleanup_file(self.coords_file)
-            self.coords_file = None
-
         # Reset map reference
-        self.m = None
+        self.map_payload = None
         self.map_active = False
 
     def close_stats(self):
         if not self.stats_active:
             return
 
-        # Clean up meteo view
+        # Drop any fetches still running for this location
+        self.stats_loader.cancel()
+
+        # Hide the chart views; they are reused by the next show_stats
         if self.meteo_view:
-            self.layout().removeWidget(self.meteo_view)
-            self.meteo_view.deleteLater()
-            self.meteo_view = None
+            self.meteo_view.hide()
 
         if self.hydro_view:
-            self.layout().removeWidget(self.hydro_view)
-            self.hydro_view.deleteLater()
-            self.hydro_view = None
+            self.hydro_view.hide()
 
         self.stats_active = False
 
-    def cleanup_file(self, filepath):
-        try:
-            MapHandler.cleanup_file(filepath)
-        except Exception as e:
-            print(f"Error cleaning up file {filepath}: {e}")
-
     def closeEvent(self, event):
         """Clean up resources when window is closed"""
         try:
@@ -217,6 +259,8 @@ class MainView(QWidget):
 
 
 if __name__ == '__main__':
+    # Required because QtWebEngine is only imported after the application exists
+    QCoreApplication.setAttribute(Qt.AA_ShareOpenGLContexts)
     app = QApplication(sys.argv)
 
     window = MainView()
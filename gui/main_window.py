@@ -1,6 +1,8 @@
 from PyQt5.QtWidgets import QMainWindow, QWidget, QHBoxLayout
+from PyQt5.QtCore import QEvent, QTimer
 from gui.sidebar import Sidebar
 from gui.main_view import MainView
+from gui.startup import WarmUp
 
 
 class MainWindow(QMainWindow):
@@ -20,10 +22,44 @@ class MainWindow(QMainWindow):
         layout.addWidget(self.sidebar, 1)
         layout.addWidget(self.main_view, 4)
 
-        # After adding localization -> update sidebar:
-        self.main_view.config_was_updated.connect(self.sidebar.update_list)
-
         # After clicking add loc in side bar -> show map:
         self.sidebar.add_location.connect(self.main_view.show_map)
         self.sidebar.choose_location.connect(self.main_view.show_stats)
         self.sidebar.list_empty.connect(self.main_view.show_map)
+
+        # The map, the background refreshes and the heavy imports wait for the first paint
+        self.refresh_scheduler = None
+        self.warm_up = WarmUp(parent=self)
+        self.warm_up.finished.connect(self._start_refresh)
+        self._started = False
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if not self._started:
+            self._started = True
+            QTimer.singleShot(0, self._start_deferred)
+
+    def _start_deferred(self):
+        # The map is imported here on the GUI thread, so it is left out of the warm-up
+        self.main_view.show_map()
+        self.warm_up.start()
+
+    def _start_refresh(self):
+        # Keep every saved location's data warm in the background
+        from gui.refresh_scheduler import RefreshScheduler
+        self.refresh_scheduler = RefreshScheduler(self)
+        self.refresh_scheduler.meteo_refreshed.connect(self.sidebar.show_conditions)
+        self.refresh_scheduler.start()
+
+    def changeEvent(self, event):
+        if event.type() == QEvent.WindowStateChange and self.refresh_scheduler:
+            if self.isMinimized():
+                self.refresh_scheduler.pause("minimized")
+            else:
+                self.refresh_scheduler.resume("minimized")
+        super().changeEvent(event)
+
+    def closeEvent(self, event):
+        if self.refresh_scheduler:
+            self.refresh_scheduler.stop()
+        super().closeEvent(event)
@@ -0,0 +1,270 @@
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, QTimer, QEvent, pyqtSignal
+from PyQt5.QtWidgets import QApplication
+import logic.stats.data_fetcher as data_fetcher
+from logic.utils.location_store import get_store
+
+MODEL_RUN_HOURS = data_fetcher.MODEL_RUN_HOURS
+MODEL_AVAILABLE_AFTER = data_fetcher.MODEL_AVAILABLE_AFTER
+
+# Hydro stations publish at about the cache lifetime of their histories
+HYDRO_INTERVAL = data_fetcher.HYDRO_DATA_TTL
+
+# Refresh this long before cached data would expire, so show_stats never finds it stale
+REFRESH_LEAD = 60
+
+# Retry delays after failures: BACKOFF_BASE, doubled per failure, capped at BACKOFF_MAX
+BACKOFF_BASE = 30
+BACKOFF_MAX = 30 * 60
+
+# Background requests in flight at once
+REFRESH_THREADS = 2
+
+# No keyboard or mouse input for this long pauses the refreshes
+IDLE_TIMEOUT = 20 * 60
+
+# Set to 0 to turn background refreshes off
+ENABLED = os.environ.get("PHOTO_APP_BACKGROUND_REFRESH", "1") != "0"
+
+_INPUT_EVENTS = frozenset((QEvent.MouseButtonPress, QEvent.MouseMove, QEvent.KeyPress, QEvent.Wheel))
+
+
+def next_model_update(now=None):
+    """When the next ecmwf_ifs025 run becomes available (aware UTC datetime)."""
+    now = now or datetime.now(timezone.utc)
+    midnight = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    candidates = (
+        midnight + timedelta(days=day, hours=hour) + MODEL_AVAILABLE_AFTER
+        for day in (-1, 0, 1)
+        for hour in MODEL_RUN_HOURS
+    )
+    return min(t for t in candidates if t > now)
+
+
+def seconds_until_model_update(now=None):
+    now = now or datetime.now(timezone.utc)
+    return (next_model_update(now) - now).total_seconds()
+
+
+def backoff_delay(failures):
+    return min(BACKOFF_BASE * 2 ** (failures - 1), BACKOFF_MAX)
+
+
+def refresh_meteo(locations, refresh=True):
+    """Refresh every forecast in batched requests; cached until just after the next model run.
+
+    With refresh=False only forecasts that are missing or stale in the cache are downloaded.
+    """
+    ttl = int(seconds_until_model_update()) + REFRESH_LEAD
+    forecasts = data_fetcher.fetch_meteo_batch(locations, ttl=ttl, refresh=refresh)
+    if len(forecasts) < len(locations):
+        raise RuntimeError(f"only {len(forecasts)} of {len(locations)} forecasts refreshed")
+    return forecasts
+
+
+def refresh_hydro(locations, refresh=True):
+    """Refresh the history of each station closest to one of the locations, once per station.
+
+    Returns the number of stations; raises if any of them failed.
+    """
+    station_ids = {data_fetcher.closest_station_id(location["Lat"], location["Lon"]) for location in locations}
+    station_ids.discard(None)
+    failed = 0
+    for station_id in sorted(station_ids):
+        try:
+            data_fetcher.fetch_json(data_fetcher.hydro_url(station_id), data_fetcher.HYDRO_DATA_TTL + REFRESH_LEAD,
+                                    refresh=refresh)
+        except Exception as e:
+            print(f"Background refresh of station {station_id} failed: {e}")
+            failed += 1
+    if failed:
+        raise RuntimeError(f"{failed} of {len(station_ids)} stations not refreshed")
+    return len(station_ids)
+
+
+class _JobSignals(QObject):
+    finished = pyqtSignal(str, object, object)  # kind, result, error
+
+
+class _RefreshJob(QRunnable):
+    def __init__(self, kind, fn, args, signals):
+        super().__init__()
+        self.kind = kind
+        self.fn = fn
+        self.args = args
+        self.signals = signals
+
+    def run(self):
+        try:
+            self.signals.finished.emit(self.kind, self.fn(*self.args), None)
+        except Exception as e:
+            self.signals.finished.emit(self.kind, None, e)
+
+
+class RefreshScheduler(QObject):
+    """Keeps forecasts and hydro histories of all saved locations warm in the HTTP cache.
+
+    Forecasts are refreshed in batched requests when a new ecmwf_ifs025
+    run becomes available, hydro histories on the station interval, each
+    shortly before the cached copy would expire, so clicking a location
+    is served from the cache. At startup only missing or stale entries are
+    downloaded. Sun data is computed locally and needs no refresh. Failed
+    rounds are retried with exponential backoff. While the window is
+    minimized or the user has been idle for IDLE_TIMEOUT, due refreshes
+    are held back and run as soon as the app is in use again.
+    """
+
+    meteo_refreshed = pyqtSignal(object)  # {location ID: forecast}
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(REFRESH_THREADS)
+        self.store = get_store()
+
+        self.failures = {"meteo": 0, "hydro": 0}
+        self.running = {"meteo": 0, "hydro": 0}
+        self.round_failed = {"meteo": False, "hydro": False}
+        self.due = {}  # kind: refresh
+        self.pause_reasons = set()
+        self.last_activity = time.monotonic()
+        self.watching_input = False
+
+        self.timers = {}
+        for kind in ("meteo", "hydro"):
+            timer = QTimer(self)
+            timer.setSingleShot(True)
+            timer.timeout.connect(lambda kind=kind: self._on_due(kind))
+            self.timers[kind] = timer
+
+        self.idle_timer = QTimer(self)
+        self.idle_timer.timeout.connect(self._check_idle)
+
+        self._signals = _JobSignals()
+        self._signals.finished.connect(self._on_finished)
+        self.store.location_added.connect(self._on_location_added)
+
+    def start(self):
+        """Pre-warm whatever is missing or stale now, then keep refreshing on schedule."""
+        if not ENABLED:
+            return
+        self._watch_input(True)
+        self.idle_timer.start(60 * 1000)
+        self._on_due("meteo", refresh=False)
+        self._on_due("hydro", refresh=False)
+
+    def stop(self):
+        for timer in self.timers.values():
+            timer.stop()
+        self.idle_timer.stop()
+        self.pool.clear()
+        self._watch_input(False)
+
+    # Pausing
+
+    def pause(self, reason):
+        self.pause_reasons.add(reason)
+
+    def resume(self, reason):
+        self.pause_reasons.discard(reason)
+        if not self.pause_reasons:
+            for kind, refresh in sorted(self.due.items()):
+                self._run(kind, refresh)
+            self.due.clear()
+
+    @property
+    def paused(self):
+        return bool(self.pause_reasons)
+
+    def eventFilter(self, obj, event):
+        if event.type() not in _INPUT_EVENTS:
+            return False
+        self.last_activity = time.monotonic()
+        # One input event per idle check is enough; unhook until the next check
+        self._watch_input(False)
+        if "idle" in self.pause_reasons:
+            self.resume("idle")
+        return False
+
+    def _watch_input(self, on):
+        app = QApplication.instance()
+        if app is None or on == self.watching_input:
+            return
+        if on:
+            app.installEventFilter(self)
+        else:
+            app.removeEventFilter(self)
+        self.watching_input = on
+
+    def _check_idle(self):
+        if time.monotonic() - self.last_activity > IDLE_TIMEOUT:
+            self.pause("idle")
+        if self.idle_timer.isActive():
+            self._watch_input(True)
+
+    # Scheduling
+
+    def _schedule(self, kind, seconds):
+        self.timers[kind].start(int(max(seconds, 1) * 1000))
+
+    def _on_due(self, kind, refresh=True):
+        self._check_idle()
+        if self.paused:
+            self.due[kind] = self.due.get(kind, False) or refresh
+        else:
+            self._run(kind, refresh)
+
+    def _run(self, kind, refresh=True):
+        if self.running[kind]:
+            return
+
+        locations = list(self.store.all())
+        self.round_failed[kind] = False
+        if not locations:
+            self._finish_round(kind)
+            return
+
+        self._start(kind, refresh_meteo if kind == "meteo" else refresh_hydro, locations, refresh)
+
+    def _start(self, kind, fn, *args):
+        self.running[kind] += 1
+        self.pool.start(_RefreshJob(kind, fn, args, self._signals))
+
+    def _on_location_added(self, location):
+        # Warm up a new spot right away instead of waiting for the next round
+        if ENABLED:
+            self.pool.start(_RefreshJob("new meteo", data_fetcher.fetch_meteo_batch, ([location],), self._signals))
+            self.pool.start(_RefreshJob("new hydro", refresh_hydro, ([location], False), self._signals))
+
+    def _on_finished(self, kind, result, error):
+        if kind not in self.running:
+            # One-off warm-up of a new location, outside the scheduled rounds
+            if error is not None:
+                print(f"Background {kind} refresh failed: {error}")
+            elif kind == "new meteo" and result:
+                self.meteo_refreshed.emit(result)
+            return
+
+        self.running[kind] -= 1
+        if error is not None:
+            print(f"Background {kind} refresh failed: {error}")
+            self.round_failed[kind] = True
+        elif kind == "meteo":
+            self.meteo_refreshed.emit(result)
+
+        if not self.running[kind]:
+            self._finish_round(kind)
+
+    def _finish_round(self, kind):
+        if self.round_failed[kind]:
+            self.failures[kind] += 1
+            self._schedule(kind, backoff_delay(self.failures[kind]))
+            return
+
+        self.failures[kind] = 0
+        if kind == "meteo":
+            self._schedule(kind, seconds_until_model_update())
+        else:
+            self._schedule(kind, HYDRO_INTERVAL - REFRESH_LEAD)
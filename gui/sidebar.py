@@ -1,7 +1,13 @@
-from PyQt5.QtWidgets import QWidget, QVBoxLayout, QPushButton, QListWidget, QListWidgetItem
-from PyQt5.QtCore import Qt, pyqtSignal
+from PyQt5.QtWidgets import QWidget, QVBoxLayout, QPushButton, QListWidget, QListWidgetItem, QLabel
+from PyQt5.QtCore import Qt, pyqtSignal, QTimer
 import random
-import logic.utils.location_base as loc
+from logic.utils.location_store import get_store
+import logic.utils.tracing as tracing
+
+
+# Shooting windows listed under the locations, and how often they are recomputed
+CONDITIONS_SHOWN = 5
+CONDITIONS_REFRESH_MS = 10 * 60 * 1000
 
 
 class Sidebar(QWidget):
@@ -14,6 +20,12 @@ class Sidebar(QWidget):
 
         layout = QVBoxLayout()
 
+        # Keep the list in sync with the store instead of re-reading the config
+        self.store = get_store()
+        self.store.location_added.connect(self._on_location_added)
+        self.store.location_removed.connect(self._on_location_removed)
+        self.store.locations_reloaded.connect(self.update_list)
+
         self.location_list = QListWidget()
         layout.addWidget(self.location_list)
         self.update_list()
@@ -31,6 +43,25 @@ class Sidebar(QWidget):
         layout.addWidget(self.add_btn)
         layout.addWidget(self.remove_btn)
 
+        # Best shooting windows across all saved locations, filled from the background forecasts
+        self.forecasts = {}
+        self.conditions_label = QLabel("Best conditions")
+        self.conditions_list = QListWidget()
+        self.conditions_list.setObjectName("conditions_list")
+        self.conditions_list.itemClicked.connect(self.choose_window)
+        self.conditions_label.hide()
+        self.conditions_list.hide()
+        layout.addWidget(self.conditions_label)
+        layout.addWidget(self.conditions_list)
+
+        # Drop windows that have passed
+        self.conditions_timer = QTimer(self)
+        self.conditions_timer.timeout.connect(self.update_conditions)
+        self.conditions_timer.start(CONDITIONS_REFRESH_MS)
+
+        for signal in (self.store.location_added, self.store.location_removed, self.store.locations_reloaded):
+            signal.connect(self.update_conditions)
+
         self.setLayout(layout)
 
         self.last_selection(False)
@@ -40,16 +71,17 @@ class Sidebar(QWidget):
         if item:
             item.setSelected(var)
 
+    @tracing.traced
     def update_list(self):
         self.location_list.clear()
-        locations = loc.get_locations("assets/config.json")
+        locations = self.store.all()
 
         if not locations:
             self.list_empty.emit()
             return
 
         for location in locations:
-            self.location_list.addItem(f"{location['Name']}\n {location['Lat']:.2f}, {location['Lon']:.2f} ")
+            self.location_list.addItem(self._item_text(location))
 
         count = self.location_list.count()
         if count > 0:
@@ -57,7 +89,30 @@ class Sidebar(QWidget):
             if item:
                 item.setSelected(True)
                 self.location_list.setCurrentRow(count - 1)
-                self.choose_location.emit(self.location_list.currentRow())
+                self.choose_location.emit(self._id_at(count - 1))
+
+    def _id_at(self, row):
+        """Location ID shown in a list row (IDs are stable with the SQLite backend)."""
+        return self.store.all()[row]["ID"]
+
+    @staticmethod
+    def _item_text(location):
+        return f"{location['Name']}\n {location['Lat']:.2f}, {location['Lon']:.2f} "
+
+    def _on_location_added(self, location):
+        self.location_list.addItem(self._item_text(location))
+
+        # Select the new location and show its stats
+        row = self.location_list.count() - 1
+        self.location_list.setCurrentRow(row)
+        self.location_list.item(row).setSelected(True)
+        self.choose_location.emit(location["ID"])
+
+    def _on_location_removed(self, row, id):
+        self.location_list.takeItem(row)
+
+        if self.location_list.count() == 0:
+            self.list_empty.emit()
 
     def add_loc(self):
         self.location_list.setCurrentRow(-1)  # no current row
@@ -67,7 +122,7 @@ class Sidebar(QWidget):
     def choose_loc(self):
         current_row = self.location_list.currentRow()
         if current_row >= 0:
-            self.choose_location.emit(current_row)
+            self.choose_location.emit(self._id_at(current_row))
 
     def remove_loc(self):
         current = self.location_list.currentRow()
@@ -76,14 +131,8 @@ class Sidebar(QWidget):
         if current < 0 or current >= self.location_list.count():
             return
 
-        # Remove from the JSON file
-        loc.remove_loc("assets/config.json", current)
-
-        # Get the count before updating
-        old_count = self.location_list.count()
-
-        # Update the list (this rebuilds from JSON)
-        self.update_list()
+        # Remove from the store; _on_location_removed drops the list item
+        self.store.remove(self._id_at(current))
 
         # Handle selection after removal
         new_count = self.location_list.count()
@@ -102,4 +151,56 @@ class Sidebar(QWidget):
         item = self.location_list.item(new_row)
         if item:
             item.setSelected(True)
-            self.choose_location.emit(new_row)
\ No newline at end of file
+            self.choose_location.emit(self._id_at(new_row))
+
+    def show_conditions(self, forecasts):
+        """Take freshly fetched forecasts ({location ID: forecast}) and re-rank the shooting windows."""
+        by_id = {location["ID"]: location for location in self.store.all()}
+        for id, forecast in forecasts.items():
+            location = by_id.get(id)
+            if location:
+                # Keyed by position, since IDs of a JSON config shift when a location is removed
+                self.forecasts[(location["Lat"], location["Lon"])] = forecast
+        self.update_conditions()
+
+    @tracing.traced
+    def update_conditions(self, *args):
+        # Forget forecasts of locations that are no longer saved
+        locations = self.store.all()
+        positions = {(location["Lat"], location["Lon"]) for location in locations}
+        self.forecasts = {position: forecast for position, forecast in self.forecasts.items() if position in positions}
+        if not self.forecasts:
+            self.conditions_list.clear()
+            self.conditions_label.hide()
+            self.conditions_list.hide()
+            return
+
+        import logic.stats.conditions as conditions
+        import logic.utils.solar as solar
+
+        by_id = {location["ID"]: self.forecasts.get((location["Lat"], location["Lon"])) for location in locations}
+        try:
+            windows = conditions.best_windows(locations, by_id, limit=CONDITIONS_SHOWN)
+        except Exception as e:
+            print(f"Error scoring conditions: {e}")
+            return
+
+        self.conditions_list.clear()
+        for window in windows:
+            tz = solar.location_tz(window.location["Lat"], window.location["Lon"])
+            start, end = solar.to_local(window.start, tz), solar.to_local(window.end, tz)
+            item = QListWidgetItem(f"{conditions.LABELS[window.condition]} – {window.location['Name']}\n"
+                                   f" {start:%a %H:%M}–{end:%H:%M}  ({window.score:.0%})")
+            item.setData(Qt.UserRole, window.location["ID"])
+            self.conditions_list.addItem(item)
+
+        self.conditions_label.setVisible(bool(windows))
+        self.conditions_list.setVisible(bool(windows))
+
+    def choose_window(self, item):
+        id = item.data(Qt.UserRole)
+        row = self.store.row_of(id)
+        if row < 0:
+            return
+        self.location_list.setCurrentRow(row)
+        self.choose_location.emit(id)
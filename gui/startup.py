@@ -0,0 +1,91 @@
+"""Cold-start helpers: background warm-up of heavy modules and the startup timing report.
+
+The window shell and sidebar only need PyQt5 and the location store. Everything
+else (matplotlib, scipy, folium, requests, the gazetteer index) is imported on
+a background thread right after the first paint, so it is usually loaded by
+the time the first chart needs it. The map (QtWebEngine, folium) is loaded on
+the GUI thread when the map view is first created, before the warm-up thread
+starts, so the two never import the same module at once.
+"""
+import threading
+import time
+from PyQt5.QtCore import QObject, QEvent, pyqtSignal
+
+# Heavy, Qt-free modules imported on the warm-up thread, roughly in order of first use
+WARM_MODULES = (
+    "logic.stats.data_fetcher",
+    "logic.stats.charts",
+    "matplotlib.backends.backend_agg",
+)
+
+
+class WarmUp(QObject):
+    """Imports WARM_MODULES and memory-maps the gazetteer on a daemon thread."""
+
+    finished = pyqtSignal(float)  # seconds spent
+
+    def __init__(self, modules=WARM_MODULES, parent=None):
+        super().__init__(parent)
+        self.modules = modules
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, name="warm-up", daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        start = time.perf_counter()
+        for name in self.modules:
+            try:
+                __import__(name)
+            except Exception as e:
+                print(f"Error preloading {name}: {e}")
+
+        # Rebuilds the reverse-geocoding index first if the JSON changed
+        try:
+            import logic.utils.gazetteer as gazetteer
+            gazetteer.get_gazetteer()
+        except Exception as e:
+            print(f"Error loading gazetteer: {e}")
+
+        self.finished.emit(time.perf_counter() - start)
+
+
+class StartupTimer(QObject):
+    """Startup timing mode: reports time-to-first-paint and time-to-interactive.
+
+    Times are measured from started (a perf_counter() value taken before the
+    app's imports). First paint is the window's first Paint event;
+    interactive is when the first view (the map, or its fallback) is ready
+    and the event loop has gone idle again.
+    """
+
+    reported = pyqtSignal()
+
+    def __init__(self, started, parent=None):
+        super().__init__(parent)
+        self.started = started
+        self.marks = {}
+        self.window = None
+
+    def mark(self, name):
+        if name not in self.marks:
+            self.marks[name] = time.perf_counter() - self.started
+
+    def watch(self, window):
+        """Record the window's first Paint event as "first paint"."""
+        self.window = window
+        window.installEventFilter(self)
+
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Paint and "first paint" not in self.marks:
+            self.mark("first paint")
+            self.window.removeEventFilter(self)
+        return False
+
+    def report(self):
+        self.mark("interactive")
+        print("Startup timing:")
+        for name, seconds in sorted(self.marks.items(), key=lambda item: item[1]):
+            print(f"  {name:<16} {seconds * 1000:8.1f} ms")
+        self.reported.emit()
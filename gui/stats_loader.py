@@ -0,0 +1,74 @@
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+import logic.stats.chart_builder as cb
+
+
+class _JobSignals(QObject):
+    finished = pyqtSignal(int, str, object)
+
+
+class _FetchJob(QRunnable):
+    """Runs one blocking fetch on the thread pool and reports back through a signal."""
+
+    def __init__(self, generation, kind, fn, id, signals):
+        super().__init__()
+        self.generation = generation
+        self.kind = kind
+        self.fn = fn
+        self.id = id
+        self.signals = signals
+
+    def run(self):
+        try:
+            result = self.fn(self.id)
+        except Exception as e:
+            print(f"Error fetching {self.kind} data: {e}")
+            result = None
+        self.signals.finished.emit(self.generation, self.kind, result)
+
+
+class StatsLoader(QObject):
+    """Fetches meteo and hydro data concurrently off the GUI thread.
+
+    Every call to load() starts a new generation; results belonging to an
+    older generation are dropped, so clicking another location cancels the
+    work still in flight for the previous one.
+    """
+
+    meteo_ready = pyqtSignal(int, object)
+    hydro_ready = pyqtSignal(int, object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(4)
+        self.generation = 0
+        self.id = None
+        self.results = {}
+
+        self._signals = _JobSignals()
+        self._signals.finished.connect(self._on_finished)
+
+    def load(self, id):
+        self.cancel()
+        self.id = id
+
+        for kind, fn in (("meteo", cb.MeteoPlot.fetch_meteo),
+                         ("hydro", cb.HydroPlot.fetch_hydro)):
+            self.pool.start(_FetchJob(self.generation, kind, fn, id, self._signals))
+
+    def cancel(self):
+        """Drop queued jobs and ignore results of the ones already running."""
+        self.pool.clear()
+        self.generation += 1
+        self.results = {}
+
+    def _on_finished(self, generation, kind, result):
+        if generation != self.generation:
+            return
+
+        self.results[kind] = result if result is not None else {}
+
+        if kind == "hydro":
+            self.hydro_ready.emit(self.id, self.results["hydro"])
+        else:
+            self.meteo_ready.emit(self.id, self.results["meteo"])
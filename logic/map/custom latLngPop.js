@@ -26,7 +26,9 @@ function latLngPop(e) {
                     var btn = document.getElementById('addLocationBtn');
                     if (btn) {
                         btn.addEventListener('click', function() {
-                            localStorage.setItem('lastCoordinates', JSON.stringify(coords));
+                            if (window.pyBridge) {
+                                window.pyBridge.add_location(coords.lat, coords.lng, coords.timestamp);
+                            }
                         });
                     }
                 }, 0);
@@ -0,0 +1,58 @@
+import os
+import time
+from PyQt5.QtCore import QObject, pyqtSignal, pyqtSlot
+
+# Print map wakeup statistics when the map closes
+REPORT_METRICS = bool(os.environ.get("PHOTO_APP_METRICS"))
+
+
+class WakeupMeter:
+    """Counts how often the GUI thread is woken up on behalf of the map."""
+
+    def __init__(self):
+        self.count = 0
+        self.started = time.monotonic()
+
+    def tick(self):
+        self.count += 1
+
+    def rate(self):
+        elapsed = time.monotonic() - self.started
+        return self.count / elapsed if elapsed > 0 else 0.0
+
+    def report(self, label):
+        if REPORT_METRICS:
+            elapsed = time.monotonic() - self.started
+            print(f"{label}: {self.count} wakeups in {elapsed:.1f}s ({self.rate():.2f}/s)")
+
+
+class MapBridge(QObject):
+    """Python object exposed to the map page through QWebChannel.
+
+    The custom latLngPop popup calls add_location directly when the user
+    confirms a point, so clicks arrive immediately and nothing runs while
+    the map sits idle. The page pulls its marker positions through markers(),
+    or through markers_in_view() for every view when the location set is large.
+    """
+
+    coordinates_received = pyqtSignal(float, float, float)
+
+    def __init__(self, markers_provider=None, parent=None):
+        super().__init__(parent)
+        self.meter = WakeupMeter()
+        self.markers_provider = markers_provider
+
+    @pyqtSlot(result=str)
+    def markers(self):
+        """Marker positions as a flat JSON array, requested once by the page."""
+        return self.markers_provider() if self.markers_provider else "[]"
+
+    @pyqtSlot(float, float, float, float, result=str)
+    def markers_in_view(self, south, west, north, east):
+        """Marker positions inside the page's current (padded) view, as a flat JSON array."""
+        return self.markers_provider((south, west, north, east)) if self.markers_provider else "[]"
+
+    @pyqtSlot(float, float, float)
+    def add_location(self, lat, lng, timestamp):
+        self.meter.tick()
+        self.coordinates_received.emit(lat, lng, timestamp)
@@ -1,46 +1,225 @@
 import folium
 import tempfile
+import json
 import os
 import re
-import logic.utils.location_base as loc
+from logic.utils.location_store import get_store
+import logic.utils.tracing as tracing
+
+PAYLOAD_PLACEHOLDER = "/*MAP_PAYLOAD*/null"
+
+# Above this many saved locations markers are drawn as one canvas-rendered GeoJSON layer
+CANVAS_THRESHOLD = 200
+
+# Above this many saved locations the page only loads the markers around its current
+# view (a bounding-box query on the location store), padded by this fraction on every side
+VIEWPORT_THRESHOLD = 5000
+VIEWPORT_PADDING = 0.5
+
+# Connects the page to the Python MapBridge and applies the per-open payload
+# (initial view and markers) to the cached shell. Markers travel as one flat
+# [lat0, lon0, lat1, lon1, ...] array (several times smaller than the GeoJSON text
+# which the page builds from it): inline in the payload for standalone
+# files, fetched through the bridge otherwise (setHtml caps documents at 2 MB),
+# per viewport for large location sets.
+PAYLOAD_SCRIPT = """
+<script src="qrc:///qtwebchannel/qwebchannel.js"></script>
+<script>
+(function() {
+    var payload = %s;
+    var map = window["{map}"];
+    if (!payload || !map) {
+        return;
+    }
+
+    map.setView(payload.center, payload.zoom);
+
+    function markerLayer(flat) {
+        var count = flat.length / 2;
+
+        if (count > payload.canvas_above) {
+            // One GeoJSON layer of circle markers drawn on a shared canvas, no DOM node per marker
+            var features = new Array(count);
+            for (var i = 0; i < count; i++) {
+                features[i] = {
+                    type: "Feature",
+                    geometry: {type: "Point", coordinates: [flat[2 * i + 1], flat[2 * i]]}
+                };
+            }
+            var renderer = L.canvas({padding: 0.5});
+            return L.geoJSON({type: "FeatureCollection", features: features}, {
+                pointToLayer: function(feature, latlng) {
+                    return L.circleMarker(latlng, {
+                        renderer: renderer,
+                        radius: 5,
+                        color: "white",
+                        weight: 1,
+                        fillColor: "#5b396b",
+                        fillOpacity: 0.9
+                    });
+                }
+            });
+        }
+
+        var icon = L.AwesomeMarkers.icon({
+            markerColor: "darkpurple",
+            iconColor: "white",
+            icon: "heart",
+            prefix: "glyphicon",
+            extraClasses: "fa-rotate-0"
+        });
+        var markers = new Array(count);
+        for (var i = 0; i < count; i++) {
+            markers[i] = L.marker([flat[2 * i], flat[2 * i + 1]], {icon: icon});
+        }
+        return L.featureGroup(markers);
+    }
+
+    var layer = null;
+    function showMarkers(flat) {
+        if (layer) {
+            map.removeLayer(layer);
+        }
+        layer = markerLayer(flat).addTo(map);
+        window.markersReady = true;
+    }
+
+    // Large location sets: only the markers around the current view, reloaded after every pan or zoom
+    function loadView() {
+        var bounds = map.getBounds().pad(payload.padding);
+        var west = bounds.getWest(), east = bounds.getEast();
+        if (east - west >= 360) {
+            west = -180;
+            east = 180;
+        } else {
+            west = L.Util.wrapNum(west, [-180, 180], true);
+            east = L.Util.wrapNum(east, [-180, 180], true);
+        }
+        var current = ++loadView.request;
+        window.pyBridge.markers_in_view(Math.max(bounds.getSouth(), -90), west, Math.min(bounds.getNorth(), 90), east,
+            function(json) {
+                // Drop answers overtaken by a newer view
+                if (current === loadView.request) {
+                    showMarkers(JSON.parse(json));
+                }
+            });
+    }
+    loadView.request = 0;
+
+    if (payload.markers) {
+        showMarkers(payload.markers);
+    }
+
+    if (typeof QWebChannel !== "undefined" && typeof qt !== "undefined") {
+        new QWebChannel(qt.webChannelTransport, function(channel) {
+            window.pyBridge = channel.objects.bridge;
+            if (payload.markers) {
+                return;
+            }
+            if (payload.viewport) {
+                map.on("moveend", loadView);
+                loadView();
+            } else {
+                window.pyBridge.markers(function(json) {
+                    showMarkers(JSON.parse(json));
+                });
+            }
+        });
+    }
+})();
+</script>
+""" % PAYLOAD_PLACEHOLDER
+
 
 class MapHandler:
+    # Static map shell split around the payload placeholder, rendered once per process
+    _shell = None
+
     def __init__(self):
-        self.m = None
+        # Per-open view settings sent to the page as JSON (no folium.Map is built per open)
+        self.payload = None
+        self.visible_markers = []
 
-    def create_map(self, lat=52.2297, lon=21.0122, zoom=6):
-        """Create a folium map with popup and markers"""
-        self.m = folium.Map(location=[lat, lon], zoom_start=zoom)
+        # Marker positions follow the location store instead of re-reading the config
+        self.store = get_store()
+        self.markers = [[location["Lat"], location["Lon"]] for location in self.store.all()]
+        self.store.location_added.connect(self._on_location_added)
+        self.store.location_removed.connect(self._on_location_removed)
+        self.store.locations_reloaded.connect(self._on_locations_reloaded)
 
-        # Pop up!
-        popup = folium.LatLngPopup()
-        self.m.add_child(popup)
+    def _on_location_added(self, location):
+        self.markers.append([location["Lat"], location["Lon"]])
 
-        # Add existing location markers
-        markers = loc.get_locations("assets/config.json")
-        icon = folium.Icon(color="darkpurple", icon_color="white", icon="heart")
+    def _on_location_removed(self, row, id):
+        del self.markers[row]
 
-        for marker in markers:
-            folium.Marker(location=[marker["Lat"], marker["Lon"]], icon=icon).add_to(self.m)
+    def _on_locations_reloaded(self):
+        self.markers = [[location["Lat"], location["Lon"]] for location in self.store.all()]
 
-        return self.m
+    def markers_in_bounds(self, south, west, north, east):
+        """Marker positions inside a viewport, served by the location index."""
+        return [[location["Lat"], location["Lon"]] for location in self.store.in_bbox(south, west, north, east)]
 
-    def save_map_to_temp_file(self):
-        """Save map to temporary HTML file with modifications"""
-        temp_html = tempfile.mktemp(suffix='.html')
-        self.m.save(temp_html)
+    @tracing.traced
+    def create_map(self, lat=52.2297, lon=21.0122, zoom=6, bounds=None):
+        """Build the per-open map payload (only markers inside bounds, if given).
+
+        Without bounds, a store above VIEWPORT_THRESHOLD locations makes the
+        page query the markers of its current view through the bridge.
+        """
+        self.store.refresh()
+        self.visible_markers = self.markers if bounds is None else self.markers_in_bounds(*bounds)
+
+        self.payload = {"center": [lat, lon], "zoom": zoom, "canvas_above": CANVAS_THRESHOLD,
+                        "viewport": bounds is None and len(self.markers) > VIEWPORT_THRESHOLD,
+                        "padding": VIEWPORT_PADDING}
+        return self.payload
+
+    def markers_json(self, bounds=None):
+        """Marker positions (all visible ones, or those inside bounds) as a flat JSON array, rounded to ~1 m"""
+        markers = self.visible_markers if bounds is None else self.markers_in_bounds(*bounds)
+        flat = [round(value, 5) for marker in markers for value in marker]
+        return json.dumps(flat, separators=(",", ":"))
 
-        with open(temp_html, 'r', encoding='utf-8') as f:
-            html_content = f.read()
+    @classmethod
+    def get_shell(cls):
+        """Leaflet setup, styles and the custom popup JS, rendered and modified once"""
+        if cls._shell is None:
+            m = folium.Map(location=[52.2297, 21.0122], zoom_start=6)
+            m.add_child(folium.LatLngPopup())
 
-        modified_html = self.modify_html(html_content)
+            html = cls.modify_html(m.get_root().render())
+            html = html.replace("</html>", PAYLOAD_SCRIPT.replace("{map}", m.get_name()) + "</html>")
+
+            head, tail = html.split(PAYLOAD_PLACEHOLDER)
+            cls._shell = (head, tail)
+        return cls._shell
+
+    @tracing.traced
+    def render_html(self, inline_markers=False):
+        """Complete map document: cached shell with the JSON payload spliced in.
+
+        Without inline_markers the page asks MapBridge.markers for them.
+        """
+        head, tail = self.get_shell()
+        payload = json.dumps(self.payload, separators=(",", ":"))
+        if inline_markers:
+            payload = payload[:-1] + ',"markers":' + self.markers_json() + "}"
+        return head + payload + tail
+
+    @tracing.traced
+    def save_map_to_temp_file(self):
+        """Save map to temporary HTML file (e.g. to inspect it in a browser)"""
+        temp_html = tempfile.mktemp(suffix='.html')
 
         with open(temp_html, 'w', encoding='utf-8') as f:
-            f.write(modified_html)
+            f.write(self.render_html(inline_markers=True))
 
         return temp_html
 
-    def modify_html(self, html_content):
+    @staticmethod
+    @tracing.traced
+    def modify_html(html_content):
         """Modify HTML content with custom styling and JavaScript"""
         # Znajdź funkcję latLngPop
         pattern = r'function latLngPop\(e\)\s*\{[^}]+\}'
@@ -1,581 +1,72 @@
-from PyQt5.QtWidgets import QWidget, QVBoxLayout
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas, \
-    NavigationToolbar2QT as NavigationToolbar
+from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.figure import Figure
-import matplotlib.dates as mdates
-import matplotlib.ticker as ticker
 import logic.stats.data_fetcher as data_fetcher
-from datetime import datetime, timedelta, time
-import matplotlib as mpl
-import numpy as np
-from scipy.interpolate import interp1d
-import mplcursors
+import logic.stats.charts as charts
+import logic.utils.tracing as tracing
 
 
 class BasePlot(FigureCanvas):
-    """Base class for all plots with common functionality."""
+    """Qt canvas around a reusable chart; switching locations updates it in place."""
 
-    def __init__(self, parent=None):
-        super().__init__(parent)
-        self._setup_matplotlib_style()
+    def __init__(self, chart, parent=None):
+        self.chart = chart
+        super().__init__(chart.figure)
+        self.setParent(parent)
+        self.id = None
 
-    def _setup_matplotlib_style(self):
-        """Configure matplotlib style for dark theme."""
-        mpl.rcParams.update({
-            'figure.facecolor': 'none',
-            'axes.facecolor': '#1a1c1e',
-            'axes.edgecolor': '#4a4f55',
-            'axes.labelcolor': '#e0e0e0',
-            'xtick.color': '#b0b0b0',
-            'ytick.color': '#b0b0b0',
-            'grid.color': '#3a3f45',
-            'grid.linestyle': '--',
-            'grid.alpha': 0.7,
-            'lines.linewidth': 2.5,
-            'font.size': 9,
-            'font.family': 'Segoe UI',
-            'legend.facecolor': '#2a2e32',
-            'legend.edgecolor': '#3a3f45',
-            'legend.fontsize': 10,
-            'legend.labelcolor': 'white',
-            'legend.framealpha': 0.9,
-            'xtick.direction': 'out',
-            'ytick.direction': 'out',
-        })
-
-    def _adjust_layout(self):
-        """Adjust plot layout and margins."""
-        self.figure.subplots_adjust(
-            left=0.08,
-            right=0.92,
-            top=0.82,
-            bottom=0.20
-        )
-
-class MeteoPlot(BasePlot):
-    """Weather forecast plot with temperature, precipitation, cloud cover, and sun markers."""
-
-    def __init__(self, id, parent=None):
-
-        # Constants
-        self.CHART_HOURS = 36
-        self.MAIN_COLOR = '#ff4f64'
-        self.APPARENT_COLOR = '#5bc0ff'
-        self.RAIN_COLOR = '#4da6ff'
-        self.CLOUD_COLOR = '#888888'
-        self.SUNSET_COLOR = '#ff6b35'
-        self.SUNRISE_COLOR = '#ffb347'
-
-        self.id = id
-        self.ax_rain = None
-
-        super().__init__(parent)
-
-        if self._load_data():
-            self._create_plot()
-
-    def _load_data(self):
-        """Load weather and location data."""
+    def update_location(self, id, data):
+        """Redraw the chart for another location. Returns False if there was nothing to plot."""
         try:
-            fetcher = data_fetcher.DataFetcher(self.id)
-            self.meteo_data = fetcher.get_meteo_data()
-            self.location = data_fetcher.get_current(self.id)
-
-            if not self.meteo_data:
-                print("No weather data available for display")
+            location = data_fetcher.get_current(id)
+            if not self.chart.update(location, data):
                 return False
-
-            self._extract_weather_data()
-            self._load_sun_data(fetcher)
-            return True
-
         except Exception as e:
             print(f"Error loading data: {e}")
             return False
 
-    def _extract_weather_data(self):
-        """Extract weather data from API response."""
-        hourly = self.meteo_data.get("hourly", {})
-        self.temps = hourly.get("temperature_2m", [])
-        self.apparent_temps = hourly.get("apparent_temperature", [])
-        self.times = [datetime.fromisoformat(t) for t in hourly.get("time", [])]
-        self.shifted_times = [t - timedelta(minutes=30) for t in self.times]
-        self.rain = hourly.get("rain", [])
-        self.cloud_cover = hourly.get("cloud_cover", [])
-        self.day = hourly.get("is_day", [])
-
-        # Calculate time range
-        self.now = datetime.now()
-        self.end_time = self.now + timedelta(hours=self.CHART_HOURS)
-
-        # Temperature range for plotting
-        self.temp_min = min(min(self.temps), min(self.apparent_temps))
-        self.temp_max = max(max(self.temps), max(self.apparent_temps))
-
-    def _load_sun_data(self, fetcher):
-        """Load sunrise and sunset data for all days in chart range."""
-        self.sun_markers = []
-        chart_dates = self._get_chart_dates()
-
-        for date in chart_dates:
-            date_str = date.strftime('%Y-%m-%d')
-            try:
-                sun_data = fetcher.get_sun_data(date_str)
-                if sun_data and 'results' in sun_data:
-                    self._parse_sun_times(sun_data['results'], date)
-            except Exception as e:
-                print(f"Error fetching sun data for {date}: {e}")
-
-    def _get_chart_dates(self):
-        """Get list of dates covered by the chart."""
-        dates = []
-        current_date = self.now.date()
-        end_date = self.end_time.date()
-
-        while current_date <= end_date:
-            dates.append(current_date)
-            current_date += timedelta(days=1)
-
-        return dates
-
-    def _parse_sun_times(self, sun_data, date):
-        """Parse sunrise and sunset times for a given date."""
-        sunset = sun_data.get('sunset')
-        sunrise = sun_data.get('sunrise')
-
-        if sunset:
-            try:
-                sunset_time = datetime.strptime(sunset, '%I:%M:%S %p').time()
-                sunset_dt = datetime.combine(date, sunset_time)
-                if self.now <= sunset_dt <= self.end_time:
-                    self.sun_markers.append(('sunset', sunset_dt))
-            except ValueError:
-                print(f"Could not parse sunset time: {sunset} for date {date}")
-
-        if sunrise:
-            try:
-                sunrise_time = datetime.strptime(sunrise, '%I:%M:%S %p').time()
-                sunrise_dt = datetime.combine(date, sunrise_time)
-                if self.now <= sunrise_dt <= self.end_time:
-                    self.sun_markers.append(('sunrise', sunrise_dt))
-            except ValueError:
-                print(f"Could not parse sunrise time: {sunrise} for date {date}")
-
-    def _create_plot(self):
-        """Create the main weather plot."""
-        self.figure = Figure()
-        self.ax = self.figure.add_subplot(111)
-
-        self.figure.patch.set_alpha(0.0)
-        self.ax.patch.set_alpha(0.5)
-
-        # Create smooth interpolated data
-        self._create_smooth_data()
-
-        # Add plot elements
-        self._add_day_night_background()
-        self._add_cloud_coverage()
-        self._add_temperature_lines()
-        self._add_precipitation()
-        self._add_sun_markers()
-
-        self._configure_axes()
-        self._add_temperature_labels()
-        self._add_grid_and_legend()
-        self._set_title_and_labels()
-        self._adjust_layout()
-
-        self.draw()
-
-    def _create_smooth_data(self):
-        """Create smooth interpolated data for plotting."""
-        time_nums = mdates.date2num(self.times)
-        self.time_nums_smooth = np.linspace(time_nums[0], time_nums[-1], len(time_nums) * 6)
-        self.times_smooth = mdates.num2date(self.time_nums_smooth)
-
-        # Cubic spline interpolation for smooth curves
-        f_temp = interp1d(time_nums, self.temps, kind='cubic', fill_value='extrapolate')
-        self.temps_smooth = f_temp(self.time_nums_smooth)
-
-        f_apparent = interp1d(time_nums, self.apparent_temps, kind='cubic', fill_value='extrapolate')
-        self.apparent_temps_smooth = f_apparent(self.time_nums_smooth)
-
-        f_clouds = interp1d(time_nums, self.cloud_cover, kind='cubic', fill_value='extrapolate')
-        self.cloud_cover_smooth = f_clouds(self.time_nums_smooth)
-
-    def _add_day_night_background(self):
-        """Add day/night background based on sunrise/sunset times."""
-        if not self.sun_markers:
-            return
-
-        # Sort markers by datetime
-        markers = sorted(self.sun_markers, key=lambda x: x[1])
-
-        # Start from chart start
-        last_time = self.now
-        if markers[0][0] == "sunset":
-            last_is_day = True
-        else:
-            last_is_day = False
-
-        for marker_type, marker_time in markers:
-            color = '#2a2e35' if last_is_day else '#1a1c1e'
-            alpha = 0.3 if last_is_day else 0.5
-
-            self.ax.axvspan(last_time, marker_time, color=color, alpha=alpha, zorder=-1)
-
-            # Update for next span
-            last_time = marker_time
-            last_is_day = (marker_type == 'sunrise')
-
-        # Fill remaining until chart end
-        color = '#2a2e35' if last_is_day else '#1a1c1e'
-        alpha = 0.3 if last_is_day else 0.5
-        self.ax.axvspan(last_time, self.end_time, color=color, alpha=alpha, zorder=-1)
-
-    def _add_cloud_coverage(self):
-        """Add cloud coverage as secondary y-axis."""
-        self.ax_clouds = self.ax.twinx()
-
-        self.ax_clouds.plot(
-            self.times_smooth,
-            self.cloud_cover_smooth,
-            color=self.CLOUD_COLOR,
-            alpha=0.6,
-            linewidth=1.5,
-            linestyle='--',
-            label="Cloud Cover [%]",
-            zorder=3
-        )
-
-        # Configure cloud cover axis
-        self.ax_clouds.set_ylim(0, 500)
-        self.ax_clouds.set_ylabel('Cloud Cover [%]', color=self.CLOUD_COLOR, labelpad=15)
-        self.ax_clouds.tick_params(axis='y', labelcolor=self.CLOUD_COLOR)
-        self.ax_clouds.set_yticks([100])
-        self.ax_clouds.set_yticklabels(['100'])
-        self.ax_clouds.spines['right'].set_alpha(0.3)
-        self.ax_clouds.spines['right'].set_color(self.CLOUD_COLOR)
-
-        # Add subtle fill area
-        self.ax_clouds.fill_between(
-            self.times_smooth,
-            0,
-            self.cloud_cover_smooth,
-            color=self.CLOUD_COLOR,
-            alpha=0.08,
-            zorder=1
-        )
-
-    def _add_temperature_lines(self):
-        """Add temperature and apparent temperature lines with fill."""
-        # Temperature lines
-        self.ax.plot(
-            self.times_smooth,
-            self.temps_smooth,
-            color=self.MAIN_COLOR,
-            label='Temperature [°C]',
-            zorder=4
-        )
-
-        self.ax.plot(
-            self.times_smooth,
-            self.apparent_temps_smooth,
-            color=self.APPARENT_COLOR,
-            linestyle=':',
-            label='Feels Like [°C]',
-            zorder=4
-        )
-
-        # Fill between lines
-        self.ax.fill_between(
-            self.times_smooth,
-            self.temps_smooth,
-            self.apparent_temps_smooth,
-            where=np.array(self.temps_smooth) > np.array(self.apparent_temps_smooth),
-            interpolate=True,
-            color=self.MAIN_COLOR,
-            alpha=0.15,
-            zorder=3
-        )
-
-        self.ax.fill_between(
-            self.times_smooth,
-            self.temps_smooth,
-            self.apparent_temps_smooth,
-            where=np.array(self.temps_smooth) <= np.array(self.apparent_temps_smooth),
-            interpolate=True,
-            color=self.APPARENT_COLOR,
-            alpha=0.15,
-            zorder=3
-        )
-
-    def _add_precipitation(self):
-        """Add precipitation bars if rain data exists."""
-        if any(self.rain):
-            self.ax_rain = self.ax.twinx()
-
-            max_rain_value = max(self.rain) if max(self.rain) > 0 else 1
-            self.ax_rain.set_ylim(0, max_rain_value * 8)
-            self.ax_rain.set_ylabel('Precipitation [mm]', color=self.RAIN_COLOR)
-            self.ax_rain.tick_params(axis='y', labelcolor=self.RAIN_COLOR)
-
-            # Rain bars
-            bars = self.ax_rain.bar(
-                self.shifted_times,
-                self.rain,
-                width=0.03,
-                color=self.RAIN_COLOR,
-                alpha=0.6,
-                label='Precipitation [mm]',
-                zorder=4
-            )
-
-            # Rain value labels
-            for x, r_val in zip(self.shifted_times, self.rain):
-                if r_val > 0.0 and self.now < x < self.end_time:
-                    self.ax_rain.text(
-                        x,
-                        r_val + max_rain_value * 0.02,
-                        f"{r_val:.1f}",
-                        ha='center',
-                        va='bottom',
-                        fontsize=7,
-                        color=self.RAIN_COLOR,
-                        zorder=5
-                    )
-
-    def _add_sun_markers(self):
-        """Add sunrise and sunset markers at the top of chart."""
-        y_top = self.temp_max + 2.5
-
-        for marker_type, marker_dt in self.sun_markers:
-            if marker_type == 'sunset':
-                color = self.SUNSET_COLOR
-            elif marker_type == 'sunrise':
-                color = self.SUNRISE_COLOR
-            else:
-                continue
-
-            # Vertical line
-            self.ax.axvline(marker_dt, color=color, linestyle=':', alpha=0.7, linewidth=2, zorder=6)
-
-            # Time annotation
-            self.ax.annotate(
-                f"{marker_dt.strftime('%H:%M')}",
-                (marker_dt, y_top),
-                xytext=(0, 15),
-                textcoords='offset points',
-                ha='center',
-                va='bottom',
-                fontsize=9,
-                color=color,
-                weight='bold',
-                bbox=dict(
-                    boxstyle="round,pad=0.3",
-                    facecolor=(26 / 255, 28 / 255, 30 / 255, 0.8),
-                    edgecolor=color,
-                    linewidth=1,
-                    alpha=0.9
-                ),
-                zorder=7
-            )
-
-    def _configure_axes(self):
-        """Configure x and y axes."""
-        # X-axis configuration
-        self.ax.xaxis.set_major_locator(mdates.HourLocator(interval=3))
-        self.ax.xaxis.set_major_formatter(mdates.DateFormatter('%H:%M'))
-
-        # Secondary x-axis for dates
-        self.ax2 = self.ax.secondary_xaxis('bottom')
-        self.ax2.xaxis.set_major_locator(mdates.HourLocator(byhour=[0, 24]))
-        self.ax2.xaxis.set_major_formatter(mdates.DateFormatter('%d %b'))
-        self.ax2.tick_params(axis='x', which='major', pad=25, labelsize=8, colors='#b0b0b0')
-
-        self.ax.xaxis.set_minor_locator(mdates.HourLocator(interval=1))
-        self.ax.set_xlim(left=self.now, right=self.end_time)
-
-        # Y-axis configuration
-        self.ax.set_ylim(self.temp_min - 2, self.temp_max + 3)
-        self.ax.yaxis.set_major_locator(ticker.MultipleLocator(4))
-        self.ax.yaxis.set_minor_locator(ticker.MultipleLocator(1))
-
-    def _add_temperature_labels(self):
-        """Add temperature value labels on the chart."""
-        bbox_color = (26 / 255, 28 / 255, 30 / 255, 0.7)
-
-        for x, y in zip(self.times, self.temps):
-            if self.now <= x <= self.end_time and x.hour % 2 == 0:
-                self.ax.annotate(
-                    f"{y:.0f}°",
-                    (x, y),
-                    xytext=(0, 12),
-                    textcoords='offset points',
-                    ha='center',
-                    va='bottom',
-                    fontsize=8,
-                    color=self.MAIN_COLOR,
-                    weight='bold',
-                    bbox=dict(
-                        boxstyle="round,pad=0.2",
-                        facecolor=bbox_color,
-                        edgecolor='none',
-                        alpha=0.7
-                    ),
-                    zorder=5
-                )
-
-    def _add_grid_and_legend(self):
-        """Add grid lines and legend."""
-        # Zero line and grid
-        self.ax.axhline(0, color='#5a5f65', linestyle='-', alpha=0.3, zorder=2)
-        self.ax.grid(which='major', alpha=0.7, zorder=2)
-        self.ax.grid(which='minor', alpha=0.3, linestyle=':', zorder=2)
-
-        # Legend
-        lines, labels = self.ax.get_legend_handles_labels()
-        lines_clouds, labels_clouds = self.ax_clouds.get_legend_handles_labels()
-
-        if self.ax_rain is not None:
-            lines_rain, labels_rain = self.ax_rain.get_legend_handles_labels()
-            lines.extend(lines_clouds + lines_rain)
-            labels.extend(labels_clouds + labels_rain)
-        else:
-            lines.extend(lines_clouds)
-            labels.extend(labels_clouds)
-
-        self.ax.legend(lines, labels, loc='upper right', frameon=True)
-
-    def _set_title_and_labels(self):
-        """Set chart title and axis labels."""
-        self.ax.set_title(
-            f"Temperature Forecast - {self.location['Name']}",
-            fontsize=12,
-            pad=35,
-            color='white',
-            fontweight='bold'
-        )
-
-        self.ax.set_xlabel("Time [Hours]", labelpad=10)
-        self.ax.set_ylabel("Temperature [°C]", labelpad=10)
-
-
-class HydroPlot(BasePlot):
-    """Water level plot with interactive features."""
-
-    def __init__(self, id, parent=None):
-        self.MAIN_COLOR = '#03d7fc'
         self.id = id
+        self.draw_idle()
+        return True
 
-        super().__init__(parent)
+    def draw(self):
+        with tracing.span(f"{type(self).__name__}.draw"):
+            # Zooms and resizes since the last draw are resampled here, once
+            self.chart.ensure_lod()
+            super().draw()
 
-        if self._load_data():
-            self._create_plot()
-            self._adjust_layout()
+    def resizeEvent(self, event):
+        # The number of points drawn follows the canvas width; the resize schedules a draw
+        self.chart.invalidate_lod()
+        super().resizeEvent(event)
 
-    def _load_data(self):
-        try:
-            fetcher = data_fetcher.DataFetcher(self.id)
-            self.hydro_data = fetcher.get_hydro_data()
-            self.location = data_fetcher.get_current(self.id)
-            if not self.hydro_data:
-                print("No hydro data available for display")
-                return False
-            return True
-        except Exception as e:
-            print(f"Error loading data: {e}")
-            return False
-
-    def _parse_data(self):
-        """Extract times and levels from raw hydro data."""
-        times, levels = [], []
-        for entry in self.hydro_data:
-            ts = entry["data"]["stan_wody_data_pomiaru"]
-            value = entry["data"]["stan_wody"]
-            try:
-                dt = datetime.strptime(ts, "%Y-%m-%d %H:%M:%S")
-                times.append(dt)
-                levels.append(int(value))
-            except Exception as e:
-                print(f"Skipping entry {entry}: {e}")
-        return times, levels
 
-    def _smooth_data(self, times, levels):
-        """Interpolate levels for smoother plot."""
-        time_nums = mdates.date2num(times)
-        dense_time_nums = np.linspace(time_nums[0], time_nums[-1], len(time_nums) * 6)
-        dense_times = mdates.num2date(dense_time_nums)
-
-        if len(time_nums) >= 4:
-            kind = "cubic"
-        elif len(time_nums) == 3:
-            kind = "quadratic"
-        else:
-            kind = "linear"
-
-        interpolator = interp1d(time_nums, levels, kind=kind, fill_value="extrapolate")
-        smooth_levels = interpolator(dense_time_nums)
+class MeteoPlot(BasePlot):
+    """Weather forecast plot with temperature, precipitation, cloud cover, and sun markers."""
 
-        return dense_times, smooth_levels
+    CHART_HOURS = charts.MeteoChart.CHART_HOURS
 
-    def _plot_levels(self, times_smooth, levels_smooth):
-        """Plot water levels and shaded area."""
-        self.ax.plot(times_smooth, levels_smooth, color=self.MAIN_COLOR, linestyle="-", label="Water level")
-        self.ax.fill_between(
-            times_smooth, 0, levels_smooth,
-            color=self.MAIN_COLOR, alpha=0.08, zorder=1
-        )
+    def __init__(self, id=None, parent=None, meteo_data=None):
+        super().__init__(charts.MeteoChart(Figure()), parent)
 
-    def _set_y_limits(self, levels_smooth):
-        """Add padding to Y-axis limits."""
-        y_min, y_max = min(levels_smooth), max(levels_smooth)
-        y_range = y_max - y_min
-        padding = max(5, y_range * 0.1)
-        self.ax.set_ylim(y_min - padding, y_max + padding)
+        if id is not None:
+            self.update_location(id, meteo_data if meteo_data is not None else self.fetch_meteo(id))
 
-    def _configure_x_axis(self, times):
-        """Set up X-axis gridlines at midnight, labels at midday."""
-        # midnight ticks for grid
-        self.ax.xaxis.set_major_locator(mdates.DayLocator())
-        self.ax.xaxis.set_major_formatter(ticker.NullFormatter())
+    @staticmethod
+    def fetch_meteo(id):
+        """Download the forecast for a location (safe to call off the GUI thread)."""
+        return data_fetcher.DataFetcher(id).get_meteo_data()
 
-        # midday labels
-        midday_ticks, day_labels = [], []
-        unique_days = sorted(set([t.date() for t in times]))
-        for day in unique_days:
-            target = datetime.combine(day, time(12, 0))
-            day_times = [t for t in times if t.date() == day]
-            if not day_times:
-                continue
-            nearest = min(day_times, key=lambda x: abs(x - target))
-            midday_ticks.append(nearest)
-            day_labels.append(nearest.strftime("%d %b"))
 
-        self.ax.xaxis.set_minor_locator(ticker.FixedLocator(mdates.date2num(midday_ticks)))
-        self.ax.xaxis.set_minor_formatter(ticker.FixedFormatter(day_labels))
-        self.ax.set_xlim(times[0], times[-1])
+class HydroPlot(BasePlot):
+    """Water level plot for the station closest to a location."""
 
-    def _add_labels_and_grid(self):
-        """Set titles, labels, legend, grid."""
-        self.ax.set_title(
-            f"Water level – {self.hydro_data[0]['data']['stacja']}",
-            fontsize=12, color="white", fontweight="bold"
-        )
-        self.ax.set_xlabel("")
-        self.ax.set_ylabel("Water level [cm]")
-        self.ax.grid(True, linestyle="--", alpha=0.6)
-        self.ax.legend()
+    def __init__(self, id=None, parent=None, hydro_data=None):
+        super().__init__(charts.HydroChart(Figure(figsize=(5, 3))), parent)
 
-    def _create_plot(self):
-        """High-level orchestrator for building the plot."""
-        self.figure = Figure(figsize=(5, 3))
-        self.ax = self.figure.add_subplot(111)
+        if id is not None:
+            self.update_location(id, hydro_data if hydro_data is not None else self.fetch_hydro(id))
 
-        times, levels = self._parse_data()
-        times_smooth, levels_smooth = self._smooth_data(times, levels)
-        self._plot_levels(times_smooth, levels_smooth)
-        self._set_y_limits(levels_smooth)
-        self._configure_x_axis(times)
-        self._add_labels_and_grid()
-        self.draw()
+    @staticmethod
+    def fetch_hydro(id):
+        """Download the closest station's history (safe to call off the GUI thread)."""
+        return data_fetcher.DataFetcher(id).get_hydro_data()
@@ -0,0 +1,663 @@
+"""Weather and water level charts drawn into a caller-owned matplotlib Figure.
+
+Each chart builds its axes and artists once. update() then swaps in the
+data of another location by changing line data, polygon vertices, bar
+heights and annotation positions in place, so switching locations never
+rebuilds the figure. The charts do not depend on Qt; chart_builder wraps
+them in Qt canvases.
+"""
+from datetime import datetime, timedelta
+import matplotlib as mpl
+import matplotlib.dates as mdates
+import matplotlib.font_manager as font_manager
+import matplotlib.patches as mpatches
+import matplotlib.ticker as ticker
+from matplotlib.collections import PolyCollection
+import numpy as np
+import logic.stats.hydro_columns as hydro_columns
+import logic.stats.lod as lod
+import logic.utils.solar as solar
+import logic.utils.tracing as tracing
+
+_style_applied = False
+
+
+def ui_font_family():
+    """Segoe UI where installed; matplotlib would otherwise log a missing-font warning for every text drawn."""
+    if any(font.name == 'Segoe UI' for font in font_manager.fontManager.ttflist):
+        return 'Segoe UI'
+    return 'sans-serif'
+
+
+def setup_matplotlib_style():
+    """Configure matplotlib style for dark theme (once per process)."""
+    global _style_applied
+    if _style_applied:
+        return
+
+    mpl.rcParams.update({
+        'figure.facecolor': 'none',
+        'axes.facecolor': '#1a1c1e',
+        'axes.edgecolor': '#4a4f55',
+        'axes.labelcolor': '#e0e0e0',
+        'xtick.color': '#b0b0b0',
+        'ytick.color': '#b0b0b0',
+        'grid.color': '#3a3f45',
+        'grid.linestyle': '--',
+        'grid.alpha': 0.7,
+        'lines.linewidth': 2.5,
+        'font.size': 9,
+        'font.family': ui_font_family(),
+        'legend.facecolor': '#2a2e32',
+        'legend.edgecolor': '#3a3f45',
+        'legend.fontsize': 10,
+        'legend.labelcolor': 'white',
+        'legend.framealpha': 0.9,
+        'xtick.direction': 'out',
+        'ytick.direction': 'out',
+    })
+    _style_applied = True
+
+
+def chart_dates(now, hours):
+    """Get list of dates covered by a chart starting at now and spanning hours."""
+    dates = []
+    current_date = now.date()
+    end_date = (now + timedelta(hours=hours)).date()
+
+    while current_date <= end_date:
+        dates.append(current_date)
+        current_date += timedelta(days=1)
+
+    return dates
+
+
+def fill_between_verts(x, y1, y2, where=None):
+    """Polygons equivalent to fill_between(x, y1, y2, where=where, interpolate=True)."""
+    x, y1, y2 = np.asarray(x, float), np.asarray(y1, float), np.asarray(y2, float)
+    n = len(x)
+    if where is None:
+        if not n:
+            return []
+        return [np.concatenate((np.column_stack((x, y1)), np.column_stack((x[::-1], y2[::-1]))))]
+
+    where = np.asarray(where, dtype=bool)
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], where.astype(np.int8), [0]))))
+
+    # Where the curves cross between points edge - 1 and edge, for all edges at once
+    after = np.clip(edges, 0, n - 1)
+    before = np.maximum(after - 1, 0)
+    d = y1 - y2
+    step = d[before] - d[after]
+    frac = np.divide(d[before], step, out=np.zeros(len(edges)), where=step != 0)
+    cross_x = x[before] + frac * (x[after] - x[before])
+    cross_y = y1[before] + frac * (y1[after] - y1[before])
+
+    polygons = []
+    for k in range(0, len(edges), 2):
+        start, stop = edges[k], edges[k + 1]
+        head = [[cross_x[k], cross_y[k]]] if start > 0 else []
+        tail = [[cross_x[k + 1], cross_y[k + 1]]] if stop < n else []
+        top = np.column_stack((x[start:stop], y1[start:stop]))
+        bottom = np.column_stack((x[start:stop], y2[start:stop]))[::-1]
+        polygons.append(np.concatenate([np.reshape(v, (-1, 2)) for v in (head, top, tail, tail, bottom, head)]))
+    return polygons
+
+
+class ArtistPool:
+    """Reusable artists created on demand; unused ones are hidden, not removed."""
+
+    def __init__(self, factory):
+        self.factory = factory
+        self.items = []
+
+    def take(self, count):
+        while len(self.items) < count:
+            self.items.append(self.factory())
+        for i, artist in enumerate(self.items):
+            artist.set_visible(i < count)
+        return self.items[:count]
+
+
+class BaseChart:
+    """Common figure handling for all charts."""
+
+    def __init__(self, figure):
+        setup_matplotlib_style()
+        self.figure = figure
+        self.ax = self.figure.add_subplot(111)
+        self.ax.xaxis_date()
+
+        # Raw (x, ys) of the smoothed lines; resampled once per draw after the x-range or width changed
+        self.series = None
+        self.lod_stale = False
+        self.ax.callbacks.connect('xlim_changed', self.invalidate_lod)
+
+    def invalidate_lod(self, *args):
+        """Mark the resampled lines out of date; ensure_lod() redoes them once before the next draw."""
+        self.lod_stale = True
+
+    def ensure_lod(self):
+        if self.lod_stale:
+            self.refresh_lod()
+
+    @tracing.traced
+    def refresh_lod(self):
+        """Resample the lines for the current axes width and x-range, e.g. after a resize or zoom."""
+        self.lod_stale = False
+        if self.series is None:
+            return
+        x, ys = lod.level_of_detail(*self.series, self.ax.get_xlim(), self.ax.bbox.width)
+        self._draw_series(x, ys)
+
+    def _draw_series(self, x, ys):
+        """Put the resampled series into the chart's artists."""
+        raise NotImplementedError
+
+    def _adjust_layout(self):
+        """Adjust plot layout and margins."""
+        self.figure.subplots_adjust(
+            left=0.08,
+            right=0.92,
+            top=0.82,
+            bottom=0.20
+        )
+
+
+class MeteoChart(BaseChart):
+    """Weather forecast chart with temperature, precipitation, cloud cover, and sun markers."""
+
+    CHART_HOURS = 36
+    MAIN_COLOR = '#ff4f64'
+    APPARENT_COLOR = '#5bc0ff'
+    RAIN_COLOR = '#4da6ff'
+    CLOUD_COLOR = '#888888'
+    SUNSET_COLOR = '#ff6b35'
+    SUNRISE_COLOR = '#ffb347'
+    LABEL_BBOX_COLOR = (26 / 255, 28 / 255, 30 / 255, 0.7)
+    SUN_BBOX_COLOR = (26 / 255, 28 / 255, 30 / 255, 0.8)
+
+    @tracing.traced
+    def __init__(self, figure):
+        super().__init__(figure)
+        self.figure.patch.set_alpha(0.0)
+        self.ax.patch.set_alpha(0.5)
+
+        self.ax_clouds = self.ax.twinx()
+        self.ax_rain = self.ax.twinx()
+        self._legend_has_rain = None
+
+        self._build_day_night_background()
+        self._build_cloud_coverage()
+        self._build_temperature_lines()
+        self._build_precipitation()
+        self._build_sun_markers()
+        self._build_temperature_labels()
+
+        self._configure_axes()
+        self._add_grid()
+        self._set_title_and_labels()
+        self._adjust_layout()
+
+    def update(self, location, meteo_data, now=None):
+        """Show another location's forecast. Returns False if there is nothing to plot."""
+        self.location = location
+        self.meteo_data = meteo_data
+
+        if not self.meteo_data:
+            print("No weather data available for display")
+            return False
+
+        with tracing.span("MeteoChart.update", location=self.location["Name"]):
+            with tracing.span("MeteoChart.prepare_data"):
+                self._extract_weather_data(now)
+                self._load_sun_data()
+                self._load_series()
+
+            with tracing.span("MeteoChart.update_artists"):
+                self._update_day_night_background()
+                self._update_precipitation()
+                self._update_sun_markers()
+                self._update_temperature_labels()
+                self._update_axes()
+                self._update_legend()
+                self.title.set_text(f"Temperature Forecast - {self.location['Name']}")
+
+            self.refresh_lod()
+        return True
+
+    # Data
+
+    def _extract_weather_data(self, now=None):
+        """Extract weather data from API response."""
+        hourly = self.meteo_data.get("hourly", {})
+        self.temps = hourly.get("temperature_2m", [])
+        self.apparent_temps = hourly.get("apparent_temperature", [])
+        self.times = [datetime.fromisoformat(t) for t in hourly.get("time", [])]
+        self.shifted_times = [t - timedelta(minutes=30) for t in self.times]
+        self.rain = hourly.get("rain", [])
+        self.cloud_cover = hourly.get("cloud_cover", [])
+        self.day = hourly.get("is_day", [])
+
+        # Calculate time range
+        self.now = now or datetime.now()
+        self.end_time = self.now + timedelta(hours=self.CHART_HOURS)
+
+        # Temperature range for plotting
+        self.temp_min = min(min(self.temps), min(self.apparent_temps))
+        self.temp_max = max(max(self.temps), max(self.apparent_temps))
+
+    def _load_sun_data(self):
+        """Compute sunrise and sunset markers for all days in chart range."""
+        self.sun_markers = []
+        events = solar.sun_events(self._get_chart_dates(), [self.location["Lat"]], [self.location["Lon"]])
+        tz = solar.location_tz(self.location["Lat"], self.location["Lon"])
+
+        for marker_type in ('sunset', 'sunrise'):
+            for value in events[marker_type][:, 0]:
+                marker_dt = solar.to_local(value, tz)
+                if marker_dt and self.now <= marker_dt <= self.end_time:
+                    self.sun_markers.append((marker_type, marker_dt))
+
+    def _get_chart_dates(self):
+        """Get list of dates covered by the chart."""
+        return chart_dates(self.now, self.CHART_HOURS)
+
+    def _load_series(self):
+        """Raw series behind the smoothed lines, all sharing the hourly time axis."""
+        self.series = (
+            mdates.date2num(self.times),
+            np.array([self.temps, self.apparent_temps, self.cloud_cover], dtype=float)
+        )
+
+    # Artists built once
+
+    def _build_day_night_background(self):
+        """Day and night spans, one polygon collection each, spanning the full axes height."""
+        transform = self.ax.get_xaxis_transform()
+        self.day_spans = PolyCollection([], facecolors='#2a2e35', alpha=0.3, zorder=-1, transform=transform)
+        self.night_spans = PolyCollection([], facecolors='#1a1c1e', alpha=0.5, zorder=-1, transform=transform)
+        self.ax.add_collection(self.day_spans, autolim=False)
+        self.ax.add_collection(self.night_spans, autolim=False)
+
+    def _build_cloud_coverage(self):
+        """Add cloud coverage as secondary y-axis."""
+        self.cloud_line, = self.ax_clouds.plot(
+            [], [],
+            color=self.CLOUD_COLOR,
+            alpha=0.6,
+            linewidth=1.5,
+            linestyle='--',
+            label="Cloud Cover [%]",
+            zorder=3
+        )
+
+        # Configure cloud cover axis
+        self.ax_clouds.set_ylim(0, 500)
+        self.ax_clouds.set_ylabel('Cloud Cover [%]', color=self.CLOUD_COLOR, labelpad=15)
+        self.ax_clouds.tick_params(axis='y', labelcolor=self.CLOUD_COLOR)
+        self.ax_clouds.set_yticks([100])
+        self.ax_clouds.set_yticklabels(['100'])
+        self.ax_clouds.spines['right'].set_alpha(0.3)
+        self.ax_clouds.spines['right'].set_color(self.CLOUD_COLOR)
+
+        # Add subtle fill area
+        self.cloud_fill = PolyCollection([], facecolors=self.CLOUD_COLOR, alpha=0.08, zorder=1)
+        self.ax_clouds.add_collection(self.cloud_fill, autolim=False)
+
+    def _build_temperature_lines(self):
+        """Add temperature and apparent temperature lines with fill."""
+        self.temp_line, = self.ax.plot([], [], color=self.MAIN_COLOR, label='Temperature [°C]', zorder=4)
+        self.apparent_line, = self.ax.plot(
+            [], [],
+            color=self.APPARENT_COLOR,
+            linestyle=':',
+            label='Feels Like [°C]',
+            zorder=4
+        )
+
+        # Fill between lines, colored by which one is warmer
+        self.warmer_fill = PolyCollection([], facecolors=self.MAIN_COLOR, alpha=0.15, zorder=3)
+        self.colder_fill = PolyCollection([], facecolors=self.APPARENT_COLOR, alpha=0.15, zorder=3)
+        self.ax.add_collection(self.warmer_fill, autolim=False)
+        self.ax.add_collection(self.colder_fill, autolim=False)
+
+    def _build_precipitation(self):
+        """Precipitation axis with all hourly bars in one polygon collection; labels are pooled."""
+        self.ax_rain.set_ylabel('Precipitation [mm]', color=self.RAIN_COLOR)
+        self.ax_rain.tick_params(axis='y', labelcolor=self.RAIN_COLOR)
+        self.rain_bars = PolyCollection([], facecolors=self.RAIN_COLOR, alpha=0.6, zorder=4)
+        self.ax_rain.add_collection(self.rain_bars, autolim=False)
+        self.rain_legend_handle = mpatches.Patch(color=self.RAIN_COLOR, alpha=0.6, label='Precipitation [mm]')
+
+        self.rain_labels = ArtistPool(lambda: self.ax_rain.text(
+            0, 0, "",
+            ha='center',
+            va='bottom',
+            fontsize=7,
+            color=self.RAIN_COLOR,
+            zorder=5
+        ))
+
+    def _build_sun_markers(self):
+        """Pools of vertical lines and time annotations for sunrise and sunset."""
+        self.sun_lines = ArtistPool(lambda: self.ax.axvline(
+            0, linestyle=':', alpha=0.7, linewidth=2, zorder=6
+        ))
+        self.sun_labels = ArtistPool(lambda: self.ax.annotate(
+            "",
+            (0, 0),
+            xytext=(0, 15),
+            textcoords='offset points',
+            ha='center',
+            va='bottom',
+            fontsize=9,
+            weight='bold',
+            bbox=dict(
+                boxstyle="round,pad=0.3",
+                facecolor=self.SUN_BBOX_COLOR,
+                linewidth=1,
+                alpha=0.9
+            ),
+            zorder=7
+        ))
+
+    def _build_temperature_labels(self):
+        """Pool of temperature value labels."""
+        self.temp_labels = ArtistPool(lambda: self.ax.annotate(
+            "",
+            (0, 0),
+            xytext=(0, 12),
+            textcoords='offset points',
+            ha='center',
+            va='bottom',
+            fontsize=8,
+            color=self.MAIN_COLOR,
+            weight='bold',
+            bbox=dict(
+                boxstyle="round,pad=0.2",
+                facecolor=self.LABEL_BBOX_COLOR,
+                edgecolor='none',
+                alpha=0.7
+            ),
+            zorder=5
+        ))
+
+    def _configure_axes(self):
+        """Configure x and y axis locators and formatters."""
+        # X-axis ticks are set per location in _update_axes
+
+        # Date labels under the midnight ticks, moved by _update_axes
+        offset = -(mpl.rcParams['xtick.major.size'] + 25)
+        self.date_labels = ArtistPool(lambda: self.ax.annotate(
+            "",
+            (0, 0),
+            xycoords=self.ax.get_xaxis_transform(),
+            xytext=(0, offset),
+            textcoords='offset points',
+            ha='center',
+            va='top',
+            fontsize=8,
+            color='#b0b0b0'
+        ))
+
+
+        # Y-axis configuration
+        self.ax.yaxis.set_major_locator(ticker.MultipleLocator(4))
+        self.ax.yaxis.set_minor_locator(ticker.MultipleLocator(1))
+
+    def _add_grid(self):
+        """Add zero line and grid lines."""
+        self.ax.axhline(0, color='#5a5f65', linestyle='-', alpha=0.3, zorder=2)
+        self.ax.grid(which='major', alpha=0.7, zorder=2)
+        self.ax.grid(which='minor', alpha=0.3, linestyle=':', zorder=2)
+
+    def _set_title_and_labels(self):
+        """Set chart title and axis labels."""
+        self.title = self.ax.set_title(
+            "Temperature Forecast",
+            fontsize=12,
+            pad=35,
+            color='white',
+            fontweight='bold'
+        )
+
+        self.ax.set_xlabel("Time [Hours]", labelpad=10)
+        self.ax.set_ylabel("Temperature [°C]", labelpad=10)
+
+    # In-place updates
+
+    def _update_day_night_background(self):
+        """Update day/night background based on sunrise/sunset times."""
+        day, night = [], []
+
+        if self.sun_markers:
+            # Sort markers by datetime
+            markers = sorted(self.sun_markers, key=lambda x: x[1])
+
+            # Start from chart start
+            last_time = self.now
+            last_is_day = markers[0][0] == "sunset"
+
+            for marker_type, marker_time in markers + [(None, self.end_time)]:
+                x0, x1 = mdates.date2num(last_time), mdates.date2num(marker_time)
+                (day if last_is_day else night).append([(x0, 0), (x0, 1), (x1, 1), (x1, 0)])
+
+                # Update for next span
+                last_time = marker_time
+                last_is_day = (marker_type == 'sunrise')
+
+        self.day_spans.set_verts(day)
+        self.night_spans.set_verts(night)
+
+    def _draw_series(self, x, ys):
+        temps, apparent_temps, cloud_cover = ys
+        self._update_cloud_coverage(x, cloud_cover)
+        self._update_temperature_lines(x, temps, apparent_temps)
+
+    def _update_cloud_coverage(self, x, cloud_cover):
+        self.cloud_line.set_data(x, cloud_cover)
+        self.cloud_fill.set_verts(fill_between_verts(x, cloud_cover, np.zeros_like(cloud_cover)))
+
+    def _update_temperature_lines(self, x, temps, apparent_temps):
+        self.temp_line.set_data(x, temps)
+        self.apparent_line.set_data(x, apparent_temps)
+
+        warmer = temps > apparent_temps
+        self.warmer_fill.set_verts(fill_between_verts(x, temps, apparent_temps, warmer))
+        self.colder_fill.set_verts(fill_between_verts(x, temps, apparent_temps, ~warmer))
+
+    def _update_precipitation(self):
+        """Update precipitation bars and labels; the axis is hidden when no rain is forecast."""
+        self.has_rain = any(self.rain)
+        self.ax_rain.set_visible(self.has_rain)
+        if not self.has_rain:
+            self.rain_labels.take(0)
+            return
+
+        max_rain_value = max(self.rain) if max(self.rain) > 0 else 1
+        self.ax_rain.set_ylim(0, max_rain_value * 8)
+
+        x = mdates.date2num(self.shifted_times)
+
+        # One rectangle per hour, 0.03 days wide, centred on the hour
+        rain = np.asarray(self.rain, dtype=float)
+        bars = np.zeros((len(x), 4, 2))
+        bars[:, :, 0] = x[:, np.newaxis] + [-0.015, -0.015, 0.015, 0.015]
+        bars[:, 1:3, 1] = rain[:, np.newaxis]
+        self.rain_bars.set_verts(bars)
+
+        # Rain value labels
+        now, end = mdates.date2num(self.now), mdates.date2num(self.end_time)
+        shown = [(x_val, r_val) for x_val, r_val in zip(x, self.rain) if r_val > 0.0 and now < x_val < end]
+        for label, (x_val, r_val) in zip(self.rain_labels.take(len(shown)), shown):
+            label.set_position((x_val, r_val + max_rain_value * 0.02))
+            label.set_text(f"{r_val:.1f}")
+
+    def _update_sun_markers(self):
+        """Move sunrise and sunset markers at the top of chart."""
+        y_top = self.temp_max + 2.5
+        markers = [(t, dt) for t, dt in self.sun_markers if t in ('sunset', 'sunrise')]
+
+        lines = self.sun_lines.take(len(markers))
+        labels = self.sun_labels.take(len(markers))
+        for line, label, (marker_type, marker_dt) in zip(lines, labels, markers):
+            color = self.SUNSET_COLOR if marker_type == 'sunset' else self.SUNRISE_COLOR
+            x = mdates.date2num(marker_dt)
+
+            # Vertical line
+            line.set_xdata([x, x])
+            line.set_color(color)
+
+            # Time annotation
+            label.xy = (x, y_top)
+            label.set_text(f"{marker_dt.strftime('%H:%M')}")
+            label.set_color(color)
+            label.get_bbox_patch().set_edgecolor(color)
+
+    def _update_temperature_labels(self):
+        """Update temperature value labels on the chart."""
+        shown = [(x, y) for x, t, y in zip(self.series[0], self.times, self.temps)
+                 if self.now <= t <= self.end_time and t.hour % 2 == 0]
+
+        for label, (x, y) in zip(self.temp_labels.take(len(shown)), shown):
+            label.xy = (x, y)
+            label.set_text(f"{y:.0f}°")
+
+    def _update_axes(self):
+        """Limits, hour ticks and date labels; fixed per location so no tick is located per draw."""
+        self.ax.set_xlim(mdates.date2num(self.now), mdates.date2num(self.end_time))
+        self.ax.set_ylim(self.temp_min - 2, self.temp_max + 3)
+
+        first = self.now.replace(minute=0, second=0, microsecond=0)
+        if first < self.now:
+            first += timedelta(hours=1)
+        count = int((self.end_time - first) / timedelta(hours=1)) + 1
+        hours = [first + timedelta(hours=h) for h in range(count)]
+        x = mdates.date2num(first) + np.arange(count) / 24
+        major = [i for i, t in enumerate(hours) if t.hour % 3 == 0]
+        self.ax.set_xticks(x, minor=True)
+        self.ax.set_xticks(x[major], [hours[i].strftime('%H:%M') for i in major])
+
+        midnights = [i for i in major if hours[i].hour == 0]
+        for label, i in zip(self.date_labels.take(len(midnights)), midnights):
+            label.xy = (x[i], 0)
+            label.set_text(hours[i].strftime('%d %b'))
+
+    def _update_legend(self):
+        """Rebuild the legend only when the precipitation entry appears or disappears."""
+        if self._legend_has_rain == self.has_rain:
+            return
+
+        lines = [self.temp_line, self.apparent_line, self.cloud_line]
+        if self.has_rain:
+            lines.append(self.rain_legend_handle)
+
+        self.ax.legend(lines, [line.get_label() for line in lines], loc='upper right', frameon=True)
+        self._legend_has_rain = self.has_rain
+
+
+class HydroChart(BaseChart):
+    """Water level chart for the station closest to a location."""
+
+    MAIN_COLOR = '#03d7fc'
+    # Horizontal room a day label needs before labels start being skipped
+    DAY_LABEL_PX = 60
+
+    @tracing.traced
+    def __init__(self, figure):
+        super().__init__(figure)
+
+        self.level_line, = self.ax.plot([], [], color=self.MAIN_COLOR, linestyle="-", label="Water level")
+        self.level_fill = PolyCollection([], facecolors=self.MAIN_COLOR, alpha=0.08, zorder=1)
+        self.ax.add_collection(self.level_fill, autolim=False)
+
+        # Midnight ticks for grid, midday labels
+        self.midday_ticks = np.empty(0)
+        self.day_labels = []
+        self.ax.xaxis.set_major_formatter(ticker.NullFormatter())
+
+        self._add_labels_and_grid()
+        self._adjust_layout()
+
+    def update(self, location, hydro_data):
+        """Show another station's history. Returns False if there is nothing to plot."""
+        self.location = location
+        self.hydro_data = hydro_data
+
+        if not self.hydro_data:
+            print("No hydro data available for display")
+            return False
+
+        with tracing.span("HydroChart.update", location=self.location["Name"]):
+            with tracing.span("HydroChart.decode", rows=len(self.hydro_data)):
+                columns = self._parse_data()
+            if not len(columns):
+                print("No valid hydro measurements to display")
+                return False
+
+            with tracing.span("HydroChart.update_artists"):
+                self._load_series(columns)
+                self._set_y_limits(columns.levels)
+                self._configure_x_axis(columns)
+                self.title.set_text(f"Water level – {columns.station}")
+
+            self.refresh_lod()
+        return True
+
+    def _parse_data(self):
+        """Decode raw hydro data into time-ordered columns, dropping malformed rows."""
+        columns = hydro_columns.decode(self.hydro_data)
+        if columns.skipped:
+            print(f"Skipping {columns.skipped} malformed hydro entries")
+        return columns.clean()
+
+    def _load_series(self, columns):
+        """Raw levels in time order, smoothed or decimated per draw by refresh_lod."""
+        self.series = (mdates.date2num(columns.times), columns.levels.astype(float)[np.newaxis])
+
+    def _draw_series(self, x, ys):
+        """Update water levels line and shaded area."""
+        levels = ys[0]
+        self.level_line.set_data(x, levels)
+        self.level_fill.set_verts(fill_between_verts(x, levels, np.zeros_like(levels)))
+
+    def _set_y_limits(self, levels):
+        """Add padding to Y-axis limits."""
+        y_min, y_max = levels.min(), levels.max()
+        y_range = y_max - y_min
+        padding = max(5, y_range * 0.1)
+        self.ax.set_ylim(y_min - padding, y_max + padding)
+
+    def _configure_x_axis(self, columns):
+        """Place day labels at the measurement closest to midday."""
+        days = columns.daily()
+        self.midday_ticks = mdates.date2num(days.midday)
+        self.day_labels = days.labels()
+        self.ax.set_xlim(self.series[0][0], self.series[0][-1])
+
+    def refresh_lod(self):
+        super().refresh_lod()
+        self._update_day_ticks()
+
+    def _update_day_ticks(self):
+        """Show every n-th day so the labels fit the visible range and canvas width."""
+        lo, hi = sorted(self.ax.get_xlim())
+        days = max(hi - lo, 1)
+        step = max(1, int(np.ceil(days * self.DAY_LABEL_PX / max(self.ax.bbox.width, 1))))
+
+        start, stop = np.searchsorted(self.midday_ticks, [lo, hi])
+        shown = np.arange(start, stop)
+        shown = shown[shown % step == 0]
+
+        self.ax.xaxis.set_major_locator(mdates.DayLocator(interval=step))
+        self.ax.xaxis.set_minor_locator(ticker.FixedLocator(self.midday_ticks[shown]))
+        self.ax.xaxis.set_minor_formatter(ticker.FixedFormatter([self.day_labels[i] for i in shown]))
+
+    def _add_labels_and_grid(self):
+        """Set titles, labels, legend, grid."""
+        self.title = self.ax.set_title("Water level", fontsize=12, color="white", fontweight="bold")
+        self.ax.set_xlabel("")
+        self.ax.set_ylabel("Water level [cm]")
+        self.ax.grid(True, linestyle="--", alpha=0.6)
+        self.ax.legend()
@@ -0,0 +1,161 @@
+"""Photography conditions scoring for many locations at once.
+
+The hourly forecasts of all locations are stacked into (locations, hours)
+arrays on a common UTC hour grid, and the sun elevation for the same grid
+comes from solar.solar_elevation, so every score below is a handful of
+array operations regardless of how many spots are saved:
+
+    golden_hour  sun between -4° and +6°, dry, not overcast
+    blue_hour    sun between -6° and -4°, dry, the clearer the better
+    fog          fog reported (WMO weather codes 45/48), best around sunrise
+    clear_sky    daylight with little cloud and no rain
+
+Scores are in [0, 1]. top_windows() turns them into ranked runs of
+consecutive good hours per location and condition.
+"""
+from collections import namedtuple
+from datetime import datetime, timezone
+import numpy as np
+import logic.utils.solar as solar
+
+HORIZON_HOURS = 36
+CONDITIONS = ("golden_hour", "blue_hour", "fog", "clear_sky")
+LABELS = {"golden_hour": "Golden hour", "blue_hour": "Blue hour", "fog": "Fog", "clear_sky": "Clear sky"}
+
+GOLDEN_HOUR = (-4.0, 6.0)
+BLUE_HOUR = (-6.0, -4.0)
+FOG_CODES = (45, 48)
+# Rain in mm/h at which an hour stops being worth going out for
+RAIN_LIMIT = 1.0
+# Golden hour light survives up to this much cloud, overcast kills it
+GOLDEN_CLOUD_LIMIT = 60.0
+# Hours scoring at least this much count as part of a window
+MIN_SCORE = 0.5
+# Ranking weight per condition: clear skies are common, the rest is what photographers go out for
+WEIGHTS = {"golden_hour": 1.0, "blue_hour": 0.9, "fog": 1.0, "clear_sky": 0.6}
+
+FIELDS = ("cloud_cover", "rain", "temperature_2m", "is_day", "weather_code")
+HOUR = np.timedelta64(3600, "s")
+
+Window = namedtuple("Window", ["location", "condition", "start", "end", "score"])
+
+
+class ForecastGrid:
+    """Hourly fields of many forecasts on one UTC hour grid; missing hours are NaN."""
+
+    def __init__(self, times, fields):
+        self.times = times
+        self.fields = fields
+
+    def __getitem__(self, name):
+        return self.fields[name]
+
+
+def _floats(values):
+    """List of numbers as float32, None -> NaN."""
+    try:
+        return np.array(values, dtype=np.float32)
+    except TypeError:
+        return np.array([np.nan if v is None else v for v in values], dtype=np.float32)
+
+
+def stack_forecasts(forecasts, start, hours=HORIZON_HOURS):
+    """Put Open-Meteo responses on the grid start, start + 1 h, ... as (len(forecasts), hours) arrays."""
+    start = np.datetime64(start, "h").astype("datetime64[s]")
+    times = start + np.arange(hours) * HOUR
+    fields = {name: np.full((len(forecasts), hours), np.nan, dtype=np.float32) for name in FIELDS}
+
+    for row, forecast in enumerate(forecasts):
+        hourly = (forecast or {}).get("hourly") or {}
+        stamps = hourly.get("time") or []
+        if not stamps:
+            continue
+
+        # Hourly series: only the first timestamp is needed to place the whole row
+        first = np.datetime64(stamps[0], "s") - np.timedelta64(int(forecast.get("utc_offset_seconds") or 0), "s")
+        offset = int((first - start) // HOUR)
+        lo, hi = max(0, -offset), min(len(stamps), hours - offset)
+        if lo >= hi:
+            continue
+
+        for name in FIELDS:
+            column = hourly.get(name)
+            if column and len(column) == len(stamps):
+                fields[name][row, offset + lo:offset + hi] = _floats(column[lo:hi])
+    return ForecastGrid(times, fields)
+
+
+def _band(elevation, low, high):
+    return (elevation >= low) & (elevation <= high)
+
+
+def score(grid, lats, lons):
+    """{condition: (locations, hours) scores in [0, 1]}; hours without data score 0."""
+    # Sun elevation in the middle of each hour
+    elevation = solar.solar_elevation(grid.times + HOUR // 2, lats, lons)
+
+    cloud = np.clip(grid["cloud_cover"], 0, 100) / 100
+    dry = np.clip(1 - grid["rain"] / RAIN_LIMIT, 0, 1)
+    clear = 1 - cloud
+
+    not_overcast = 1 - np.clip(cloud * 100 - GOLDEN_CLOUD_LIMIT, 0, 100 - GOLDEN_CLOUD_LIMIT) / (100 - GOLDEN_CLOUD_LIMIT)
+    golden = _band(elevation, *GOLDEN_HOUR) * dry * (0.4 + 0.6 * not_overcast)
+    blue = _band(elevation, *BLUE_HOUR) * dry * np.sqrt(clear)
+
+    foggy = np.isin(grid["weather_code"], FOG_CODES)
+    fog = foggy * np.where(elevation < GOLDEN_HOUR[1], 1.0, 0.7)
+
+    clear_sky = (grid["is_day"] > 0) * dry * clear ** 2
+
+    scores = {"golden_hour": golden, "blue_hour": blue, "fog": fog, "clear_sky": clear_sky}
+    return {name: np.nan_to_num(values, nan=0.0).astype(np.float32) for name, values in scores.items()}
+
+
+def top_windows(scores, times, min_score=MIN_SCORE, limit=10):
+    """Best runs of consecutive hours scoring at least min_score, over all locations and conditions.
+
+    Windows are ranked by mean score times the condition's WEIGHTS entry,
+    keeping only the best window per location and condition. Returns
+    Windows (location row, condition, start, end as UTC datetime64,
+    mean score), best first.
+    """
+    found = []
+    for index, (condition, values) in enumerate(scores.items()):
+        good = values >= min_score
+        # Run boundaries of every row at once: +1 where a run starts, -1 just past its end
+        edges = np.diff(np.pad(good, ((0, 0), (1, 1))).astype(np.int8), axis=1)
+        rows, starts = np.nonzero(edges == 1)
+        _, ends = np.nonzero(edges == -1)
+
+        sums = np.pad(np.cumsum(values, axis=1, dtype=np.float64), ((0, 0), (1, 0)))
+        means = (sums[rows, ends] - sums[rows, starts]) / (ends - starts)
+        found.append((np.full(len(rows), index), rows, starts, ends, means, means * WEIGHTS.get(condition, 1.0)))
+
+    conditions, rows, starts, ends, means, ranks = (np.concatenate(column) for column in zip(*found))
+
+    # Best first (earlier start on ties), then the first window of every (location, condition) pair
+    order = np.lexsort((starts, -ranks))
+    _, first = np.unique(rows[order] * len(scores) + conditions[order], return_index=True)
+    order = order[np.sort(first)][:limit]
+
+    names = list(scores)
+    return [Window(int(rows[i]), names[conditions[i]], times[starts[i]], times[ends[i] - 1] + HOUR, float(means[i]))
+            for i in order]
+
+
+def best_windows(locations, forecasts, now=None, hours=HORIZON_HOURS, limit=10):
+    """Top windows in the next hours for saved locations.
+
+    locations are location dicts, forecasts maps location ID to its
+    Open-Meteo response; locations without a forecast are left out.
+    Windows carry the location dict instead of its row.
+    """
+    located = [location for location in locations if forecasts.get(location["ID"])]
+    if not located:
+        return []
+
+    now = now or datetime.now(timezone.utc)
+    start = np.datetime64(now.astimezone(timezone.utc).replace(tzinfo=None), "h")
+    grid = stack_forecasts([forecasts[location["ID"]] for location in located], start, hours)
+    scores = score(grid, [location["Lat"] for location in located], [location["Lon"] for location in located])
+    return [w._replace(location=located[w.location]) for w in top_windows(scores, grid.times, limit=limit)]
@@ -1,27 +1,265 @@
+import json
 import requests
-import logic.utils.location_base as loc
-import logic.utils.haversine as hv
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+from logic.utils.location_store import get_store
+import logic.utils.solar as solar
+import logic.utils.station_index as station_index
+import logic.utils.tracing as tracing
+import logic.stats.forecast_archive as forecast_archive
+from logic.stats.http_cache import get_cache, normalize_url
+from logic.stats.http_session import get_session
+from logic.stats.single_flight import SingleFlight
+
+# Cache lifetimes in seconds, per endpoint
+METEO_TTL = 30 * 60
+HYDRO_LIST_TTL = 24 * 3600
+HYDRO_DATA_TTL = 30 * 60
+
+METEO_URL = "https://api.open-meteo.com/v1/forecast"
+HYDRO_BASE_URL = "https://raw.githubusercontent.com/AdamCofala/polish-hydro-data/refs/heads/master"
+METEO_PARAMS = "hourly=temperature_2m,rain,weather_code,cloud_cover,apparent_temperature,is_day&models=ecmwf_ifs025&past_days=0&forecast_days=3"
+
+# ecmwf_ifs025 runs at these hours (UTC); Open-Meteo serves a run roughly this long after it starts
+MODEL_RUN_HOURS = (0, 6, 12, 18)
+MODEL_AVAILABLE_AFTER = timedelta(hours=7)
+
+# Batched forecast requests are split so each URL stays under this length
+MAX_URL_LENGTH = 2000
+
+# Identical requests in flight at the same time go out once
+_flights = SingleFlight()
 
 
 def get_current(id):
-    locations = loc.get_locations("assets/config.json")
-    return locations[id]
+    return get_store().get(id)
 
 
-def get_hydro_list():
+def _decode(body):
+    """Parse a JSON body; a malformed one raises requests' JSONDecodeError, a RequestException like the rest."""
+    with tracing.span("json.decode", bytes=len(body)):
+        try:
+            return json.loads(body)
+        except json.JSONDecodeError as e:
+            raise requests.exceptions.JSONDecodeError(e.msg, e.doc, e.pos) from e
+        except ValueError as e:
+            raise requests.exceptions.JSONDecodeError(str(e), "", 0) from e
+
+
+def _decode_cached(cache, key, entry):
+    """Parse a cached body, dropping the entry when it is unreadable so the next request refetches it."""
     try:
-        url = f"https://raw.githubusercontent.com/AdamCofala/polish-hydro-data/refs/heads/master/stations_list.json"
-        response = requests.get(url)
-        response.raise_for_status()
-        return response.json()
+        return _decode(entry.body)
+    except requests.exceptions.JSONDecodeError:
+        cache.delete(key)
+        raise
+
+
+def latest_model_run(now=None):
+    """Start of the newest ecmwf_ifs025 run Open-Meteo serves at the given time (aware UTC datetime)."""
+    now = now or datetime.now(timezone.utc)
+    midnight = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    runs = (midnight + timedelta(days=day, hours=hour) for day in (-1, 0) for hour in MODEL_RUN_HOURS)
+    return max(run for run in runs if run + MODEL_AVAILABLE_AFTER <= now)
+
+
+def response_run(response):
+    """(model run, time served) of a forecast response, from its Last-Modified or Date header.
+
+    Open-Meteo does not name the run in the body, so the run is the newest
+    one published when the server produced the response; without usable
+    headers the current time is used.
+    """
+    served = None
+    for header in ("Last-Modified", "Date"):
+        try:
+            served = parsedate_to_datetime(response.headers.get(header))
+        except (TypeError, ValueError):
+            continue
+        if served.tzinfo is None:
+            served = served.replace(tzinfo=timezone.utc)
+        break
+    served = served or datetime.now(timezone.utc)
+    return latest_model_run(served), served
+
+
+def _kind(url):
+    """Endpoint name used for the coalescing counters."""
+    if url.startswith(METEO_URL):
+        return "meteo"
+    if url.endswith("/stations_list.json"):
+        return "hydro_list"
+    if url.startswith(HYDRO_BASE_URL):
+        return "hydro"
+    return "other"
+
+
+def coalescing_stats():
+    """Requests sent vs. requests that joined one already in flight, in total and per endpoint."""
+    return _flights.snapshot()
+
+
+def fetch_json(url, ttl, session=None, refresh=False, on_response=None):
+    """GET a JSON document, serving it from the disk cache while fresh and revalidating when stale.
+
+    refresh=True revalidates even a fresh entry (used by background refreshes).
+    on_response(response) is called only when a new body came from the
+    network, not for cache hits or 304s.
+    Callers asking for the same URL while a request for it is in flight
+    wait for that request and get the same parsed object, so the result
+    must not be modified.
+    """
+    with tracing.span("http.get", host=urlsplit(url).hostname) as span:
+        cache = get_cache()
+        key = normalize_url(url)
+        entry = cache.get(key)
+
+        if entry and entry.is_fresh() and not refresh:
+            span.set(cache="fresh", bytes=len(entry.body))
+            try:
+                return _decode_cached(cache, key, entry)
+            except requests.exceptions.JSONDecodeError as e:
+                print(f"Dropped unreadable cache entry: {e}")
+                entry = None
+
+        def request():
+            headers = entry.validators() if entry else {}
+            response = (session or get_session()).get(url, headers=headers)
+            span.set(status=response.status_code, bytes=len(response.content))
+
+            if response.status_code == 304:
+                if entry is None:
+                    raise requests.exceptions.HTTPError(f"304 Not Modified without a cached copy for url: {url}",
+                                                        response=response)
+                span.set(cache="revalidated")
+                cache.touch(key, ttl)
+                return _decode_cached(cache, key, entry)
+
+            span.set(cache="miss")
+            response.raise_for_status()
+            data = _decode(response.content)
+            cache.put(key, response.content, ttl,
+                      etag=response.headers.get("ETag"),
+                      last_modified=response.headers.get("Last-Modified"))
+            if on_response is not None:
+                on_response(response)
+            return data
+
+        data, shared = _flights.do(key, request, _kind(url))
+        if shared:
+            span.set(cache="coalesced")
+        return data
+
+
+def _coord(value):
+    return f"{float(value):.4f}"
+
+
+def meteo_url(lats, lons):
+    """Open-Meteo forecast URL for one or more coordinates (comma-separated lists)."""
+    latitude = ",".join(_coord(lat) for lat in lats)
+    longitude = ",".join(_coord(lon) for lon in lons)
+    return f"{METEO_URL}?latitude={latitude}&longitude={longitude}&{METEO_PARAMS}"
+
+
+def chunk_coordinates(coordinates, max_url_length=MAX_URL_LENGTH):
+    """Split (lat, lon) pairs into runs whose batch URL fits in max_url_length."""
+    chunk, length = [], len(meteo_url([], []))
+    for lat, lon in coordinates:
+        # Two values plus the comma separating each from the previous one
+        extra = len(_coord(lat)) + len(_coord(lon)) + (2 if chunk else 0)
+        if chunk and length + extra > max_url_length:
+            yield chunk
+            chunk, length = [], len(meteo_url([], []))
+            extra -= 2
+        chunk.append((lat, lon))
+        length += extra
+    if chunk:
+        yield chunk
+
+
+def fetch_meteo_batch(locations, session=None, max_url_length=MAX_URL_LENGTH, ttl=METEO_TTL, refresh=False):
+    """Forecasts for many locations with one request per chunk of coordinates.
+
+    Returns {location ID: forecast} in the same shape as a single-location
+    request. Every forecast is also stored in the HTTP cache under its own
+    single-location URL, so a following DataFetcher.get_meteo_data() for
+    any of these locations is served from the cache. Chunks that fail are
+    reported and left out of the result. ttl and refresh are passed on to
+    fetch_json and also apply to the per-location cache entries.
+    """
+    session = session or get_session()
+    cache = get_cache()
+
+    # Saved spots that share coordinates share one slot in the request
+    ids_by_coord = {}
+    for location in locations:
+        key = (_coord(location["Lat"]), _coord(location["Lon"]))
+        ids_by_coord.setdefault(key, []).append(location["ID"])
+
+    forecasts = {}
+    for chunk in chunk_coordinates(list(ids_by_coord), max_url_length):
+        fetched = []
+        try:
+            data = fetch_json(meteo_url(*zip(*chunk)), ttl, session, refresh,
+                              on_response=lambda response: fetched.append(response_run(response)))
+        except requests.exceptions.HTTPError as e:
+            print(f"HTTP Error: {e}")
+            continue
+        except requests.exceptions.RequestException as e:
+            print(f"Request failed: {e}")
+            continue
+
+        # A single location comes back as an object, several as a list in request order
+        results = data if isinstance(data, list) else [data]
+        if len(results) != len(chunk):
+            print(f"Expected {len(chunk)} forecasts, got {len(results)}")
+            continue
+
+        for (lat, lon), forecast in zip(chunk, results):
+            cache.put(normalize_url(meteo_url([lat], [lon])), json.dumps(forecast).encode(), ttl)
+            # Only new bodies are archived; a chunk served from the cache was archived when it was fetched
+            if fetched:
+                forecast_archive.archive_forecast(lat, lon, forecast, *fetched[0])
+            for id in ids_by_coord[(lat, lon)]:
+                forecasts[id] = forecast
+
+    return forecasts
+
+
+def hydro_url(station_id):
+    return f"{HYDRO_BASE_URL}/data/{station_id}.json"
+
+
+def get_hydro_list(session=None):
+    try:
+        return fetch_json(f"{HYDRO_BASE_URL}/stations_list.json", HYDRO_LIST_TTL, session)
     except requests.exceptions.HTTPError as e:
         print(f"HTTP Error: {e}")
     except requests.exceptions.RequestException as e:
         print(f"Request failed: {e}")
 
 
+def get_station_data(station_id, session=None):
+    try:
+        return fetch_json(hydro_url(station_id), HYDRO_DATA_TTL, session)
+    except requests.exceptions.HTTPError as e:
+        print(f"HTTP Error: {e}")
+    except requests.exceptions.RequestException as e:
+        print(f"Request failed: {e}")
+
+
+def closest_station_id(lat, lon, session=None):
+    index = station_index.get_index(lambda: get_hydro_list(session), max_age=HYDRO_LIST_TTL)
+    if index is None:
+        return None
+    return index.nearest(lat, lon)['id']
+
+
 class DataFetcher:
-    def __init__(self, id):
+    def __init__(self, id, session=None):
+        self.session = session or get_session()
         self.meteo_data = {}
         self.sun_data = {}
         self.hydro_data = {}
@@ -36,44 +274,50 @@ class DataFetcher:
         return self.sun_data
 
     def get_hydro_data(self):
-        self.request_hydro_data(self.find_closest_station_id())
+        station_id = self.find_closest_station_id()
+        if station_id is not None:
+            self.request_hydro_data(station_id)
         return self.hydro_data
 
+    @tracing.traced
     def request_meteo_data(self):
+        lat, lon = self.location["Lat"], self.location["Lon"]
+        fetched = []
         try:
-            url = f'https://api.open-meteo.com/v1/forecast?latitude={self.location["Lat"]}&longitude={self.location["Lon"]}&hourly=temperature_2m,rain,weather_code,cloud_cover,apparent_temperature,is_day&models=ecmwf_ifs025&past_days=0&forecast_days=3'
-            response = requests.get(url)
-            response.raise_for_status()
-            self.meteo_data = response.json()
+            self.meteo_data = fetch_json(meteo_url([lat], [lon]), METEO_TTL, self.session,
+                                         on_response=lambda response: fetched.append(response_run(response)))
+            if fetched:
+                forecast_archive.archive_forecast(lat, lon, self.meteo_data, *fetched[0])
         except requests.exceptions.HTTPError as e:
             print(f"HTTP Error: {e}")
+            self.meteo_data = self.archived_meteo_data()
         except requests.exceptions.RequestException as e:
             print(f"Request failed: {e}")
+            self.meteo_data = self.archived_meteo_data()
 
-    def request_sun_data(self, date):
+    def archived_meteo_data(self):
+        """Newest archived forecast for the location, so charts still open offline."""
         try:
-            url = f'https://api.sunrisesunset.io/json?lat={self.location["Lat"]}&lng={self.location["Lon"]}&date={date}'
-            response = requests.get(url)
-            response.raise_for_status()
-            self.sun_data = response.json()
-        except requests.exceptions.HTTPError as e:
-            print(f"HTTP Error: {e}")
-        except requests.exceptions.RequestException as e:
-            print(f"Request failed: {e}")
+            run = forecast_archive.get_archive().latest(self.location["Lat"], self.location["Lon"])
+        except Exception as e:
+            print(f"Error reading forecast archive: {e}")
+            return {}
+        if run is None:
+            return {}
+        print(f"Showing archived forecast from the {run.run} run")
+        return run.to_meteo_data()
+
+    @tracing.traced
+    def request_sun_data(self, date):
+        """Compute sun times locally; kept in the sunrisesunset.io response format."""
+        self.sun_data = solar.sun_data_for_day(date, self.location["Lat"], self.location["Lon"])
 
+    @tracing.traced
     def request_hydro_data(self, station_id):
-        try:
-            url = f"https://raw.githubusercontent.com/AdamCofala/polish-hydro-data/refs/heads/master/data/{station_id}.json"
-            response = requests.get(url)
-            response.raise_for_status()
-            self.hydro_data = response.json()
-        except requests.exceptions.HTTPError as e:
-            print(f"HTTP Error: {e}")
-        except requests.exceptions.RequestException as e:
-            print(f"Request failed: {e}")
+        self.hydro_data = get_station_data(station_id, self.session) or {}
 
+    @tracing.traced
     def find_closest_station_id(self):
-        stations_list = get_hydro_list()
-        return hv.find_closest_hydrostation(self.location["Lat"],self.location["Lon"], stations_list)['id']
+        return closest_station_id(self.location["Lat"], self.location["Lon"], self.session)
 
 
@@ -0,0 +1,333 @@
+"""Append-only, memory-mapped archive of every forecast run fetched.
+
+Each location gets a directory named after its rounded coordinates (so it
+survives ID renumbering) holding segments. A segment is a pair of .npy files:
+
+    <name>.values.npy  float32 (len(FIELDS), hours): one row per field with
+                       the hourly values of all the segment's runs back to back
+    <name>.runs.npy    RUN_DTYPE records: model run, fetch time, first valid
+                       hour and the offset/length of each run in the values
+
+Every new run is appended as its own segment, values first and index last,
+each through a temp file and a rename, so a half-written segment is never
+picked up. compact() merges a location's segments into one and drops runs
+older than the retention period; it also runs automatically once a location
+has COMPACT_AFTER segments. Reads memory-map the segments and never parse
+JSON. Times are UTC.
+
+Compact and prune every location by hand with:
+    python -m logic.stats.forecast_archive
+"""
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+import numpy as np
+
+ARCHIVE_DIR = "assets/forecast_archive"
+FIELDS = ("temperature_2m", "apparent_temperature", "rain", "cloud_cover", "is_day")
+RETENTION = timedelta(days=30)
+COMPACT_AFTER = 32
+
+# Set to 0 to stop archiving fetched forecasts
+ENABLED = os.environ.get("PHOTO_APP_FORECAST_ARCHIVE", "1") != "0"
+
+RUN_DTYPE = np.dtype([("run", "M8[s]"), ("fetched", "M8[s]"), ("start", "M8[s]"), ("offset", "i8"), ("hours", "i4")])
+HOUR = np.timedelta64(3600, "s")
+
+_RUNS_SUFFIX = ".runs.npy"
+_VALUES_SUFFIX = ".values.npy"
+
+
+def _datetime64(value):
+    """Aware or naive-UTC datetime (or datetime64) as datetime64[s]."""
+    if isinstance(value, datetime) and value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return np.datetime64(value, "s")
+
+
+def location_key(lat, lon):
+    return f"{float(lat):.4f}_{float(lon):.4f}"
+
+
+def _save_npy(path, array):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        np.save(f, array)
+    os.replace(tmp_path, path)
+
+
+def decode_forecast(forecast):
+    """(start, values) of an Open-Meteo response: first valid hour in UTC and a float32 (fields, hours) array.
+
+    Returns None when the hourly times are missing or not one hour apart.
+    """
+    hourly = (forecast or {}).get("hourly") or {}
+    times = hourly.get("time") or []
+    if not times:
+        return None
+
+    stamps = np.array(times, dtype="M8[s]") - np.timedelta64(int(forecast.get("utc_offset_seconds") or 0), "s")
+    if len(stamps) > 1 and not np.all(np.diff(stamps) == HOUR):
+        return None
+
+    values = np.full((len(FIELDS), len(stamps)), np.nan, dtype=np.float32)
+    for row, field in enumerate(FIELDS):
+        column = hourly.get(field) or []
+        if len(column) == len(stamps):
+            values[row] = [np.nan if v is None else v for v in column]
+    return stamps[0], values
+
+
+class ArchivedRun:
+    """One archived forecast run; values are read-only views into the memory-mapped segment."""
+
+    def __init__(self, run, fetched, start, values):
+        self.run = run
+        self.fetched = fetched
+        self.start = start
+        self.values = values
+
+    def __len__(self):
+        return self.values.shape[1]
+
+    @property
+    def times(self):
+        return self.start + np.arange(len(self)) * HOUR
+
+    def field(self, name):
+        return self.values[FIELDS.index(name)]
+
+    def between(self, start, end):
+        """(times, values) of the hours in [start, end), found by arithmetic on the hourly grid."""
+        first = int(np.clip(np.ceil((_datetime64(start) - self.start) / HOUR), 0, len(self)))
+        stop = int(np.clip(np.ceil((_datetime64(end) - self.start) / HOUR), first, len(self)))
+        return self.start + np.arange(first, stop) * HOUR, self.values[:, first:stop]
+
+    def to_meteo_data(self):
+        """The run in the Open-Meteo response shape (GMT), e.g. to chart it offline."""
+        hourly = {"time": [str(t)[:16] for t in self.times]}
+        for row, field in enumerate(FIELDS):
+            column = self.values[row].astype(float)
+            hourly[field] = [None if np.isnan(v) else v for v in column.tolist()]
+        return {"utc_offset_seconds": 0, "timezone": "GMT", "hourly": hourly}
+
+
+class _Location:
+    """Merged view over the segments of one location, newest fetch per run."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.names = []
+        self.values = []
+        runs = []
+        for name in self._segment_names(directory):
+            try:
+                segment_runs = np.load(os.path.join(directory, name + _RUNS_SUFFIX), mmap_mode="r")
+                segment_values = np.load(os.path.join(directory, name + _VALUES_SUFFIX), mmap_mode="r")
+            except (OSError, ValueError) as e:
+                print(f"Skipping unreadable archive segment {name}: {e}")
+                continue
+            self.names.append(name)
+            self.values.append(segment_values)
+            runs.append((segment_runs, len(self.values) - 1))
+
+        self.runs = np.empty(0, dtype=RUN_DTYPE)
+        self.segment = np.empty(0, dtype=np.int32)
+        if runs:
+            self.runs = np.concatenate([np.asarray(r) for r, _ in runs])
+            self.segment = np.concatenate([np.full(len(r), i, dtype=np.int32) for r, i in runs])
+
+            # Sorted by run, then fetch time; a run fetched twice keeps its last copy
+            order = np.lexsort((self.runs["fetched"], self.runs["run"]))
+            keep = np.append(self.runs["run"][order][1:] != self.runs["run"][order][:-1], True)
+            self.runs, self.segment = self.runs[order][keep], self.segment[order][keep]
+
+    @staticmethod
+    def _segment_names(directory):
+        try:
+            files = os.listdir(directory)
+        except OSError:
+            return []
+        # A segment counts once its index (written last) is there
+        return sorted(f[:-len(_RUNS_SUFFIX)] for f in files
+                      if f.endswith(_RUNS_SUFFIX) and f[:-len(_RUNS_SUFFIX)] + _VALUES_SUFFIX in files)
+
+    def run(self, i):
+        record = self.runs[i]
+        offset, hours = int(record["offset"]), int(record["hours"])
+        values = self.values[self.segment[i]][:, offset:offset + hours]
+        return ArchivedRun(record["run"], record["fetched"], record["start"], values)
+
+    def select(self, since=None, until=None):
+        """Indices of the runs issued in [since, until)."""
+        first = 0 if since is None else np.searchsorted(self.runs["run"], _datetime64(since), "left")
+        stop = len(self.runs) if until is None else np.searchsorted(self.runs["run"], _datetime64(until), "left")
+        return range(first, stop)
+
+
+class ForecastArchive:
+    """Forecast runs per location under directory; see the module docstring for the layout."""
+
+    def __init__(self, directory=ARCHIVE_DIR, retention=RETENTION, compact_after=COMPACT_AFTER):
+        self.directory = directory
+        self.retention = retention
+        self.compact_after = compact_after
+        self._lock = threading.RLock()
+        self._locations = {}
+
+    def _path(self, lat, lon):
+        return os.path.join(self.directory, location_key(lat, lon))
+
+    def _location(self, path):
+        with self._lock:
+            if path not in self._locations:
+                self._locations[path] = _Location(path)
+            return self._locations[path]
+
+    def _write_segment(self, path, name, runs, values):
+        os.makedirs(path, exist_ok=True)
+        _save_npy(os.path.join(path, name + _VALUES_SUFFIX), values)
+        # The index is written last and marks the segment complete
+        _save_npy(os.path.join(path, name + _RUNS_SUFFIX), runs)
+
+    def append(self, lat, lon, forecast, run, fetched=None):
+        """Archive one forecast run for a location. Returns False if it is already stored or unusable.
+
+        A run stored again with different values is kept as a newer copy; reads use the latest one.
+        """
+        run = _datetime64(run)
+        path = self._path(lat, lon)
+
+        with self._lock:
+            decoded = decode_forecast(forecast)
+            if decoded is None:
+                print(f"Not archiving forecast for {location_key(lat, lon)}: no hourly time axis")
+                return False
+            start, values = decoded
+
+            # Same run already stored: only a changed forecast (the run was guessed early) replaces it
+            location = self._location(path)
+            stored = np.flatnonzero(location.runs["run"] == run)
+            if len(stored):
+                previous = location.run(stored[0])
+                if previous.start == start and np.array_equal(previous.values, values, equal_nan=True):
+                    return False
+
+            record = np.array([(run, _datetime64(fetched or datetime.now(timezone.utc)), start, 0, values.shape[1])],
+                              dtype=RUN_DTYPE)
+            name = f"{str(run).replace(':', '')}-{time.time_ns():x}"
+            self._write_segment(path, name, record, values)
+            self._locations.pop(path, None)
+
+            if len(self._location(path).names) >= self.compact_after:
+                self.compact(lat, lon)
+        return True
+
+    def runs(self, lat, lon, since=None, until=None):
+        """Archived runs issued in [since, until), oldest first."""
+        location = self._location(self._path(lat, lon))
+        return [location.run(i) for i in location.select(since, until)]
+
+    def latest(self, lat, lon):
+        location = self._location(self._path(lat, lon))
+        return location.run(len(location.runs) - 1) if len(location.runs) else None
+
+    def aligned(self, lat, lon, field, start, end, since=None, until=None):
+        """One field of every run on a common valid-time axis, e.g. to study forecast drift.
+
+        Returns (run times, valid times, float32 (runs, hours) matrix) for the
+        hours in [start, end); hours a run does not cover are NaN.
+        """
+        start, end = _datetime64(start), _datetime64(end)
+        valid = start + np.arange(max(0, int(np.ceil((end - start) / HOUR)))) * HOUR
+        row = FIELDS.index(field)
+
+        runs = self.runs(lat, lon, since, until)
+        matrix = np.full((len(runs), len(valid)), np.nan, dtype=np.float32)
+        for i, run in enumerate(runs):
+            times, values = run.between(start, end)
+            if len(times):
+                first = int((times[0] - start) // HOUR)
+                matrix[i, first:first + len(times)] = values[row]
+        return np.array([run.run for run in runs], dtype="M8[s]"), valid, matrix
+
+    def compact(self, lat=None, lon=None, now=None, path=None):
+        """Merge a location's segments into one, dropping runs past the retention period.
+
+        Returns (runs kept, runs dropped).
+        """
+        path = path or self._path(lat, lon)
+        now = _datetime64(now or datetime.now(timezone.utc))
+
+        with self._lock:
+            location = self._location(path)
+            old_names = list(location.names)
+            keep = location.runs["run"] >= now - np.timedelta64(int(self.retention.total_seconds()), "s")
+            kept = [location.run(i) for i in np.flatnonzero(keep)]
+
+            if kept:
+                records = np.zeros(len(kept), dtype=RUN_DTYPE)
+                offsets = np.cumsum([0] + [len(run) for run in kept])
+                for i, run in enumerate(kept):
+                    records[i] = (run.run, run.fetched, run.start, offsets[i], len(run))
+                values = np.concatenate([run.values for run in kept], axis=1).astype(np.float32)
+                self._write_segment(path, f"{str(kept[0].run).replace(':', '')}-{time.time_ns():x}", records, values)
+
+            # Drop the cached maps before deleting what they point to
+            del location, kept
+            self._locations.pop(path, None)
+            for name in old_names:
+                for suffix in (_RUNS_SUFFIX, _VALUES_SUFFIX):
+                    try:
+                        os.unlink(os.path.join(path, name + suffix))
+                    except OSError as e:
+                        # Still mapped somewhere (Windows); reads skip duplicate runs, the next compaction retries
+                        print(f"Could not remove archive segment {name}: {e}")
+
+            merged = self._location(path)
+            if not len(merged.runs) and not merged.names:
+                try:
+                    os.rmdir(path)
+                except OSError:
+                    pass
+            return len(merged.runs), int(np.count_nonzero(~keep))
+
+    def compact_all(self, now=None):
+        """Compact every location. Returns {location key: (runs kept, runs dropped)}."""
+        try:
+            keys = sorted(os.listdir(self.directory))
+        except OSError:
+            return {}
+        return {key: self.compact(now=now, path=os.path.join(self.directory, key)) for key in keys
+                if os.path.isdir(os.path.join(self.directory, key))}
+
+
+_archive = None
+_archive_lock = threading.Lock()
+
+
+def get_archive():
+    """Process-wide archive, created on first use."""
+    global _archive
+    with _archive_lock:
+        if _archive is None:
+            _archive = ForecastArchive()
+        return _archive
+
+
+def archive_forecast(lat, lon, forecast, run, fetched=None):
+    """Best-effort append used by the fetchers; never raises."""
+    if not ENABLED or not forecast:
+        return
+    try:
+        get_archive().append(lat, lon, forecast, run, fetched)
+    except Exception as e:
+        print(f"Error archiving forecast: {e}")
+
+
+if __name__ == "__main__":
+    results = get_archive().compact_all()
+    for key, (kept, dropped) in results.items():
+        print(f"{key}: {kept} runs kept, {dropped} dropped")
+    print(f"Compacted {len(results)} locations in {ARCHIVE_DIR}")
@@ -0,0 +1,172 @@
+import sqlite3
+import threading
+import time
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+CACHE_PATH = "assets/http_cache.sqlite"
+MAX_CACHE_BYTES = 64 * 1024 * 1024
+
+
+def normalize_url(url):
+    """Return a canonical form of the URL used as the cache key."""
+    parts = urlsplit(url.strip())
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)), safe=",")
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path or "/", query, ""))
+
+
+class CacheEntry:
+    def __init__(self, body, etag, last_modified, stored_at, expires_at):
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+        self.stored_at = stored_at
+        self.expires_at = expires_at
+
+    def is_fresh(self, now=None):
+        return (now or time.time()) < self.expires_at
+
+    def validators(self):
+        """Headers for a conditional request revalidating this entry."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class HttpCache:
+    """Disk-backed HTTP response cache with per-entry TTL and LRU eviction."""
+
+    def __init__(self, path=CACHE_PATH, max_bytes=MAX_CACHE_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # url -> last read time, written out with the next write instead of on every read
+        self._accessed = {}
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                url TEXT PRIMARY KEY,
+                body BLOB NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                stored_at REAL NOT NULL,
+                expires_at REAL NOT NULL,
+                last_access REAL NOT NULL,
+                size INTEGER NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_lru ON responses(last_access)")
+        self._conn.commit()
+
+    def get(self, url):
+        """Return the CacheEntry stored for url (fresh or stale) or None."""
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT body, etag, last_modified, stored_at, expires_at FROM responses WHERE url = ?",
+                    (url,)
+                ).fetchone()
+                if row is None:
+                    return None
+                self._accessed[url] = time.time()
+            return CacheEntry(*row)
+        except sqlite3.Error as e:
+            print(f"Cache read failed: {e}")
+            return None
+
+    def put(self, url, body, ttl, etag=None, last_modified=None):
+        """Store a response body and evict least recently used entries over the size cap."""
+        now = time.time()
+        try:
+            with self._lock:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (url, body, etag, last_modified, now, now + ttl, now, len(body))
+                )
+                self._accessed.pop(url, None)
+                self._flush_access()
+                self._evict()
+                self._conn.commit()
+        except sqlite3.Error as e:
+            print(f"Cache write failed: {e}")
+
+    def touch(self, url, ttl):
+        """Extend the lifetime of an entry after a successful revalidation (304)."""
+        now = time.time()
+        try:
+            with self._lock:
+                self._conn.execute(
+                    "UPDATE responses SET expires_at = ?, last_access = ? WHERE url = ?",
+                    (now + ttl, now, url)
+                )
+                self._accessed.pop(url, None)
+                self._flush_access()
+                self._conn.commit()
+        except sqlite3.Error as e:
+            print(f"Cache write failed: {e}")
+
+    def delete(self, url):
+        """Drop an entry, e.g. one whose body turned out to be unreadable."""
+        try:
+            with self._lock:
+                self._accessed.pop(url, None)
+                self._conn.execute("DELETE FROM responses WHERE url = ?", (url,))
+                self._conn.commit()
+        except sqlite3.Error as e:
+            print(f"Cache write failed: {e}")
+
+    def clear(self):
+        with self._lock:
+            self._accessed.clear()
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+    def total_size(self):
+        with self._lock:
+            return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def _flush_access(self):
+        """Write the read times collected by get() (caller holds the lock and commits)."""
+        if self._accessed:
+            self._conn.executemany("UPDATE responses SET last_access = ? WHERE url = ?",
+                                   [(at, url) for url, at in self._accessed.items()])
+            self._accessed.clear()
+
+    def _evict(self):
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        rows = self._conn.execute("SELECT url, size FROM responses ORDER BY last_access").fetchall()
+        victims = []
+        for url, size in rows:
+            if total <= self.max_bytes:
+                break
+            victims.append((url,))
+            total -= size
+        self._conn.executemany("DELETE FROM responses WHERE url = ?", victims)
+
+    def close(self):
+        with self._lock:
+            try:
+                self._flush_access()
+                self._conn.commit()
+            except sqlite3.Error as e:
+                print(f"Cache write failed: {e}")
+            self._conn.close()
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """Process-wide cache instance, opened on first use."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = HttpCache()
+        return _cache
@@ -0,0 +1,105 @@
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+# Number of per-host pools kept and keep-alive connections per host
+POOL_CONNECTIONS = 8
+POOL_MAXSIZE = 8
+
+
+class ConnectionStats:
+    """Counts requests sent and TCP/TLS connections opened by a pooled session."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.new_connections = 0
+
+    def record_request(self):
+        with self._lock:
+            self.requests += 1
+
+    def record_new_connection(self):
+        with self._lock:
+            self.new_connections += 1
+
+    @property
+    def reused_connections(self):
+        return max(0, self.requests - self.new_connections)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "new_connections": self.new_connections,
+                "reused_connections": max(0, self.requests - self.new_connections),
+            }
+
+    def reset(self):
+        with self._lock:
+            self.requests = 0
+            self.new_connections = 0
+
+
+def _counting_pool(base, stats):
+    class CountingPool(base):
+        def _new_conn(self):
+            stats.record_new_connection()
+            return super()._new_conn()
+
+    return CountingPool
+
+
+class PooledAdapter(HTTPAdapter):
+    """HTTPAdapter keeping per-host keep-alive pools and reporting connection reuse."""
+
+    def __init__(self, stats, pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE):
+        self.stats = stats
+        super().__init__(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _counting_pool(HTTPConnectionPool, self.stats),
+            "https": _counting_pool(HTTPSConnectionPool, self.stats),
+        }
+
+    def send(self, request, **kwargs):
+        self.stats.record_request()
+        return super().send(request, **kwargs)
+
+
+def create_session(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE, stats=None):
+    """Build a requests.Session with pooled keep-alive connections and gzip negotiation."""
+    session = requests.Session()
+    adapter = PooledAdapter(stats or ConnectionStats(), pool_connections, pool_maxsize)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({"Accept-Encoding": "gzip, deflate"})
+    return session
+
+
+_session = None
+_stats = ConnectionStats()
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """Process-wide pooled session shared by every DataFetcher."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = create_session(stats=_stats)
+        return _session
+
+
+def set_session(session):
+    """Replace the shared session, e.g. with a local stand-in."""
+    global _session
+    with _session_lock:
+        _session = session
+
+
+def connection_stats():
+    return _stats.snapshot()
@@ -0,0 +1,218 @@
+"""Columnar decoding of hydro station histories.
+
+A station history is a JSON list of {"data": {"stan_wody_data_pomiaru":
+"YYYY-MM-DD HH:MM:SS", "stan_wody": "123", "stacja": ...}} entries.
+decode() turns it into NumPy columns in bulk: timestamps are checked and
+converted with array arithmetic instead of strptime, levels with
+vectorized digit checks instead of int() (with int() itself as the
+fallback for the odd value the digit check leaves out). Malformed rows are
+flagged in a mask instead of raising. daily() computes the per-day aggregates the
+chart needs in one sorted groupby pass.
+"""
+import numpy as np
+
+TIME_KEY = "stan_wody_data_pomiaru"
+LEVEL_KEY = "stan_wody"
+STATION_KEY = "stacja"
+
+# Layout of "YYYY-MM-DD HH:MM:SS"
+_TIME_LEN = 19
+_SEPARATORS = {4: "-", 7: "-", 10: " ", 13: ":", 16: ":"}
+_DIGITS = [i for i in range(_TIME_LEN) if i not in _SEPARATORS]
+# Longest level accepted, in digits (keeps values inside int32)
+_LEVEL_LEN = 9
+_INT32_MIN, _INT32_MAX = np.iinfo(np.int32).min, np.iinfo(np.int32).max
+_MONTH_NAMES = np.array(["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"])
+
+
+class HydroColumns:
+    """Station history as parallel arrays.
+
+    times is datetime64[s] (NaT for bad rows), levels is int32 (0 for bad
+    rows) and valid marks the rows where both parsed.
+    """
+
+    def __init__(self, times, levels, valid, station=None):
+        self.times = times
+        self.levels = levels
+        self.valid = valid
+        self.station = station
+
+    def __len__(self):
+        return len(self.times)
+
+    @property
+    def skipped(self):
+        return int(np.count_nonzero(~self.valid))
+
+    def clean(self):
+        """Valid rows only, in time order."""
+        times, levels = self.times[self.valid], self.levels[self.valid]
+        order = np.argsort(times, kind="stable")
+        return HydroColumns(times[order], levels[order], np.ones(len(order), dtype=bool), self.station)
+
+    def daily(self):
+        return daily(self.times[self.valid], self.levels[self.valid])
+
+
+class DailyStats:
+    """Per-day aggregates, one row per calendar day with valid measurements.
+
+    days is datetime64[D]; midday is the measurement closest to 12:00
+    that day; minimum/maximum/first/last are levels; delta is the change
+    from the first to the last measurement of the day.
+    """
+
+    def __init__(self, days, midday, minimum, maximum, first, last, count):
+        self.days = days
+        self.midday = midday
+        self.minimum = minimum
+        self.maximum = maximum
+        self.first = first
+        self.last = last
+        self.count = count
+
+    @property
+    def delta(self):
+        return self.last - self.first
+
+    def labels(self):
+        """Day labels in the "%d %b" format used on the chart axis."""
+        months = self.days.astype("datetime64[M]")
+        day_of_month = (self.days - months.astype("datetime64[D]")).astype(int) + 1
+        month_names = _MONTH_NAMES[months.astype(int) % 12]
+        return np.char.add(np.char.add(np.char.zfill(day_of_month.astype(str), 2), " "), month_names)
+
+
+def _codepoints(strings, width):
+    """Strings as an (n, width) array of code points, zero-padded on the right."""
+    raw = np.array(strings, dtype=f"U{width}")
+    return raw.view(np.uint32).reshape(len(raw), width)
+
+
+def _digits(chars):
+    """Digit values of code points; anything that is not 0-9 wraps around to a value above 9."""
+    return chars - np.uint32(ord("0"))
+
+
+def _field(digits, start, stop):
+    """Integer value of the digit columns [start, stop) of every row."""
+    value = np.zeros(len(digits), dtype=np.int64)
+    for i in range(start, stop):
+        value = value * 10 + digits[:, i]
+    return value
+
+
+def parse_times(values):
+    """Parse "YYYY-MM-DD HH:MM:SS" strings; returns (datetime64[s] array, valid mask)."""
+    # One spare column: anything longer than the format leaves it non-zero
+    chars = _codepoints([v if isinstance(v, str) else "" for v in values], _TIME_LEN + 1)
+    digits = _digits(chars[:, :_TIME_LEN])
+
+    well_formed = digits <= 9
+    for i, sep in _SEPARATORS.items():
+        well_formed[:, i] = chars[:, i] == ord(sep)
+    valid = well_formed.all(axis=1) & (chars[:, _TIME_LEN] == 0)
+
+    year, month, day = _field(digits, 0, 4), _field(digits, 5, 7), _field(digits, 8, 10)
+    hour, minute, second = _field(digits, 11, 13), _field(digits, 14, 16), _field(digits, 17, 19)
+    valid &= (month >= 1) & (month <= 12) & (day >= 1) & (hour < 24) & (minute < 60) & (second < 60)
+
+    # Build the date from month + day offset; days past the month end roll over and are rejected
+    months = np.where(valid, (year - 1970) * 12 + month - 1, 0).astype("datetime64[M]")
+    dates = months.astype("datetime64[D]") + np.where(valid, day - 1, 0)
+    valid &= dates.astype("datetime64[M]") == months
+
+    times = dates.astype("datetime64[s]") + np.where(valid, hour * 3600 + minute * 60 + second, 0).astype("timedelta64[s]")
+    times[~valid] = np.datetime64("NaT")
+    return times, valid
+
+
+def _level_slow(value):
+    """int(value) for the rare levels the vectorized parser leaves out (12.0, "1_000"); None where it fails.
+
+    Booleans and fractional floats, which int() would silently accept or truncate, are rejected too.
+    """
+    if isinstance(value, bool) or (isinstance(value, float) and not value.is_integer()):
+        return None
+    try:
+        level = int(value)
+    except (TypeError, ValueError, OverflowError):
+        return None
+    return level if _INT32_MIN <= level <= _INT32_MAX else None
+
+
+def parse_levels(values):
+    """Parse levels the way int(x) would; returns (int32 array, valid mask).
+
+    Signed digit strings and ints take the vectorized path. Whatever else
+    int() accepts (integral floats, underscores) falls back to it per value,
+    so "12.0", "1.5" and "1e2" stay invalid, as do booleans and 1.5.
+    """
+    # Sign, digits and one spare column that stays zero unless the value is too long
+    texts = ["" if v is None else str(v).strip() for v in values]
+    chars = _codepoints(texts, _LEVEL_LEN + 2)
+    digits = _digits(chars)
+
+    negative = chars[:, 0] == ord("-")
+    signed = negative | (chars[:, 0] == ord("+"))
+    is_digit = digits <= 9
+    length = np.count_nonzero(chars, axis=1)
+    digit_count = np.count_nonzero(is_digit, axis=1)
+
+    # Every character is a digit, apart from an optional leading sign
+    valid = (digit_count == length - signed) & (digit_count >= 1) & (digit_count <= _LEVEL_LEN)
+    valid &= chars[:, -1] == 0
+
+    # Digits are left-aligned after the optional sign, so accumulate column by column
+    value = np.zeros(len(chars), dtype=np.int64)
+    for i in range(chars.shape[1]):
+        value = np.where(is_digit[:, i], value * 10 + digits[:, i], value)
+
+    levels = np.where(valid, np.where(negative, -value, value), 0).astype(np.int32)
+
+    for row in np.flatnonzero(~valid & (length > 0)):
+        level = _level_slow(values[row])
+        if level is not None:
+            levels[row], valid[row] = level, True
+    return levels, valid
+
+
+def decode(entries):
+    """Decode a station history into HydroColumns; entries without a data dict become invalid rows."""
+    records = [entry.get("data") if isinstance(entry, dict) else None for entry in entries or []]
+    records = [record if isinstance(record, dict) else {} for record in records]
+
+    times, times_valid = parse_times([record.get(TIME_KEY) for record in records])
+    levels, levels_valid = parse_levels([record.get(LEVEL_KEY) for record in records])
+    station = records[0].get(STATION_KEY) if records else None
+    return HydroColumns(times, levels, times_valid & levels_valid, station)
+
+
+def daily(times, levels):
+    """Per-day aggregates of the measurements in one sorted groupby pass."""
+    order = np.argsort(times, kind="stable")
+    times, levels = times[order], levels[order]
+    if not len(times):
+        empty = np.empty(0, dtype=levels.dtype)
+        return DailyStats(np.empty(0, "datetime64[D]"), np.empty(0, "datetime64[s]"), empty, empty, empty, empty,
+                          np.empty(0, dtype=np.intp))
+
+    days = times.astype("datetime64[D]")
+    starts = np.flatnonzero(np.concatenate(([True], days[1:] != days[:-1])))
+    ends = np.concatenate((starts[1:], [len(times)])) - 1
+
+    # Within each day, the first row by distance from noon (ties go to the earlier time)
+    distance = np.abs(times - (days + np.timedelta64(12, "h"))).astype(np.int64)
+    group = np.repeat(np.arange(len(starts)), np.diff(np.concatenate((starts, [len(times)]))))
+    nearest = np.lexsort((distance, group))[starts]
+
+    return DailyStats(
+        days[starts],
+        times[nearest],
+        np.minimum.reduceat(levels, starts),
+        np.maximum.reduceat(levels, starts),
+        levels[starts],
+        levels[ends],
+        ends - starts + 1,
+    )
@@ -0,0 +1,85 @@
+"""Level of detail for chart lines.
+
+The number of points drawn follows the width of the axes in pixels and
+the visible x-range, not the length of the data. Short series are
+spline-smoothed to about POINTS_PER_PIXEL samples per pixel; series with
+more raw points in view than that are decimated with
+largest-triangle-three-buckets (LTTB), which keeps peaks and troughs that
+plain striding would drop.
+"""
+import numpy as np
+import logic.stats.smoothing as smoothing
+
+POINTS_PER_PIXEL = 1.0
+MIN_POINTS = 16
+
+
+def point_budget(pixel_width):
+    return max(int(pixel_width * POINTS_PER_PIXEL), MIN_POINTS)
+
+
+def visible_range(x, lo, hi):
+    """Index range of the points inside [lo, hi], plus one neighbour on each side."""
+    start = max(np.searchsorted(x, lo, side="left") - 1, 0)
+    stop = min(np.searchsorted(x, hi, side="right") + 1, len(x))
+    return start, stop
+
+
+def lttb(x, y, threshold):
+    """Indices of the threshold points LTTB keeps, always including both ends."""
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    # threshold - 2 buckets over the inner points
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.intp)
+    indices = np.empty(threshold, dtype=np.intp)
+    indices[0], indices[-1] = 0, n - 1
+
+    a = 0
+    for i in range(threshold - 2):
+        start, stop = edges[i], edges[i + 1]
+
+        # Average of the next bucket (the last point for the final bucket)
+        if i + 2 < len(edges):
+            next_x = x[stop:edges[i + 2]].mean()
+            next_y = y[stop:edges[i + 2]].mean()
+        else:
+            next_x, next_y = x[-1], y[-1]
+
+        # Point forming the largest triangle with the previously kept point
+        area = np.abs((x[a] - next_x) * (y[start:stop] - y[a]) - (x[a] - x[start:stop]) * (next_y - y[a]))
+        a = start + int(np.argmax(area))
+        indices[i + 1] = a
+
+    return indices
+
+
+def decimate(x, ys, threshold):
+    """LTTB over several series sharing x; keeps the union of every series' points."""
+    if len(ys) == 1:
+        indices = lttb(x, ys[0], threshold)
+    else:
+        indices = np.unique(np.concatenate([lttb(x, y, threshold) for y in ys]))
+    return x[indices], ys[:, indices]
+
+
+def level_of_detail(x, ys, x_range, pixel_width):
+    """Points to draw for series sharing the sorted x values.
+
+    Returns (x, ys) sized for pixel_width pixels showing x_range=(lo, hi):
+    smoothed when the visible data is sparse, LTTB-decimated raw points
+    when there are more points in view than the budget.
+    """
+    x = np.asarray(x, dtype=float)
+    ys = np.atleast_2d(np.asarray(ys, dtype=float))
+    lo, hi = sorted(x_range)
+    budget = point_budget(pixel_width)
+
+    start, stop = visible_range(x, lo, hi)
+    if stop - start > budget:
+        return decimate(x[start:stop], ys[:, start:stop], budget)
+
+    # Spread the budget over the visible range only, never coarser than the raw data
+    samples = max(min((stop - start) * smoothing.SAMPLES_PER_POINT, budget), stop - start, 2)
+    return smoothing.smooth_series(x, ys, samples, (lo, hi))
@@ -0,0 +1,74 @@
+import threading
+from collections import Counter
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Runs at most one call per key at a time; callers arriving meanwhile wait and share its outcome.
+
+    Every caller gets the same result object (or the same exception), so
+    results must be treated as read-only. Counts calls made and calls
+    coalesced, in total and per kind.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.executed = Counter()
+        self.coalesced = Counter()
+
+    def do(self, key, fn, kind="other"):
+        """fn() for the first caller of key; later concurrent callers block until it finishes.
+
+        Returns (result, shared), shared being True for callers that did not run fn.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.executed[kind] += 1
+            else:
+                self.coalesced[kind] += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+            return call.result, False
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._calls)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "executed": sum(self.executed.values()),
+                "coalesced": sum(self.coalesced.values()),
+                "in_flight": len(self._calls),
+                "by_kind": {kind: {"executed": self.executed[kind], "coalesced": self.coalesced[kind]}
+                            for kind in sorted(set(self.executed) | set(self.coalesced))},
+            }
+
+    def reset(self):
+        with self._lock:
+            self.executed.clear()
+            self.coalesced.clear()
@@ -0,0 +1,112 @@
+"""Spline smoothing for chart series.
+
+All series that share an x axis are fitted together as one 2-D array with
+a single spline along the last axis. Everything stays in matplotlib float
+date numbers. Fitted splines and sampled results are memoized by a hash
+of the input, so redrawing a location that was already shown, or
+resampling it for another width or x-range, skips the fit entirely.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+import numpy as np
+from scipy.interpolate import make_interp_spline
+
+# Dense samples per raw point
+SAMPLES_PER_POINT = 6
+CACHE_SIZE = 64
+
+_splines = OrderedDict()
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def spline_degree(count):
+    """Cubic when there are enough points, falling back to quadratic and linear."""
+    if count >= 4:
+        return 3
+    if count == 3:
+        return 2
+    return 1
+
+
+def _data_key(x, ys):
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(str((x.shape, ys.shape)).encode())
+    digest.update(x.tobytes())
+    digest.update(ys.tobytes())
+    return digest.digest()
+
+
+def _lru_get(cache, key):
+    with _cache_lock:
+        if key in cache:
+            cache.move_to_end(key)
+            return cache[key]
+    return None
+
+
+def _lru_put(cache, key, value):
+    with _cache_lock:
+        cache[key] = value
+        while len(cache) > CACHE_SIZE:
+            cache.popitem(last=False)
+
+
+def _fit(x, ys):
+    # Splines need strictly increasing x; keep the first of any repeated timestamp
+    order = np.argsort(x, kind="stable")
+    x, ys = x[order], ys[:, order]
+    x, first = np.unique(x, return_index=True)
+    ys = ys[:, first]
+
+    if len(x) < 2:
+        return lambda dense_x: np.repeat(ys, len(dense_x), axis=1)
+    return make_interp_spline(x, ys, k=spline_degree(len(x)), axis=1)
+
+
+def smooth_series(x, ys, samples=None, x_range=None):
+    """Interpolate one or more series sharing the x values.
+
+    x is a 1-D array of date numbers, ys a sequence of series (or a 2-D
+    array with one series per row). Returns (dense_x, dense_ys) with
+    dense_ys shaped (len(ys), samples); samples defaults to
+    SAMPLES_PER_POINT times the number of points. x_range=(lo, hi)
+    samples only that part of the data range. The returned arrays are
+    shared with the cache and read-only.
+    """
+    x = np.ascontiguousarray(x, dtype=float)
+    ys = np.ascontiguousarray(np.atleast_2d(np.asarray(ys, dtype=float)))
+    if samples is None:
+        samples = len(x) * SAMPLES_PER_POINT
+
+    lo, hi = x.min(), x.max()
+    if x_range is not None:
+        lo, hi = max(lo, x_range[0]), min(hi, x_range[1])
+        if lo > hi:
+            lo = hi = min(max(x_range[0], x.min()), x.max())
+
+    data_key = _data_key(x, ys)
+    key = (data_key, samples, float(lo), float(hi))
+    result = _lru_get(_cache, key)
+    if result is not None:
+        return result
+
+    spline = _lru_get(_splines, data_key)
+    if spline is None:
+        spline = _fit(x, ys)
+        _lru_put(_splines, data_key, spline)
+
+    dense_x = np.linspace(lo, hi, samples)
+    dense_ys = spline(dense_x)
+    dense_x.setflags(write=False)
+    dense_ys.setflags(write=False)
+
+    _lru_put(_cache, key, (dense_x, dense_ys))
+    return dense_x, dense_ys
+
+
+def clear_cache():
+    with _cache_lock:
+        _splines.clear()
+        _cache.clear()
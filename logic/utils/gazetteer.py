@@ -0,0 +1,210 @@
+"""Compact memory-mapped reverse-geocoding index built from polish_cities.json.
+
+Only "city" records are kept. Their coordinates live in one contiguous
+array sorted by grid cell, names in a single UTF-8 string table, and a
+CSR-style offsets array maps every grid cell to its slice of points.
+
+Rebuild the index by hand with:
+    python -m logic.utils.gazetteer
+It is also rebuilt automatically when the JSON source changes.
+"""
+import hashlib
+import json
+import os
+import threading
+from collections import namedtuple
+import numpy as np
+import logic.utils.haversine as hv
+
+CITIES_PATH = "assets/polish_cities.json"
+INDEX_DIR = "assets/gazetteer"
+CELL_DEG = 0.1
+KM_PER_DEG = 111.19
+
+Place = namedtuple("Place", ["name", "lat", "lon", "distance"])
+
+
+def _source_stamp(source):
+    stat = os.stat(source)
+    return {"source_mtime_ns": stat.st_mtime_ns, "source_size": stat.st_size}
+
+
+def _sha1(path):
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _save_npy(directory, name, array):
+    tmp_path = os.path.join(directory, name + ".tmp")
+    with open(tmp_path, "wb") as f:
+        np.save(f, array)
+    os.replace(tmp_path, os.path.join(directory, name))
+
+
+def _write_meta(directory, meta):
+    tmp_path = os.path.join(directory, "meta.json.tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(meta, f, indent=4)
+    os.replace(tmp_path, os.path.join(directory, "meta.json"))
+
+
+def _read_meta(directory):
+    try:
+        with open(os.path.join(directory, "meta.json"), "r") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+
+def build(source=CITIES_PATH, directory=INDEX_DIR):
+    """Preprocess the JSON gazetteer into the binary index."""
+    with open(source, "r", encoding="utf-8") as f:
+        entries = json.load(f)
+
+    cities = [e for e in entries if e.get("Type") == "city"]
+    lats = np.array([c["Latitude"] for c in cities], dtype=np.float64)
+    lons = np.array([c["Longitude"] for c in cities], dtype=np.float64)
+
+    lat0 = float(lats.min()) if len(cities) else 0.0
+    lon0 = float(lons.min()) if len(cities) else 0.0
+    rows = int((lats.max() - lat0) // CELL_DEG) + 1 if len(cities) else 1
+    cols = int((lons.max() - lon0) // CELL_DEG) + 1 if len(cities) else 1
+
+    cells = (((lats - lat0) // CELL_DEG).astype(np.int64) * cols
+             + ((lons - lon0) // CELL_DEG).astype(np.int64))
+    order = np.argsort(cells, kind="stable")
+    cell_start = np.searchsorted(cells[order], np.arange(rows * cols + 1)).astype(np.int64)
+
+    encoded = [str(cities[i].get("Name", "Unknown")).encode("utf-8") for i in order]
+    name_offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    name_offsets[1:] = np.cumsum([len(n) for n in encoded])
+
+    os.makedirs(directory, exist_ok=True)
+    _save_npy(directory, "coords.npy", np.column_stack((lats[order], lons[order])))
+    _save_npy(directory, "cell_start.npy", cell_start)
+    _save_npy(directory, "name_offsets.npy", name_offsets)
+    tmp_path = os.path.join(directory, "names.bin.tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(b"".join(encoded))
+    os.replace(tmp_path, os.path.join(directory, "names.bin"))
+
+    # Written last: a matching meta.json marks a complete index
+    meta = {"count": len(cities), "lat0": lat0, "lon0": lon0, "cell_deg": CELL_DEG,
+            "rows": rows, "cols": cols, "source_sha1": _sha1(source)}
+    meta.update(_source_stamp(source))
+    _write_meta(directory, meta)
+    return meta
+
+
+def is_stale(source=CITIES_PATH, directory=INDEX_DIR):
+    meta = _read_meta(directory)
+    if meta is None:
+        return True
+
+    stamp = _source_stamp(source)
+    if all(meta.get(k) == v for k, v in stamp.items()):
+        return False
+
+    # Touched but unchanged source: refresh the stamp instead of rebuilding
+    if meta.get("source_sha1") == _sha1(source):
+        meta.update(stamp)
+        _write_meta(directory, meta)
+        return False
+    return True
+
+
+class Gazetteer:
+    """Nearest-city lookups over the memory-mapped index."""
+
+    def __init__(self, directory=INDEX_DIR):
+        meta = _read_meta(directory)
+        if meta is None:
+            raise FileNotFoundError(f"No gazetteer index in {directory}")
+
+        self.lat0, self.lon0 = meta["lat0"], meta["lon0"]
+        self.cell_deg = meta["cell_deg"]
+        self.rows, self.cols = meta["rows"], meta["cols"]
+
+        self.coords = np.load(os.path.join(directory, "coords.npy"), mmap_mode="r")
+        self.cell_start = np.load(os.path.join(directory, "cell_start.npy"), mmap_mode="r")
+        self.name_offsets = np.load(os.path.join(directory, "name_offsets.npy"), mmap_mode="r")
+        names_path = os.path.join(directory, "names.bin")
+        self.names = np.memmap(names_path, dtype=np.uint8, mode="r") if os.path.getsize(names_path) else b""
+
+    def __len__(self):
+        return len(self.coords)
+
+    def name(self, i):
+        start, stop = self.name_offsets[i], self.name_offsets[i + 1]
+        return bytes(self.names[start:stop]).decode("utf-8")
+
+    def _candidates(self, row, col, radius):
+        """Indices of all points in the square of cells around (row, col)."""
+        col0, col1 = max(0, col - radius), min(self.cols - 1, col + radius)
+        slices = []
+        for r in range(max(0, row - radius), min(self.rows - 1, row + radius) + 1):
+            start = self.cell_start[r * self.cols + col0]
+            stop = self.cell_start[r * self.cols + col1 + 1]
+            if stop > start:
+                slices.append(np.arange(start, stop))
+        return np.concatenate(slices) if slices else np.empty(0, dtype=np.int64)
+
+    def nearest(self, lat, lon):
+        """Closest city to the point, or None when the index is empty."""
+        if len(self) == 0:
+            return None
+
+        row = min(max(int((lat - self.lat0) // self.cell_deg), 0), self.rows - 1)
+        col = min(max(int((lon - self.lon0) // self.cell_deg), 0), self.cols - 1)
+        max_radius = max(self.rows, self.cols)
+
+        radius = 1
+        while True:
+            idx = self._candidates(row, col, radius)
+            if len(idx):
+                dist = hv.distances_from(lat, lon, self.coords[idx, 0], self.coords[idx, 1])
+                best = int(np.argmin(dist))
+
+                # Everything outside the searched square is at least this far away
+                lat_gap = min(lat - (self.lat0 + (row - radius) * self.cell_deg),
+                              self.lat0 + (row + radius + 1) * self.cell_deg - lat)
+                lon_gap = min(lon - (self.lon0 + (col - radius) * self.cell_deg),
+                              self.lon0 + (col + radius + 1) * self.cell_deg - lon)
+                max_lat = min(90.0, abs(lat) + radius * self.cell_deg)
+                gap_km = KM_PER_DEG * min(lat_gap, lon_gap * np.cos(np.radians(max_lat)))
+
+                if dist[best] <= gap_km or radius >= max_radius:
+                    i = int(idx[best])
+                    return Place(self.name(i), float(self.coords[i, 0]), float(self.coords[i, 1]), float(dist[best]))
+
+            if radius >= max_radius:
+                return None
+            radius = min(radius * 2, max_radius)
+
+
+_gazetteer = None
+_lock = threading.Lock()
+
+
+def get_gazetteer(source=CITIES_PATH, directory=INDEX_DIR):
+    """Memory-map the index, rebuilding it first if the JSON source changed."""
+    global _gazetteer
+
+    with _lock:
+        if _gazetteer is not None:
+            return _gazetteer
+
+        if os.path.exists(source) and is_stale(source, directory):
+            print(f"Building gazetteer index from {source}")
+            build(source, directory)
+
+        _gazetteer = Gazetteer(directory)
+        return _gazetteer
+
+
+if __name__ == "__main__":
+    result = build()
+    print(f"Indexed {result['count']} cities into {INDEX_DIR} ({result['rows']}x{result['cols']} grid)")
@@ -1,34 +1,76 @@
-import math as m
+import numpy as np
+
+EARTH_RADIUS = 6371
+
+# Memory budget for the temporaries of one distance_matrix chunk
+MATRIX_CHUNK_BYTES = 64 * 1024 * 1024
+
+
+def haversine(lat_a, lon_a, lat_b, lon_b, dtype=np.float64):
+    """Element-wise great-circle distance in km; inputs broadcast like NumPy arrays."""
+    lat_a, lon_a, lat_b, lon_b = (np.radians(np.asarray(v, dtype=dtype)) for v in (lat_a, lon_a, lat_b, lon_b))
+
+    a = np.sin((lat_b - lat_a) / 2) ** 2 + np.cos(lat_a) * np.cos(lat_b) * np.sin((lon_b - lon_a) / 2) ** 2
+    return (2 * EARTH_RADIUS * np.arcsin(np.sqrt(np.clip(a, 0, 1)))).astype(dtype, copy=False)
 
 
 def calc_distance(lat_a, lon_a, lat_b, lon_b):
-    lat_a, lon_a, lat_b, lon_b = map(m.radians, [lat_a, lon_a, lat_b, lon_b])
+    return float(haversine(lat_a, lon_a, lat_b, lon_b))
+
+
+def distances_from(lat, lon, lats, lons, dtype=np.float64):
+    """One-to-many: distances from a single point to every (lats[i], lons[i])."""
+    return haversine(lat, lon, lats, lons, dtype=dtype)
+
 
-    dlat = lat_b - lat_a
-    dlon = lon_b - lon_a
+def iter_distance_chunks(lats_a, lons_a, lats_b, lons_b, dtype=np.float64, chunk_rows=None):
+    """Yield (row_start, block) slices of the many-to-many distance matrix.
 
-    a = m.sin(dlat / 2) ** 2 + m.cos(lat_a) * m.cos(lat_b) * m.sin(dlon / 2) ** 2
-    c = 2 * m.atan2(m.sqrt(a), m.sqrt(1 - a))
-    return 6371 * c
+    Rows are processed in chunks so the temporaries stay within
+    MATRIX_CHUNK_BYTES; use this directly when the full matrix does not fit.
+    """
+    lats_a, lons_a = np.asarray(lats_a, dtype=dtype), np.asarray(lons_a, dtype=dtype)
+    lats_b, lons_b = np.asarray(lats_b, dtype=dtype)[None, :], np.asarray(lons_b, dtype=dtype)[None, :]
+
+    if chunk_rows is None:
+        # Roughly six temporaries of one block are alive at once
+        row_bytes = max(1, lats_b.size) * np.dtype(dtype).itemsize * 6
+        chunk_rows = max(1, MATRIX_CHUNK_BYTES // row_bytes)
+
+    for start in range(0, len(lats_a), chunk_rows):
+        stop = start + chunk_rows
+        yield start, haversine(lats_a[start:stop, None], lons_a[start:stop, None], lats_b, lons_b, dtype=dtype)
+
+
+def distance_matrix(lats_a, lons_a, lats_b, lons_b, dtype=np.float64, chunk_rows=None):
+    """Many-to-many: (len(lats_a), len(lats_b)) matrix of distances in km."""
+    out = np.empty((len(lats_a), len(lats_b)), dtype=dtype)
+    for start, block in iter_distance_chunks(lats_a, lons_a, lats_b, lons_b, dtype, chunk_rows):
+        out[start:start + len(block)] = block
+    return out
+
+
+def pairwise_distances(lats, lons, dtype=np.float64, chunk_rows=None):
+    """Symmetric matrix of distances between every pair of points."""
+    return distance_matrix(lats, lons, lats, lons, dtype, chunk_rows)
 
 
 def find_closest_city(lat, lon, dict_of_loc):
-    return min(
-        dict_of_loc,
-        key=lambda city: calc_distance(
-            lat, lon,
-            city["Latitude"],
-            city["Longitude"]
-        ) if city["Type"] == "city" else float("inf")
-    )
+    """Closest entry of type "city" (the first entry if there is none); None for an empty list."""
+    if not dict_of_loc:
+        return None
+    cities = [city for city in dict_of_loc if city["Type"] == "city"]
+    if not cities:
+        return dict_of_loc[0]
+
+    lats = np.fromiter((city["Latitude"] for city in cities), dtype=float, count=len(cities))
+    lons = np.fromiter((city["Longitude"] for city in cities), dtype=float, count=len(cities))
+    return cities[int(np.argmin(distances_from(lat, lon, lats, lons)))]
 
 
 def find_closest_hydrostation(lat, lon, dict_of_loc):
-    return min(
-        dict_of_loc,
-        key=lambda station: calc_distance(
-            lat, lon,
-            float(station["lat"]),
-            float(station["lon"])
-        )
-    )
+    if not dict_of_loc:
+        return None
+    lats = np.array([station["lat"] for station in dict_of_loc], dtype=float)
+    lons = np.array([station["lon"] for station in dict_of_loc], dtype=float)
+    return dict_of_loc[int(np.argmin(distances_from(lat, lon, lats, lons)))]
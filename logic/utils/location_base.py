@@ -1,7 +1,14 @@
 import json
 import os
+import tempfile
+import logic.utils.location_db as location_db
+
+# Paths ending in .sqlite/.db are served by the SQLite backend (location_db),
+# everything else is a JSON config file.
 
 def get_locations(path):
+    if location_db.is_db_path(path):
+        return location_db.open_db(path).all()
     if os.path.exists(path):
         try:
             with open(path, "r") as config:
@@ -9,13 +16,30 @@ def get_locations(path):
         except (json.JSONDecodeError, TypeError):
             return []
 
+
+def save_locations(path, locations):
+    """Atomically replace the config file (temp file + rename)."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=".config-", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "w") as config:
+            json.dump(locations, config, indent=4)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
 class Location:
 
     _next_id = None
 
     @classmethod
     def _init_id(cls, path):
-        exist = get_locations(path)
+        if location_db.is_db_path(path):
+            cls._next_id = location_db.open_db(path).next_id()
+            return
+
+        exist = get_locations(path) or []
         if len(exist) > 0:
             max_id =max(loc.get("ID", 0) for loc in exist)
             cls._next_id = max_id + 1
@@ -37,12 +61,20 @@ class Location:
         return {"ID": self.id, "Name": self.Name, "Lat": self.Lat, "Lon": self.Lon, "Time": self.Time}
 
     def to_json(self):
-        locations = get_locations(self.path)
+        if location_db.is_db_path(self.path):
+            location_db.open_db(self.path).insert(self.Name, self.Lat, self.Lon, self.Time, self.id)
+            return
+
+        locations = get_locations(self.path) or []
         locations.append(self.to_dict())
+        save_locations(self.path, locations)
 
-        with open(self.path, "w") as config:
-            json.dump(locations, config, indent=4)
 def remove_loc(path, id):
+    # Database IDs are stable, nothing to renumber
+    if location_db.is_db_path(path):
+        location_db.open_db(path).delete(id)
+        return
+
     locations = get_locations(path)
 
     new_loc = []
@@ -56,8 +88,23 @@ def remove_loc(path, id):
             loc["ID"] -= 1
         new_loc.append(loc)
 
-    with open(path, "w") as config:
-        json.dump(new_loc, config, indent=4)
+    save_locations(path, new_loc)
+
+
+def filter_bbox(locations, south, west, north, east):
+    """The given locations that lie inside a lat/lon bounding box (west > east crosses the antimeridian)."""
+    def inside(location):
+        in_lon = west <= location["Lon"] <= east if west <= east else (location["Lon"] >= west or location["Lon"] <= east)
+        return south <= location["Lat"] <= north and in_lon
+
+    return [location for location in locations if inside(location)]
+
+
+def locations_in_bbox(path, south, west, north, east):
+    """Locations inside a lat/lon bounding box (indexed query on the SQLite backend)."""
+    if location_db.is_db_path(path):
+        return location_db.open_db(path).in_bbox(south, west, north, east)
+    return filter_bbox(get_locations(path) or [], south, west, north, east)
 
 
 if __name__ == '__main__':
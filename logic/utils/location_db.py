@@ -0,0 +1,130 @@
+import sqlite3
+import threading
+
+DB_PATH = "assets/locations.sqlite"
+
+
+def is_db_path(path):
+    return str(path).endswith((".sqlite", ".db"))
+
+
+class LocationDB:
+    """SQLite location repository with stable IDs and indexed coordinates.
+
+    Unlike config.json, IDs are AUTOINCREMENT primary keys: removing a
+    location never renumbers the others.
+    """
+
+    def __init__(self, path=DB_PATH):
+        self.path = path
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS locations (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL,
+                lat REAL NOT NULL,
+                lon REAL NOT NULL,
+                time NUMERIC
+            );
+            CREATE INDEX IF NOT EXISTS locations_lat_lon ON locations(lat, lon);
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+        """)
+        self._conn.commit()
+        self._version = self._data_version()
+
+    @staticmethod
+    def _to_dict(row):
+        return {"ID": row[0], "Name": row[1], "Lat": row[2], "Lon": row[3], "Time": row[4]}
+
+    def _data_version(self):
+        return self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def changed(self):
+        """True if another connection committed since the last call."""
+        with self._lock:
+            version = self._data_version()
+            changed = version != self._version
+            self._version = version
+            return changed
+
+    def all(self):
+        with self._lock:
+            rows = self._conn.execute("SELECT id, name, lat, lon, time FROM locations ORDER BY id").fetchall()
+        return [self._to_dict(row) for row in rows]
+
+    def get(self, id):
+        with self._lock:
+            row = self._conn.execute("SELECT id, name, lat, lon, time FROM locations WHERE id = ?", (id,)).fetchone()
+        return self._to_dict(row) if row else None
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM locations").fetchone()[0]
+
+    def next_id(self):
+        with self._lock:
+            row = self._conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'locations'").fetchone()
+        return (row[0] if row else 0) + 1
+
+    def insert(self, name, lat, lon, time, id=None):
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO locations (id, name, lat, lon, time) VALUES (?, ?, ?, ?, ?)",
+                (id, name, lat, lon, time)
+            )
+            self._conn.commit()
+            return {"ID": cursor.lastrowid, "Name": name, "Lat": lat, "Lon": lon, "Time": time}
+
+    def delete(self, id):
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM locations WHERE id = ?", (id,))
+            self._conn.commit()
+            return cursor.rowcount > 0
+
+    def in_bbox(self, south, west, north, east):
+        """Locations inside the box; west > east means the box crosses the antimeridian."""
+        if west <= east:
+            lon_clause, params = "lon BETWEEN ? AND ?", (south, north, west, east)
+        else:
+            lon_clause, params = "(lon >= ? OR lon <= ?)", (south, north, west, east)
+
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT id, name, lat, lon, time FROM locations "
+                f"WHERE lat BETWEEN ? AND ? AND {lon_clause} ORDER BY id",
+                params
+            ).fetchall()
+        return [self._to_dict(row) for row in rows]
+
+    def migrate_from(self, locations, source):
+        """One-time import of config.json entries, keeping their current IDs."""
+        with self._lock:
+            if self._conn.execute("SELECT value FROM meta WHERE key = 'migrated_from'").fetchone():
+                return False
+
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO locations (id, name, lat, lon, time) VALUES (?, ?, ?, ?, ?)",
+                [(location["ID"], location["Name"], location["Lat"], location["Lon"], location.get("Time"))
+                 for location in locations]
+            )
+            self._conn.execute("INSERT INTO meta VALUES ('migrated_from', ?)", (source,))
+            self._conn.commit()
+            self._version = self._data_version()
+            return True
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_dbs = {}
+_dbs_lock = threading.Lock()
+
+
+def open_db(path=DB_PATH):
+    """Shared LocationDB per path."""
+    with _dbs_lock:
+        if path not in _dbs:
+            _dbs[path] = LocationDB(path)
+        return _dbs[path]
@@ -0,0 +1,166 @@
+import os
+import threading
+from PyQt5.QtCore import QObject, QThread, pyqtSignal
+import logic.utils.location_base as loc
+import logic.utils.location_db as location_db
+
+CONFIG_PATH = "assets/config.json"
+
+# "json" (default) or "sqlite"; once assets/locations.sqlite exists it is always used
+LOCATION_BACKEND = os.environ.get("PHOTO_APP_LOCATION_BACKEND", "json")
+
+
+class LocationStore(QObject):
+    """In-memory view of the saved locations with write-through persistence.
+
+    Locations are kept in a list (in storage order) plus a dict keyed by ID.
+    With a JSON path every write goes straight to disk through an atomic
+    replace and removing a location renumbers the following IDs; with a
+    SQLite path (see location_db) writes are single-row statements and IDs
+    are stable. Edits made by something else are picked up by comparing the
+    file mtime (or SQLite's data_version) and announced through
+    locations_reloaded; that check only runs on the store's own (GUI)
+    thread, so the signal is never emitted from a worker. Location dicts
+    handed out are never modified afterwards.
+    """
+
+    location_added = pyqtSignal(dict)
+    location_removed = pyqtSignal(int, int)  # row, ID
+    locations_reloaded = pyqtSignal()
+
+    def __init__(self, path=CONFIG_PATH, parent=None):
+        super().__init__(parent)
+        self.path = path
+        self.db = location_db.open_db(path) if location_db.is_db_path(path) else None
+        self._lock = threading.RLock()
+        self._locations = []
+        self._by_id = {}
+        self._mtime = None
+        self._load()
+
+    def _file_mtime(self):
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except OSError:
+            return None
+
+    def _load(self):
+        if self.db:
+            self.db.changed()
+            self._locations = self.db.all()
+        else:
+            self._mtime = self._file_mtime()
+            self._locations = loc.get_locations(self.path) or []
+        self._by_id = {location["ID"]: location for location in self._locations}
+
+    def _save(self):
+        loc.save_locations(self.path, self._locations)
+        self._mtime = self._file_mtime()
+
+    def refresh(self):
+        """Reload if the storage was changed outside the store. Returns True on reload.
+
+        Does nothing off the store's thread; workers see the last loaded state.
+        """
+        if QThread.currentThread() is not self.thread():
+            return False
+
+        with self._lock:
+            if self.db:
+                if not self.db.changed():
+                    return False
+            elif self._file_mtime() == self._mtime:
+                return False
+            self._load()
+
+        self.locations_reloaded.emit()
+        return True
+
+    def all(self):
+        """All locations in storage order. The returned list must not be modified."""
+        self.refresh()
+        return self._locations
+
+    def get(self, id):
+        self.refresh()
+        return self._by_id[id]
+
+    def row_of(self, id):
+        for row, location in enumerate(self._locations):
+            if location["ID"] == id:
+                return row
+        return -1
+
+    def __len__(self):
+        return len(self._locations)
+
+    def in_bbox(self, south, west, north, east):
+        """Locations inside a bounding box, using the SQLite index when available."""
+        if self.db:
+            return self.db.in_bbox(south, west, north, east)
+        return loc.filter_bbox(self.all(), south, west, north, east)
+
+    def add(self, name, lat, lon, time):
+        with self._lock:
+            if self.db:
+                location = self.db.insert(name, lat, lon, time)
+                self.db.changed()
+            else:
+                next_id = max(self._by_id, default=-1) + 1
+                location = {"ID": next_id, "Name": name, "Lat": lat, "Lon": lon, "Time": time}
+            self._locations = self._locations + [location]
+            self._by_id[location["ID"]] = location
+            if not self.db:
+                self._save()
+
+        self.location_added.emit(location)
+        return location
+
+    def remove(self, id):
+        """Remove a location. In a JSON config the following IDs shift down by one."""
+        with self._lock:
+            if id not in self._by_id:
+                return False
+
+            row = self.row_of(id)
+            self._locations = [location for location in self._locations if location["ID"] != id]
+
+            if self.db:
+                self.db.delete(id)
+                self.db.changed()
+            else:
+                # Renumbered copies: the old dicts may still be held by views and worker jobs
+                self._locations = [dict(location, ID=location["ID"] - 1) if location["ID"] > id else location
+                                   for location in self._locations]
+                self._save()
+            self._by_id = {location["ID"]: location for location in self._locations}
+
+        self.location_removed.emit(row, id)
+        return True
+
+
+def _default_path():
+    if os.path.exists(location_db.DB_PATH):
+        return location_db.DB_PATH
+    if LOCATION_BACKEND != "sqlite":
+        return CONFIG_PATH
+
+    # One-time migration of the JSON config into the new database
+    db = location_db.open_db(location_db.DB_PATH)
+    locations = loc.get_locations(CONFIG_PATH) or []
+    if db.migrate_from(locations, CONFIG_PATH):
+        print(f"Migrated {len(locations)} locations from {CONFIG_PATH} to {location_db.DB_PATH}")
+    return location_db.DB_PATH
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """Process-wide location store."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = LocationStore(_default_path())
+        return _store
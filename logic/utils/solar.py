@@ -0,0 +1,180 @@
+"""Offline solar ephemeris based on the NOAA solar calculator equations.
+
+Every function is vectorized with NumPy: event times are computed for many
+dates and many locations in a single call and returned in UTC as
+``datetime64[s]`` arrays (``NaT`` where the sun never reaches the altitude,
+e.g. no astronomical night in Polish summers).
+"""
+from datetime import datetime
+import numpy as np
+
+# Saved spots and hydro stations are all in Poland, so local time means Polish time.
+# Without a tz database (Python 3.8, Windows without tzdata) the machine's zone is used.
+try:
+    from zoneinfo import ZoneInfo
+    LOCAL_TZ = ZoneInfo("Europe/Warsaw")
+except (ImportError, KeyError):
+    LOCAL_TZ = None
+
+# (morning event, evening event, sun altitude in degrees)
+EVENTS = (
+    ("sunrise", "sunset", -0.833),
+    ("civil_dawn", "civil_dusk", -6.0),
+    ("nautical_dawn", "nautical_dusk", -12.0),
+    ("astronomical_dawn", "astronomical_dusk", -18.0),
+    # Blue hour lasts from -6° to -4°, golden hour from -4° to +6°
+    ("blue_hour_end", "blue_hour_start", -4.0),
+    ("golden_hour_end", "golden_hour_start", 6.0),
+)
+
+_UNIX_EPOCH_JD = 2440587.5
+_J2000_JD = 2451545.0
+
+
+def _sun_geometry(jd):
+    """Solar declination [rad] and equation of time [minutes] for Julian days."""
+    t = (jd - _J2000_JD) / 36525.0
+
+    mean_long = np.radians((280.46646 + t * (36000.76983 + t * 0.0003032)) % 360)
+    mean_anom = np.radians(357.52911 + t * (35999.05029 - 0.0001537 * t))
+    eccent = 0.016708634 - t * (0.000042037 + 0.0000001267 * t)
+
+    center = (np.sin(mean_anom) * (1.914602 - t * (0.004817 + 0.000014 * t))
+              + np.sin(2 * mean_anom) * (0.019993 - 0.000101 * t)
+              + np.sin(3 * mean_anom) * 0.000289)
+    omega = np.radians(125.04 - 1934.136 * t)
+    app_long = np.radians(np.degrees(mean_long) + center - 0.00569 - 0.00478 * np.sin(omega))
+
+    mean_obliq = 23 + (26 + (21.448 - t * (46.815 + t * (0.00059 - t * 0.001813))) / 60) / 60
+    obliq = np.radians(mean_obliq + 0.00256 * np.cos(omega))
+
+    declination = np.arcsin(np.sin(obliq) * np.sin(app_long))
+
+    y = np.tan(obliq / 2) ** 2
+    eq_of_time = 4 * np.degrees(
+        y * np.sin(2 * mean_long)
+        - 2 * eccent * np.sin(mean_anom)
+        + 4 * eccent * y * np.sin(mean_anom) * np.cos(2 * mean_long)
+        - 0.5 * y * y * np.sin(4 * mean_long)
+        - 1.25 * eccent * eccent * np.sin(2 * mean_anom)
+    )
+    return declination, eq_of_time
+
+
+def _hour_angle(lat, declination, altitude):
+    """Hour angle [deg] at which the sun crosses altitude; NaN if it never does."""
+    cos_ha = ((np.sin(np.radians(altitude)) - np.sin(lat) * np.sin(declination))
+              / (np.cos(lat) * np.cos(declination)))
+    with np.errstate(invalid="ignore"):
+        return np.degrees(np.arccos(cos_ha))
+
+
+def _to_datetime64(days, minutes):
+    """Combine epoch days and minutes after 0h UTC into datetime64[s], NaN -> NaT."""
+    seconds = days * 86400.0 + minutes * 60.0
+    valid = np.isfinite(seconds)
+    out = np.full(seconds.shape, np.datetime64("NaT"), dtype="datetime64[s]")
+    out[valid] = np.round(seconds[valid]).astype(np.int64)
+    return out
+
+
+def sun_events(dates, lats, lons):
+    """Sun events for every date and location.
+
+    dates is a sequence of dates (anything convertible to datetime64[D]),
+    lats/lons are sequences of the same length. Returns a dict mapping event
+    name (see EVENTS, plus "solar_noon") to a (len(dates), len(lats)) array
+    of UTC datetime64[s].
+    """
+    days = np.atleast_1d(np.asarray(dates, dtype="datetime64[D]")).astype(np.int64)[:, None].astype(float)
+    lat = np.radians(np.atleast_1d(np.asarray(lats, dtype=float)))[None, :]
+    lon = np.atleast_1d(np.asarray(lons, dtype=float))[None, :]
+    jd0 = days + _UNIX_EPOCH_JD
+
+    # The sun position only depends on the date, so it is evaluated once per
+    # day at 0h and 24h UTC and interpolated linearly to each location's time
+    decl_start, eot_start = _sun_geometry(jd0)
+    decl_end, eot_end = _sun_geometry(jd0 + 1)
+
+    def geometry_at(minutes):
+        frac = np.nan_to_num(minutes) / 1440
+        return (decl_start + (decl_end - decl_start) * frac,
+                eot_start + (eot_end - eot_start) * frac)
+
+    # Solar noon in minutes after 0h UTC, refined with the sun position at noon
+    noon = 720 - 4 * lon + np.zeros_like(days)
+    declination, eq_of_time = geometry_at(noon)
+    noon = 720 - 4 * lon - eq_of_time
+    declination, eq_of_time = geometry_at(noon)
+
+    events = {"solar_noon": _to_datetime64(days, noon)}
+    for rise_name, set_name, altitude in EVENTS:
+        for name, sign in ((rise_name, -1), (set_name, 1)):
+            minutes = noon + sign * 4 * _hour_angle(lat, declination, altitude)
+
+            # Second pass with the sun position at the estimated event time
+            decl_e, eot_e = geometry_at(minutes)
+            minutes = 720 - 4 * lon - eot_e + sign * 4 * _hour_angle(lat, decl_e, altitude)
+            events[name] = _to_datetime64(days, minutes)
+
+    return events
+
+
+def solar_elevation(times, lats, lons):
+    """Sun elevation [deg] at UTC times for each location.
+
+    times has shape (T,) or (L, T); lats/lons have shape (L,).
+    Returns an (L, T) array.
+    """
+    seconds = np.asarray(times, dtype="datetime64[s]").astype(np.int64)
+    days = np.atleast_2d(seconds / 86400.0)
+    lat = np.radians(np.asarray(lats, dtype=float))[:, None]
+    lon = np.asarray(lons, dtype=float)[:, None]
+
+    declination, eq_of_time = _sun_geometry(days + _UNIX_EPOCH_JD)
+    minutes_utc = (days % 1) * 1440
+    hour_angle = np.radians((minutes_utc + eq_of_time + 4 * lon) / 4 - 180)
+
+    cos_zenith = (np.sin(lat) * np.sin(declination)
+                  + np.cos(lat) * np.cos(declination) * np.cos(hour_angle))
+    return np.degrees(np.arcsin(np.clip(cos_zenith, -1, 1)))
+
+
+def location_tz(lat, lon):
+    """Time zone of a location; every location this app knows is in Europe/Warsaw."""
+    return LOCAL_TZ
+
+
+def to_local(value, tz=None):
+    """Convert a UTC datetime64 to a naive datetime in tz (machine local time if None)."""
+    if np.isnat(value):
+        return None
+    timestamp = int(np.asarray(value, dtype="datetime64[s]").astype(np.int64))
+    if tz is None:
+        return datetime.fromtimestamp(timestamp)
+    return datetime.fromtimestamp(timestamp, tz).replace(tzinfo=None)
+
+
+def sun_data_for_day(date, lat, lon, tz=None):
+    """Sun times for one day in the shape of a sunrisesunset.io response, in the location's time zone."""
+    events = sun_events([date], [lat], [lon])
+    tz = tz or location_tz(lat, lon)
+
+    def fmt(name):
+        local = to_local(events[name][0, 0], tz)
+        return local.strftime("%I:%M:%S %p").lstrip("0") if local else None
+
+    return {
+        "results": {
+            "date": str(np.datetime64(date, "D")),
+            "sunrise": fmt("sunrise"),
+            "sunset": fmt("sunset"),
+            "first_light": fmt("astronomical_dawn"),
+            "last_light": fmt("astronomical_dusk"),
+            "dawn": fmt("civil_dawn"),
+            "dusk": fmt("civil_dusk"),
+            "solar_noon": fmt("solar_noon"),
+            "golden_hour": fmt("golden_hour_start"),
+        },
+        "status": "OK",
+    }
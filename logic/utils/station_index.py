@@ -0,0 +1,125 @@
+import hashlib
+import json
+import os
+import pickle
+import threading
+import time
+import numpy as np
+from scipy.spatial import cKDTree
+
+INDEX_PATH = "assets/station_index.pickle"
+EARTH_RADIUS = 6371
+
+
+def to_unit_vectors(lats, lons):
+    """Convert degrees to points on the unit sphere, shape (n, 3)."""
+    lat = np.radians(np.asarray(lats, dtype=float))
+    lon = np.radians(np.asarray(lons, dtype=float))
+    cos_lat = np.cos(lat)
+    return np.column_stack((cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)))
+
+
+def stations_digest(stations):
+    """Fingerprint of the station ids and coordinates, used to detect list changes."""
+    key = json.dumps([(s["id"], s["lat"], s["lon"]) for s in stations], separators=(",", ":"))
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+
+class StationIndex:
+    """KD-tree over hydro stations on the unit sphere."""
+
+    def __init__(self, stations):
+        self.digest = stations_digest(stations)
+        self.stations = [dict(s, lat=float(s["lat"]), lon=float(s["lon"])) for s in stations]
+        self.tree = cKDTree(to_unit_vectors([s["lat"] for s in self.stations],
+                                            [s["lon"] for s in self.stations]))
+
+    def __len__(self):
+        return len(self.stations)
+
+    def k_nearest(self, lat, lon, k=1):
+        """Return up to k (station, distance_km) pairs, closest first."""
+        k = min(k, len(self.stations))
+        if k == 0:
+            return []
+
+        chord, idx = self.tree.query(to_unit_vectors([lat], [lon])[0], k=k)
+        chord, idx = np.atleast_1d(chord), np.atleast_1d(idx)
+        # Chord length on the unit sphere -> great-circle distance
+        dist = 2 * EARTH_RADIUS * np.arcsin(np.clip(chord / 2, 0, 1))
+        return [(self.stations[i], float(d)) for i, d in zip(idx, dist)]
+
+    def nearest(self, lat, lon):
+        result = self.k_nearest(lat, lon, 1)
+        return result[0][0] if result else None
+
+    def save(self, path=INDEX_PATH):
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def load(path=INDEX_PATH):
+        try:
+            with open(path, "rb") as f:
+                index = pickle.load(f)
+            return index if isinstance(index, StationIndex) else None
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError) as e:
+            print(f"Could not load station index: {e}")
+            return None
+
+
+_index = None
+_checked_at = 0.0
+_refreshing = False
+_lock = threading.Lock()
+
+
+def get_index(load_stations, max_age=24 * 3600, path=None):
+    """Return the station index, rebuilding it only when the station list changed.
+
+    load_stations is called (at most once per max_age) to get the current
+    station list; the persisted index is reused as long as its digest matches.
+    The download runs outside the module lock: while it is in progress other
+    callers get the current index (or fetch too, if there is none yet).
+    """
+    global _index, _checked_at, _refreshing
+    path = path or INDEX_PATH
+
+    with _lock:
+        now = time.time()
+        if _index is not None and (now - _checked_at < max_age or _refreshing):
+            return _index
+
+        if _index is None and os.path.exists(path):
+            _index = StationIndex.load(path)
+            if _index is not None and now - os.path.getmtime(path) < max_age:
+                _checked_at = now
+                return _index
+        _refreshing = True
+
+    try:
+        stations = load_stations()
+    finally:
+        with _lock:
+            _refreshing = False
+    if not stations:
+        return _index
+    digest = stations_digest(stations)
+
+    with _lock:
+        if _index is None or _index.digest != digest:
+            _index = StationIndex(stations)
+            try:
+                _index.save(path)
+            except OSError as e:
+                print(f"Could not save station index: {e}")
+        else:
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+
+        _checked_at = now
+        return _index
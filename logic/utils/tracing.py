@@ -0,0 +1,165 @@
+"""Span tracing of the app's hot paths, exported as Chrome trace-event JSON.
+
+Off by default. Turn it on with PHOTO_APP_TRACE=<file> (PHOTO_APP_TRACE=1
+writes trace.json) or `python main.py --trace [file]`; the trace is
+written when the app exits. Open it in chrome://tracing or
+https://ui.perfetto.dev to see where a slow stats view spends its time.
+
+    with tracing.span("HydroChart.decode", rows=n) as span:
+        ...
+        span.set(skipped=k)
+
+    @tracing.traced
+    def update_list(self): ...
+
+While tracing is off, span() hands out one shared no-op object and
+traced functions cost a single global check per call.
+"""
+import atexit
+import json
+import os
+import threading
+import time
+from functools import wraps
+
+TRACE_ENV = "PHOTO_APP_TRACE"
+DEFAULT_PATH = "trace.json"
+
+# Completed events while tracing, None while off
+_events = None
+_path = None
+_start = 0.0
+_thread_names = {}
+_registered = False
+
+
+class _Span:
+    __slots__ = ("name", "args", "begin")
+
+    def __init__(self, name, args):
+        self.name = name
+        self.args = args
+
+    def set(self, **args):
+        """Attach values known only once the work is done (sizes, status codes...)."""
+        self.args.update(args)
+
+    def __enter__(self):
+        self.begin = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter()
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+
+        events = _events
+        if events is None:
+            return False
+
+        tid = threading.get_ident()
+        if tid not in _thread_names:
+            _thread_names[tid] = threading.current_thread().name
+        events.append({
+            "name": self.name,
+            "ph": "X",
+            "ts": (self.begin - _start) * 1e6,
+            "dur": (end - self.begin) * 1e6,
+            "pid": os.getpid(),
+            "tid": tid,
+            "args": self.args,
+        })
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def set(self, **args):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def span(name, **args):
+    """Context manager timing a block as one trace event (a no-op while tracing is off)."""
+    if _events is None:
+        return _NULL_SPAN
+    return _Span(name, args)
+
+
+def traced(name=None):
+    """Decorator tracing every call of a function; the span is named after its qualified name by default.
+
+    Works both as @traced and @traced("name").
+    """
+    def decorate(fn):
+        label = name or fn.__qualname__
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if _events is None:
+                return fn(*args, **kwargs)
+            with _Span(label, {}):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    if callable(name):
+        fn, name = name, None
+        return decorate(fn)
+    return decorate
+
+
+def is_enabled():
+    return _events is not None
+
+
+def enable(path=DEFAULT_PATH):
+    """Start recording; the trace is written to path at exit (or by write())."""
+    global _events, _path, _start, _registered
+    if _events is None:
+        _start = time.perf_counter()
+        _events = []
+    _path = path
+    if not _registered:
+        atexit.register(_write_at_exit)
+        _registered = True
+
+
+def disable():
+    global _events
+    _events = None
+
+
+def write(path=None):
+    """Write the events recorded so far as Chrome trace-event JSON. Returns the path."""
+    path = path or _path or DEFAULT_PATH
+    pid = os.getpid()
+    metadata = [{"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}}
+                for tid, name in list(_thread_names.items())]
+
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"traceEvents": metadata + list(_events or []), "displayTimeUnit": "ms"}, f)
+    return path
+
+
+def _write_at_exit():
+    if _events is None:
+        return
+    try:
+        print(f"Trace with {len(_events)} spans written to {write()}")
+    except OSError as e:
+        print(f"Could not write trace: {e}")
+
+
+_env = os.environ.get(TRACE_ENV, "")
+if _env and _env != "0":
+    enable(DEFAULT_PATH if _env == "1" else _env)
@@ -1,12 +1,44 @@
+import time
+STARTED = time.perf_counter()
+
+import argparse
 import sys
+from PyQt5.QtCore import Qt, QCoreApplication, QTimer
 from PyQt5.QtWidgets import QApplication
+import logic.utils.tracing as tracing
 from gui.main_window import MainWindow
 
 if __name__ == "__main__":
-    app = QApplication(sys.argv)
+    parser = argparse.ArgumentParser(description="Photography Weather App")
+    parser.add_argument("--trace", nargs="?", const=tracing.DEFAULT_PATH, metavar="FILE",
+                        help="record a Chrome trace of the hot paths, written to FILE on exit")
+    parser.add_argument("--startup-timing", action="store_true",
+                        help="print time-to-first-paint and time-to-interactive, then quit")
+    args, qt_args = parser.parse_known_args()
+    if args.trace:
+        tracing.enable(args.trace)
+
+    timer = None
+    if args.startup_timing:
+        from gui.startup import StartupTimer
+        timer = StartupTimer(STARTED)
+        timer.mark("imports")
+
+    # QtWebEngine is imported after the QApplication exists, which needs shared GL contexts
+    QCoreApplication.setAttribute(Qt.AA_ShareOpenGLContexts)
+    app = QApplication(sys.argv[:1] + qt_args)
     with open("assets/dark.qss", "r") as f:
         app.setStyleSheet(f.read())
 
     window = MainWindow()
+
+    if timer:
+        timer.mark("window created")
+        timer.watch(window)
+        window.warm_up.finished.connect(lambda seconds: timer.mark("warm-up done"))
+        # Interactive once the first view is up and the event loop is idle again
+        window.main_view.first_view_ready.connect(lambda kind: QTimer.singleShot(0, timer.report))
+        timer.reported.connect(app.quit)
+
     window.show()
     sys.exit(app.exec_())
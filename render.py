@@ -0,0 +1,153 @@
+"""Headless chart renderer.
+
+Renders the meteo and hydro charts for every saved location, or for the
+given coordinates, to PNG or SVG files without starting the GUI:
+
+    python render.py [--out charts] [--format png|svg] [--charts meteo hydro]
+                     [--coords 52.2297,21.0122 50.0647,19.9450] [--workers N]
+
+Data is fetched up front in the main process (forecasts in batched
+requests, each hydro station once); the rendering itself is spread over a
+process pool with one worker per core by default. Each worker draws with
+the Agg backend and keeps one figure per chart type, updating it in place
+for every location.
+"""
+import argparse
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+
+import matplotlib
+matplotlib.use("Agg")
+
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+import logic.stats.charts as charts
+import logic.stats.data_fetcher as data_fetcher
+
+CHART_SIZES = {"meteo": (10, 4), "hydro": (10, 3)}
+BACKGROUND = "#242729"
+FETCH_THREADS = 8
+
+_charts = {}
+
+
+def parse_coords(values):
+    """"lat,lon" strings into location dicts named after the nearest city."""
+    locations = []
+    for i, value in enumerate(values):
+        try:
+            lat, lon = (float(part) for part in value.split(","))
+        except ValueError:
+            print(f"Skipping invalid coordinates: {value}")
+            continue
+        locations.append({"ID": i, "Name": _place_name(lat, lon), "Lat": lat, "Lon": lon})
+    return locations
+
+
+def _place_name(lat, lon):
+    try:
+        import logic.utils.gazetteer as gazetteer
+        place = gazetteer.get_gazetteer().nearest(lat, lon)
+        if place:
+            return place.name
+    except Exception as e:
+        print(f"Error loading gazetteer: {e}")
+    return f"{lat:.4f}, {lon:.4f}"
+
+
+def saved_locations():
+    from logic.utils.location_store import get_store
+    return list(get_store().all())
+
+
+def fetch_hydro(locations):
+    """{location ID: station history}, fetching each nearby station once."""
+    with ThreadPoolExecutor(FETCH_THREADS) as pool:
+        station_ids = list(pool.map(lambda location: data_fetcher.closest_station_id(location["Lat"], location["Lon"]),
+                                    locations))
+        unique = sorted({s for s in station_ids if s is not None})
+        histories = dict(zip(unique, pool.map(data_fetcher.get_station_data, unique)))
+    return {location["ID"]: histories.get(station_id) or {} for location, station_id in zip(locations, station_ids)}
+
+
+def output_path(out_dir, location, kind, fmt):
+    slug = re.sub(r"[^\w-]+", "_", str(location["Name"])).strip("_") or "location"
+    return os.path.join(out_dir, f"{location['ID']}_{slug}_{kind}.{fmt}")
+
+
+def _get_chart(kind):
+    if kind not in _charts:
+        figure = Figure(figsize=CHART_SIZES[kind])
+        FigureCanvasAgg(figure)
+        chart = charts.MeteoChart(figure) if kind == "meteo" else charts.HydroChart(figure)
+        # The charts are transparent for the Qt stylesheet; files get the app's background instead
+        figure.patch.set_alpha(1.0)
+        figure.patch.set_facecolor(BACKGROUND)
+        _charts[kind] = chart
+    return _charts[kind]
+
+
+def render_chart(task):
+    """Worker: draw one chart and save it. Returns the path, or None if there was nothing to plot."""
+    kind, location, data, path, now = task
+    try:
+        chart = _get_chart(kind)
+        updated = chart.update(location, data, now) if kind == "meteo" else chart.update(location, data)
+        if not updated:
+            return None
+        chart.figure.savefig(path)
+        return path
+    except Exception as e:
+        print(f"Error rendering {kind} chart for {location['Name']}: {e}")
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render meteo and hydro charts without the GUI.")
+    parser.add_argument("--out", default="charts", help="output directory")
+    parser.add_argument("--format", choices=["png", "svg"], default="png")
+    parser.add_argument("--charts", nargs="+", choices=["meteo", "hydro"], default=["meteo", "hydro"])
+    parser.add_argument("--coords", nargs="+", metavar="LAT,LON", help="render these points instead of saved locations")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    locations = parse_coords(args.coords) if args.coords else saved_locations()
+    if not locations:
+        print("No locations to render")
+        return 1
+    os.makedirs(args.out, exist_ok=True)
+
+    start = time.perf_counter()
+    data = {}
+    if "meteo" in args.charts:
+        data["meteo"] = data_fetcher.fetch_meteo_batch(locations)
+    if "hydro" in args.charts:
+        data["hydro"] = fetch_hydro(locations)
+    fetched = time.perf_counter()
+
+    # One "now" for the whole sheet so every meteo chart covers the same hours
+    now = datetime.now()
+    tasks = [
+        (kind, location, data[kind].get(location["ID"]) or {}, output_path(args.out, location, kind, args.format), now)
+        for location in locations
+        for kind in args.charts
+    ]
+
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        paths = list(pool.map(render_chart, tasks, chunksize=max(1, len(tasks) // (args.workers * 4))))
+    done = time.perf_counter()
+
+    rendered = sum(1 for path in paths if path)
+    render_time = done - fetched
+    print(f"Fetched data for {len(locations)} locations in {fetched - start:.2f}s")
+    print(f"Rendered {rendered} of {len(tasks)} charts in {render_time:.2f}s with {args.workers} workers "
+          f"({rendered / render_time:.1f} charts/s) into {args.out}/")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())